@@ -1,142 +1,55 @@
+import asyncio
 import tkinter as tk
 from tkinter import messagebox, ttk
-import heapq
-from collections import defaultdict
-import math
+import os
+import sys
+import time
+from layout import DEFAULT_LAYOUT
+from planner import HospitalPlanner
+from scheduling import NO_DEADLINE, PRIORITIES, PRIORITY_NAMES
+from simulation import Simulation, follow_route
+from widgets import FilterCombobox, OrderList, StockTable
+
+# Stock and pending orders survive restarts here
+STATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "state")
+
+# Playback advances the simulation clock in slices of this many milliseconds
+TICK_MS = 50
+
+# The telemetry panel (and the metrics file, if any) refresh this often
+TELEMETRY_MS = 2000
+
 
 class HospitalDeliveryApp:
-    def __init__(self, root):
+    def __init__(self, root, planner=None, metrics_path=None):
         self.root = root
         self.root.title("Hospital Medicine Delivery System")
         
-        # Room coordinates with optimized layout
-        self.room_positions = {
-            # Ground Floor
-            "Main Entrance": (400, 550),
-            "Emergency Exit": (100, 550),
-            "Information Desk": (400, 500),
-            "Emergency": (300, 550),
-            "Pharmacy": (500, 500),
-            "Cafeteria": (600, 550),
-            "Ground Floor Hallway": (400, 400),
-            
-            # First Floor
-            "Floor 1 Elevator": (400, 300),
-            "Floor 1 Emergency Exit": (700, 300),
-            "Floor 1 Hallway": (500, 300),
-            "Ward A": (600, 250),
-            "Room 101": (700, 200),
-            "Room 102": (700, 250),
-            "Room 103": (700, 300),
-            "Ward B": (600, 350),
-            "Room 201": (700, 325),
-            "Room 202": (700, 375),
-            
-            # Second Floor
-            "Floor 2 Elevator": (400, 200),
-            "Floor 2 Emergency Exit": (100, 200),
-            "Floor 2 Hallway": (300, 200),
-            "ICU": (200, 200),
-            "ICU Room 1": (100, 150),
-            "ICU Room 2": (100, 250),
-            "Operating Theaters": (300, 150),
-            "Theater 1": (200, 100),
-            "Theater 2": (300, 100),
-            
-            # Special Areas
-            "Pediatrics Ward": (600, 150),
-            "Pediatrics Room 1": (650, 100),
-            "Pediatrics Room 2": (650, 200),
-            "Oncology Ward": (600, 400),
-            "Oncology Room 1": (650, 350),
-            "Oncology Room 2": (650, 450),
-            
-            # Staff Areas
-            "Doctors Lounge": (200, 300),
-            "Nurses Station": (200, 400),
-            "Administration": (100, 400)
-        }
+        # Routing, inventory and delivery state live in the headless planner
+        self.planner = planner or HospitalPlanner()
         
-# Hospital layout graph
-        self.hospital = self.create_hospital_layout()
+        # Retained-mode map state; frame_hooks are called with each redraw's duration
+        self.static_drawn = False
+        self.frame_time = 0
+        self.frame_hooks = [lambda seconds: self.planner.telemetry.observe("render", seconds)]
+        self.planner.edge_hooks.append(self.on_edge_change)
         
-        # Medicine inventory
-        self.medicines = {
-            "Paracetamol": 100, "Ibuprofen": 80, "Amoxicillin": 60,
-            "Omeprazole": 75, "Loratadine": 50, "Morphine": 30,
-            "Insulin": 40, "Chemotherapy Drugs": 20, "Pediatric Antibiotics": 45
-        }
+        # Prometheus text file rewritten on every telemetry refresh
+        self.metrics_path = metrics_path
         
-        # Delivery system state
-        self.deliveries = []
-        self.current_path = []
-        self.current_delivery_index = 0
-        self.delivery_in_progress = False
-        self.emergency_activated = False
-        
-        # Emergency exits mapping
-        self.emergency_exits = {
-            "Ground Floor": "Emergency Exit",
-            "First Floor": "Floor 1 Emergency Exit",
-            "Second Floor": "Floor 2 Emergency Exit"
-        }
+        # Simulated-time playback: one simulated time unit per second, the cart
+        # covering playback_speed units of corridor cost per time unit
+        self.loop = asyncio.new_event_loop()
+        self.sim = Simulation()
+        self.sim.subscribe(self.on_sim_event)
+        self.playback_speed = 1.0
+        self.playing = False
+        self.playback_active = False
         
         # Initialize GUI
         self.setup_gui()
         self.center_view()
-
-    def create_hospital_layout(self):
-        """Create the hospital graph structure with proper connections"""
-        return {
-            # Ground Floor
-            "Main Entrance": {"Information Desk": 1, "Emergency": 2, "Emergency Exit": 3},
-            "Emergency Exit": {"Main Entrance": 3, "Emergency": 2},
-            "Information Desk": {"Main Entrance": 1, "Pharmacy": 1, "Ground Floor Hallway": 2},
-            "Emergency": {"Main Entrance": 2, "Pharmacy": 3, "Emergency Exit": 2},
-            "Pharmacy": {"Information Desk": 1, "Emergency": 3, "Ground Floor Hallway": 1, "Cafeteria": 2},
-            "Cafeteria": {"Pharmacy": 2, "Ground Floor Hallway": 3},
-            "Ground Floor Hallway": {"Information Desk": 2, "Pharmacy": 1, "Cafeteria": 3, 
-                                   "Floor 1 Elevator": 2, "Floor 2 Elevator": 2, 
-                                   "Pediatrics Ward": 4, "Oncology Ward": 4},
-            
-            # First Floor
-            "Floor 1 Elevator": {"Ground Floor Hallway": 2, "Floor 1 Hallway": 1},
-            "Floor 1 Emergency Exit": {"Floor 1 Hallway": 2},
-            "Floor 1 Hallway": {"Floor 1 Elevator": 1, "Ward A": 2, "Ward B": 2, 
-                               "Doctors Lounge": 3, "Floor 1 Emergency Exit": 2},
-            "Ward A": {"Floor 1 Hallway": 2, "Room 101": 1, "Room 102": 1, "Room 103": 1},
-            "Ward B": {"Floor 1 Hallway": 2, "Room 201": 1, "Room 202": 1},
-            "Room 101": {"Ward A": 1},
-            "Room 102": {"Ward A": 1},
-            "Room 103": {"Ward A": 1},
-            "Room 201": {"Ward B": 1},
-            "Room 202": {"Ward B": 1},
-            
-            # Second Floor
-            "Floor 2 Elevator": {"Ground Floor Hallway": 2, "Floor 2 Hallway": 1},
-            "Floor 2 Emergency Exit": {"Floor 2 Hallway": 2},
-            "Floor 2 Hallway": {"Floor 2 Elevator": 1, "ICU": 2, "Operating Theaters": 1, 
-                               "Nurses Station": 1, "Floor 2 Emergency Exit": 2},
-            "ICU": {"Floor 2 Hallway": 2, "ICU Room 1": 1, "ICU Room 2": 1},
-            "Operating Theaters": {"Floor 2 Hallway": 1, "Theater 1": 1, "Theater 2": 1},
-            "ICU Room 1": {"ICU": 1},
-            "ICU Room 2": {"ICU": 1},
-            "Theater 1": {"Operating Theaters": 1},
-            "Theater 2": {"Operating Theaters": 1},
-            
-            # Special Areas
-            "Pediatrics Ward": {"Ground Floor Hallway": 4, "Pediatrics Room 1": 1, "Pediatrics Room 2": 1},
-            "Oncology Ward": {"Ground Floor Hallway": 4, "Oncology Room 1": 1, "Oncology Room 2": 1},
-            "Pediatrics Room 1": {"Pediatrics Ward": 1},
-            "Pediatrics Room 2": {"Pediatrics Ward": 1},
-            "Oncology Room 1": {"Oncology Ward": 1},
-            "Oncology Room 2": {"Oncology Ward": 1},
-            
-            # Staff Areas
-            "Doctors Lounge": {"Floor 1 Hallway": 3},
-            "Nurses Station": {"Floor 2 Hallway": 1, "Administration": 2},
-            "Administration": {"Nurses Station": 2}
-        }
+        self.refresh_telemetry()
 
     def setup_gui(self):
         """Initialize the graphical user interface"""
@@ -147,35 +60,21 @@ class HospitalDeliveryApp:
         control_frame.pack(side=tk.LEFT, fill=tk.Y, padx=10, pady=10)
         
         # Medicine Stock Display
-        stock_frame = ttk.Frame(control_frame)
-        stock_frame.pack(fill=tk.X, pady=5)
-        
-        self.stock_canvas = tk.Canvas(stock_frame, height=150)
-        scrollbar = ttk.Scrollbar(stock_frame, orient="vertical", command=self.stock_canvas.yview)
-        self.scrollable_frame = ttk.Frame(self.stock_canvas)
-        
-        self.scrollable_frame.bind("<Configure>", 
-            lambda e: self.stock_canvas.configure(scrollregion=self.stock_canvas.bbox("all")))
-        
-        self.stock_canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        self.stock_canvas.configure(yscrollcommand=scrollbar.set)
-        
-        self.stock_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.stock_table = StockTable(control_frame)
+        self.stock_table.pack(fill=tk.X, pady=5)
         self.update_stock_display()
         
-        # Delivery Controls
+        # Delivery Controls; typing in the room box narrows its list on large campuses
         ttk.Label(control_frame, text="Delivery Room:").pack(pady=5)
         self.room_var = tk.StringVar()
-        self.room_combobox = ttk.Combobox(control_frame, textvariable=self.room_var, 
-                                        values=list(self.hospital.keys()))
+        self.room_combobox = FilterCombobox(control_frame, self.planner.hospital, textvariable=self.room_var)
         self.room_combobox.pack(fill=tk.X, pady=5)
         self.room_combobox.current(0)
         
         ttk.Label(control_frame, text="Medicine:").pack(pady=5)
         self.med_var = tk.StringVar()
         self.med_combobox = ttk.Combobox(control_frame, textvariable=self.med_var, 
-                                       values=list(self.medicines.keys()))
+                                       values=list(self.planner.medicines.keys()))
         self.med_combobox.pack(fill=tk.X, pady=5)
         self.med_combobox.current(0)
         
@@ -184,6 +83,16 @@ class HospitalDeliveryApp:
         self.qty_spinbox = ttk.Spinbox(control_frame, from_=1, to=20, textvariable=self.qty_var)
         self.qty_spinbox.pack(fill=tk.X, pady=5)
         
+        ttk.Label(control_frame, text="Priority:").pack(pady=5)
+        self.priority_var = tk.StringVar(value="Auto")
+        self.priority_combobox = ttk.Combobox(control_frame, textvariable=self.priority_var, state="readonly",
+                                            values=["Auto"] + list(PRIORITIES.keys()))
+        self.priority_combobox.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(control_frame, text="Deadline (optional):").pack(pady=5)
+        self.deadline_var = tk.StringVar()
+        ttk.Entry(control_frame, textvariable=self.deadline_var).pack(fill=tk.X, pady=5)
+        
         ttk.Button(control_frame, text="Add Delivery", command=self.add_delivery).pack(fill=tk.X, pady=5)
         ttk.Button(control_frame, text="Remove Delivery", command=self.remove_delivery).pack(fill=tk.X, pady=5)
         
@@ -193,9 +102,10 @@ class HospitalDeliveryApp:
                                      bg="red", fg="white", font=('Arial', 12, 'bold'))
         self.emergency_btn.pack(fill=tk.X, pady=10)
         
-        # Delivery List
-        self.delivery_listbox = tk.Listbox(control_frame, height=10)
-        self.delivery_listbox.pack(fill=tk.BOTH, expand=True, pady=5)
+        # Delivery List, filtered by the entry above it and loaded a page at a time
+        self.delivery_list = OrderList(control_frame, height=10)
+        self.delivery_list.pack(fill=tk.BOTH, expand=True, pady=5)
+        self.update_delivery_listbox()
         
         # Delivery Controls
         self.start_btn = ttk.Button(control_frame, text="Start Delivery", command=self.start_delivery)
@@ -203,6 +113,16 @@ class HospitalDeliveryApp:
         self.next_btn = ttk.Button(control_frame, text="Next Step", 
                                   command=self.next_step, state=tk.DISABLED)
         self.next_btn.pack(fill=tk.X, pady=5)
+        self.play_btn = ttk.Button(control_frame, text="Play",
+                                  command=self.play_delivery, state=tk.DISABLED)
+        self.play_btn.pack(fill=tk.X, pady=5)
+        
+        # Telemetry dashboard
+        telemetry_frame = ttk.LabelFrame(control_frame, text="Telemetry")
+        telemetry_frame.pack(fill=tk.X, pady=5)
+        self.telemetry_var = tk.StringVar()
+        ttk.Label(telemetry_frame, textvariable=self.telemetry_var, font=('Courier', 8),
+                  justify=tk.LEFT).pack(anchor="w", padx=5, pady=2)
         
         # Display Frame with Scrollable Canvas
         display_frame = ttk.Frame(self.root)
@@ -221,61 +141,139 @@ class HospitalDeliveryApp:
         display_frame.grid_columnconfigure(0, weight=1)
         
         self.canvas.bind("<MouseWheel>", lambda e: self.canvas.yview_scroll(-1*(e.delta//120), "units"))
+        self.canvas.bind("<Button-1>", self.on_canvas_click)
         self.draw_hospital_map()
 
     def update_stock_display(self):
         """Update the medicine stock display"""
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-            
-        for med, qty in self.medicines.items():
-            frame = ttk.Frame(self.scrollable_frame)
-            frame.pack(fill=tk.X, pady=2)
-            color = 'red' if qty < 10 else 'orange' if qty < 25 else 'black'
-            ttk.Label(frame, text=f"{med}:", width=20).pack(side=tk.LEFT)
-            ttk.Label(frame, text=str(qty), foreground=color, width=10).pack(side=tk.LEFT)
+        self.stock_table.update(self.planner.medicines)
 
     def draw_hospital_map(self):
-        """Draw the hospital map with current state"""
+        """Update the dynamic map layers (deliveries, path, current position)"""
+        start = time.perf_counter()
+        if not self.static_drawn:
+            self.draw_static_map()
+        
+        # Delivery highlights: only toggle rooms whose state changed
+        delivery_rooms = {d[0] for d in self.planner.deliveries}
+        for room in delivery_rooms ^ self.highlighted_rooms:
+            state = tk.NORMAL if room in delivery_rooms else tk.HIDDEN
+            self.canvas.itemconfigure(self.highlight_items[room], state=state)
+        self.highlighted_rooms = delivery_rooms
+        
+        # Current position and path overlay
+        current_room = self.planner.current_room
+        if current_room is not None:
+            color = "red" if self.planner.emergency_activated else "green"
+            x, y = self.planner.room_positions[current_room]
+            self.canvas.coords(self.marker_oval, x-30, y-30, x+30, y+30)
+            self.canvas.coords(self.marker_text, x, y+40)
+            self.canvas.itemconfigure(self.marker_oval, outline=color, state=tk.NORMAL)
+            self.canvas.itemconfigure(self.marker_text, fill=color, state=tk.NORMAL)
+            self.draw_path_overlay(color)
+        else:
+            self.canvas.itemconfigure("marker", state=tk.HIDDEN)
+            self.draw_path_overlay(None)
+        
+        self.frame_time = time.perf_counter() - start
+        for hook in self.frame_hooks:
+            hook(self.frame_time)
+
+    def draw_static_map(self):
+        """Create the edge, weight label and room layers once"""
         self.canvas.delete("all")
         
-        # Draw connections
-        for room, connections in self.hospital.items():
-            x1, y1 = self.room_positions[room]
-            for neighbor, dist in connections.items():
-                x2, y2 = self.room_positions[neighbor]
-                color = "red" if "Emergency" in room+neighbor else "blue" if "Elevator" in room+neighbor else "gray"
-                self.canvas.create_line(x1, y1, x2, y2, fill=color, width=2)
-                dx, dy = x2-x1, y2-y1
-                angle = math.atan2(dy, dx)
-                self.canvas.create_text(x1+dx/2+10*math.sin(angle), y1+dy/2-10*math.cos(angle),
-                                      text=str(dist), fill="blue", font=('Arial', 8))
-        
-        # Draw rooms
-        for room, (x, y) in self.room_positions.items():
+        # Draw connections, with every weight label placed in one batch call
+        edges = [(room, neighbor) for room, connections in self.planner.hospital.items() for neighbor in connections]
+        labels = self.planner.geometry.label_positions(edges)
+        self.edge_items = {}  # (room, neighbor) -> (line, weight label), updated by on_edge_change
+        for (room, neighbor), (lx, ly) in zip(edges, labels):
+            x1, y1 = self.planner.room_positions[room]
+            x2, y2 = self.planner.room_positions[neighbor]
+            color = "red" if "Emergency" in room+neighbor else "blue" if "Elevator" in room+neighbor else "gray"
+            line = self.canvas.create_line(x1, y1, x2, y2, fill=color, width=2, tags=("static", "edge"))
+            text = self.canvas.create_text(lx, ly, text=str(self.planner.hospital[room][neighbor]),
+                                           fill="blue", font=('Arial', 8), tags=("static", "weight"))
+            self.edge_items[(room, neighbor)] = (line, text)
+        
+        # Draw rooms, each with a hidden delivery highlight
+        self.highlight_items = {}
+        for room, (x, y) in self.planner.room_positions.items():
             color = self.get_room_color(room)
-            self.canvas.create_oval(x-25, y-25, x+25, y+25, fill=color, outline="black")
+            self.canvas.create_oval(x-25, y-25, x+25, y+25, fill=color, outline="black", tags=("static", "room"))
             label = self.get_room_label(room)
-            self.canvas.create_text(x, y, text=label, font=('Arial', 8), width=50)
-            
-            if any(d[0] == room for d in self.deliveries):
-                self.canvas.create_oval(x-30, y-30, x+30, y+30, outline="yellow", width=2)
-        
-        # Draw current position
-        if self.current_path and self.current_delivery_index < len(self.current_path):
-            current_room = self.current_path[self.current_delivery_index]
-            x, y = self.room_positions[current_room]
-            color = "red" if self.emergency_activated else "green"
-            self.canvas.create_oval(x-30, y-30, x+30, y+30, outline=color, width=3)
-            self.canvas.create_text(x, y+40, text="CURRENT", fill=color, font=('Arial', 10, 'bold'))
-            
-            # Draw path
-            path = [self.room_positions[room] for room in self.current_path]
-            for i in range(len(path)-1):
-                self.canvas.create_line(path[i][0], path[i][1], path[i+1][0], path[i+1][1],
-                                      fill=color, width=3, arrow=tk.LAST if i == self.current_delivery_index else None)
+            self.canvas.create_text(x, y, text=label, font=('Arial', 8), width=50, tags=("static", "room"))
+            self.highlight_items[room] = self.canvas.create_oval(
+                x-30, y-30, x+30, y+30, outline="yellow", width=2, state=tk.HIDDEN, tags="highlight")
+        self.highlighted_rooms = set()
+        
+        # Current position marker, moved with coords() on every step
+        self.marker_oval = self.canvas.create_oval(0, 0, 0, 0, width=3, state=tk.HIDDEN, tags="marker")
+        self.marker_text = self.canvas.create_text(0, 0, text="CURRENT", font=('Arial', 10, 'bold'),
+                                                   state=tk.HIDDEN, tags="marker")
+        self.path_items = []
+        self.drawn_path = None
+        self.drawn_step = None
+        self.drawn_color = None
         
         self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+        self.static_drawn = True
+
+    def draw_path_overlay(self, color):
+        """Recreate path segments only when the route changes, otherwise just move the arrow"""
+        path = self.planner.current_path if color else []
+        step = self.planner.current_delivery_index
+        
+        if path != self.drawn_path:
+            self.canvas.delete("path")
+            points = [self.planner.room_positions[room] for room in path]
+            self.path_items = [
+                self.canvas.create_line(points[i][0], points[i][1], points[i+1][0], points[i+1][1],
+                                        fill=color, width=3, tags="path")
+                for i in range(len(points)-1)
+            ]
+            self.drawn_path = list(path)
+            self.drawn_step = None
+            self.drawn_color = color
+            self.canvas.tag_raise("marker")  # Keep the current position on top of the new route
+        elif color != self.drawn_color:
+            self.canvas.itemconfigure("path", fill=color)
+            self.drawn_color = color
+        
+        if step != self.drawn_step:
+            if self.drawn_step is not None and self.drawn_step < len(self.path_items):
+                self.canvas.itemconfigure(self.path_items[self.drawn_step], arrow=tk.NONE)
+            if step < len(self.path_items):
+                self.canvas.itemconfigure(self.path_items[step], arrow=tk.LAST)
+            self.drawn_step = step
+
+    def on_canvas_click(self, event):
+        """Select the clicked room as the delivery room"""
+        x, y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        room = self.planner.geometry.nearest(x, y, radius=25)
+        if room is not None:
+            self.room_var.set(room)
+
+    def on_edge_change(self, a, b, cost):
+        """Show a corridor's new weight, or dash it while it is closed"""
+        if not self.static_drawn:
+            return
+        items = self.edge_items.get((a, b))
+        if items is None:
+            self.static_drawn = False  # A corridor the map has never drawn
+            return
+        line, text = items
+        if cost is None:
+            self.canvas.itemconfigure(line, dash=(4, 4))
+            self.canvas.itemconfigure(text, state=tk.HIDDEN)
+        else:
+            self.canvas.itemconfigure(line, dash=())
+            self.canvas.itemconfigure(text, text=str(cost), state=tk.NORMAL)
+
+    def rebuild_map(self):
+        """Redraw every layer, e.g. after the layout or an edge weight changed"""
+        self.static_drawn = False
+        self.draw_hospital_map()
 
     def get_room_color(self, room):
         """Return color code based on room type"""
@@ -315,94 +313,73 @@ class HospitalDeliveryApp:
         self.canvas.xview_moveto(0.25)
         self.canvas.yview_moveto(0.25)
 
+
     def add_delivery(self):
         """Add a delivery to the list"""
-        if self.delivery_in_progress:
-            messagebox.showerror("Error", "Cannot add during active delivery")
+        try:
+            deadline = self.deadline_var.get().strip()
+            deadline = float(deadline) if deadline else None
+            priority = PRIORITIES.get(self.priority_var.get())
+            self.planner.add_delivery(self.room_var.get(), self.med_var.get(), self.qty_var.get(),
+                                      priority, deadline)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
             return
-            
-        room = self.room_var.get()
-        med = self.med_var.get()
-        qty = self.qty_var.get()
-        
-        if not room:
-            messagebox.showerror("Error", "Please select a room")
-            return
-        
-        if qty < 1:
-            messagebox.showerror("Error", "Quantity must be at least 1")
-            return
-            
-        if qty > self.medicines[med]:
-            messagebox.showerror("Error", f"Not enough {med} in stock")
-            return
-        
-        # Update existing delivery if exists
-        for i, (r, m, q) in enumerate(self.deliveries):
-            if r == room and m == med:
-                self.deliveries[i] = (r, m, q+qty)
-                self.medicines[med] -= qty
-                self.update_stock_display()
-                self.update_delivery_listbox()
-                return
-        
-        # Add new delivery
-        self.deliveries.append((room, med, qty))
-        self.medicines[med] -= qty
         self.update_stock_display()
         self.update_delivery_listbox()
 
     def update_delivery_listbox(self):
         """Update the delivery list display"""
-        self.delivery_listbox.delete(0, tk.END)
-        for room, med, qty in self.deliveries:
-            self.delivery_listbox.insert(tk.END, f"{room}: {med} x{qty}")
+        rows = []
+        for room, med, qty, priority, deadline in self.planner.delivery_queue.items():
+            text = f"[{PRIORITY_NAMES[priority]}] {room}: {med} x{qty}"
+            if deadline != NO_DEADLINE:
+                text += f" (by {deadline:g})"
+            rows.append(((room, med), text))
+        self.delivery_list.update(rows)
 
     def remove_delivery(self):
         """Remove selected delivery"""
-        if self.delivery_in_progress:
+        if self.planner.delivery_in_progress:
             messagebox.showerror("Error", "Cannot remove during active delivery")
             return
             
-        selection = self.delivery_listbox.curselection()
-        if not selection:
+        selection = self.delivery_list.selected()
+        if selection is None:
             return
             
-        index = selection[0]
-        room, med, qty = self.deliveries[index]
-        self.medicines[med] += qty
-        del self.deliveries[index]
+        keys = [order[:2] for order in self.planner.delivery_queue.items()]
+        self.planner.remove_delivery(keys.index(selection))
         self.update_stock_display()
         self.update_delivery_listbox()
 
     def start_delivery(self):
         """Start the delivery process"""
-        if not self.deliveries:
-            messagebox.showerror("Error", "No deliveries in the list")
+        try:
+            path = self.planner.start_delivery()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
             return
-            
-        self.delivery_in_progress = True
-        self.emergency_activated = False
-        rooms_to_visit = list(set(d[0] for d in self.deliveries))
-        self.current_path = self.find_optimal_path("Pharmacy", rooms_to_visit)
-        self.current_delivery_index = 0
         
         self.next_btn.config(state=tk.NORMAL)
+        self.play_btn.config(state=tk.NORMAL)
         self.start_btn.config(state=tk.DISABLED)
         self.draw_hospital_map()
-        messagebox.showinfo("Delivery Started", f"Route: {' -> '.join(self.current_path)}")
+        messagebox.showinfo("Delivery Started", 
+                          f"Route: {' -> '.join(path)}\nTotal distance: {self.planner.route_cost}")
+        if self.planner.late_rooms:
+            messagebox.showwarning("Deadlines at Risk",
+                                   f"Cannot reach in time: {', '.join(self.planner.late_rooms)}")
 
     def next_step(self):
         """Advance to next delivery step"""
-        if self.emergency_activated:
+        if self.planner.emergency_activated:
             return
             
-        if self.current_delivery_index < len(self.current_path) - 1:
-            self.current_delivery_index += 1
-            current_room = self.current_path[self.current_delivery_index]
-            
+        current_room = self.planner.next_step()
+        if current_room is not None:
             # Check for deliveries to this room
-            deliveries = [d for d in self.deliveries if d[0] == current_room]
+            deliveries = self.planner.deliveries_to(current_room)
             if deliveries:
                 items = "\n".join([f"{med} x{qty}" for _, med, qty in deliveries])
                 messagebox.showinfo(f"Deliveries to {current_room}", items)
@@ -414,117 +391,88 @@ class HospitalDeliveryApp:
 
     def reset_delivery(self):
         """Reset delivery state"""
-        self.delivery_in_progress = False
-        self.current_path = []
-        self.current_delivery_index = 0
+        self.planner.reset_delivery()
+        self.playing = False
         self.next_btn.config(state=tk.DISABLED)
+        self.play_btn.config(state=tk.DISABLED)
         self.start_btn.config(state=tk.NORMAL)
         self.draw_hospital_map()
 
     def activate_emergency(self):
         """Emergency stop procedure"""
-        if not self.delivery_in_progress:
+        if not self.planner.delivery_in_progress:
             messagebox.showinfo("Info", "No active delivery to interrupt")
             return
             
-        self.emergency_activated = True
-        current_room = self.current_path[self.current_delivery_index]
-        
-        # Determine current floor
-        floor = "Ground Floor"
-        if "Floor 1" in current_room:
-            floor = "First Floor"
-        elif "Floor 2" in current_room:
-            floor = "Second Floor"
-            
-        exit_room = self.emergency_exits.get(floor, "Emergency Exit")
-        
-        # Find path to emergency exit
-        distance, path = self.a_star_search(current_room, exit_room)
-        if distance == float('inf'):
-            messagebox.showerror("Error", "No path to emergency exit!")
+        try:
+            self.planner.activate_emergency()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
             return
-            
-        self.current_path = path
-        self.current_delivery_index = 0
-        self.advance_emergency_path()
+        self.draw_hospital_map()
+        self.play_delivery()
 
-    def advance_emergency_path(self):
-        """Automatically advance through emergency path"""
-        if self.current_delivery_index < len(self.current_path) - 1:
-            self.current_delivery_index += 1
-            self.draw_hospital_map()
-            self.root.after(1000, self.advance_emergency_path)
-        else:
-            messagebox.showinfo("Emergency Exit Reached", f"Arrived at {self.current_path[-1]}")
-            self.reset_delivery()
+    def play_delivery(self):
+        """Move the cart along its route in simulated time"""
+        if not self.playback_active:
+            self.playback_active = True
+            self.sim.process(self.playback())
+        if not self.playing:
+            self.playing = True
+            self.tick()
 
-    def a_star_search(self, start, goal):
-        """A* pathfinding algorithm"""
-        open_set = []
-        heapq.heappush(open_set, (0, start))
-        came_from = {}
-        g_score = defaultdict(lambda: float('inf'))
-        g_score[start] = 0
-        f_score = defaultdict(lambda: float('inf'))
-        f_score[start] = self.heuristic(start, goal)
-        
-        while open_set:
-            current_f, current = heapq.heappop(open_set)
-            
-            if current == goal:
-                path = []
-                while current in came_from:
-                    path.append(current)
-                    current = came_from[current]
-                path.append(start)
-                return (g_score[goal], path[::-1])
-            
-            for neighbor, cost in self.hospital[current].items():
-                tentative_g = g_score[current] + cost
-                if tentative_g < g_score[neighbor]:
-                    came_from[neighbor] = current
-                    g_score[neighbor] = tentative_g
-                    f_score[neighbor] = tentative_g + self.heuristic(neighbor, goal)
-                    heapq.heappush(open_set, (f_score[neighbor], neighbor))
-        
-        return (float('inf'), [])
+    async def playback(self):
+        # A paused playback keeps waiting in its corridor and resumes on the next route
+        await follow_route(self.sim, self.planner, self.playback_speed)
+        self.playback_active = False
+
+    def tick(self):
+        """Advance the simulation clock by one slice of real time"""
+        if not self.playing:
+            return
+        self.loop.run_until_complete(self.sim.run(until=self.sim.now + TICK_MS / 1000))
+        if self.playing:
+            self.root.after(TICK_MS, self.tick)
 
-    def heuristic(self, a, b):
-        """Euclidean distance heuristic"""
-        x1, y1 = self.room_positions[a]
-        x2, y2 = self.room_positions[b]
-        return math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
+    def refresh_telemetry(self):
+        """Show the current metrics in the dashboard panel and export them"""
+        telemetry = self.planner.telemetry
+        snapshot = telemetry.snapshot()
+        counters, gauges = snapshot["counters"], snapshot["gauges"]
+        lines = [
+            f"Queue: {gauges['queue_depth']} orders   Cart busy: {gauges['cart_utilization']:.0%}",
+            f"Orders +{counters.get('orders_added', 0)} -{counters.get('orders_removed', 0)}   "
+            f"Stock-outs: {counters.get('stock_depletions', 0)}   "
+            f"Emergencies: {counters.get('emergency_activations', 0)}",
+        ]
+        for name, label in (("a_star", "A* search"), ("plan", "Route plan"), ("render", "Render")):
+            h = snapshot["histograms"].get(name)
+            if h:
+                lines.append(f"{label:<11} p50 {h['p50'] * 1000:7.2f} ms  p95 {h['p95'] * 1000:7.2f} ms  "
+                             f"n={h['count']}")
+        self.telemetry_var.set("\n".join(lines))
+        if self.metrics_path:
+            telemetry.write_prometheus(self.metrics_path)
+        self.root.after(TELEMETRY_MS, self.refresh_telemetry)
 
-    def find_optimal_path(self, start, targets):
-        """Find optimal path using nearest neighbor approach"""
-        if not targets:
-            return [start]
-            
-        # Precompute all paths
-        all_nodes = [start] + targets
-        paths = {node: {} for node in all_nodes}
-        for node in all_nodes:
-            for other in all_nodes:
-                if node != other:
-                    paths[node][other] = self.a_star_search(node, other)[1]
-        
-        # Greedy algorithm
-        path = [start]
-        unvisited = set(targets)
-        current = start
-        
-        while unvisited:
-            nearest = min(unvisited, key=lambda x: len(paths[current][x]))
-            path += paths[current][nearest][1:]  # Skip current node
-            current = nearest
-            unvisited.remove(nearest)
-        
-        # Return to start
-        path += paths[current][start][1:]
-        return path
+    def on_sim_event(self, event, now, data):
+        """Redraw the view for simulation events"""
+        if event == "move":
+            self.draw_hospital_map()
+        elif event == "route_done":
+            self.playing = False
+            if data["emergency"]:
+                messagebox.showinfo("Emergency Exit Reached", f"Arrived at {data['room']}")
+            else:
+                messagebox.showinfo("Delivery Complete", "All deliveries finished!")
+            self.reset_delivery()
+        elif event == "blocked":
+            self.playing = False
+            messagebox.showerror("Error", f"Corridor from {data['room']} to {data['next_room']} is closed")
 
 if __name__ == "__main__":
     root = tk.Tk()
-    app = HospitalDeliveryApp(root)
+    layout = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_LAYOUT
+    planner = HospitalPlanner.from_layout(layout, data_dir=STATE_DIR)
+    app = HospitalDeliveryApp(root, planner, metrics_path=os.path.join(STATE_DIR, "metrics.prom"))
     root.mainloop()
@@ -0,0 +1,96 @@
+import time
+
+from fleet import FleetDispatcher
+from scheduling import PRIORITIES
+
+
+class OrderBatcher:
+    """Hold incoming orders in a window and release them as trips grouped by distance savings"""
+
+    def __init__(self, planner, window_time=300, window_size=50, capacity=20, start="Pharmacy", restarts=4):
+        if window_size < 1 or capacity < 1:
+            raise ValueError("Window size and capacity must be at least 1")
+        self.planner = planner
+        self.window_time = window_time
+        self.window_size = window_size
+        self.dispatcher = FleetDispatcher(planner, [capacity], objective="distance", restarts=restarts,
+                                          workers=1, start=start)
+        self.window = {}  # (room, med) -> (arrival of the oldest order, deadline)
+        self.window_opened = None
+        self.window_id = 0
+        self.metrics = {"windows": 0, "orders": 0, "units": 0, "released": 0, "trips": 0, "distance": 0,
+                        "total_delay": 0, "max_delay": 0}
+
+    def __len__(self):
+        return len(self.window)
+
+    def add(self, room, med, qty, priority=None, deadline=None, now=None):
+        """Reserve stock for an order and queue it; returns any trips released by it"""
+        now = time.monotonic() if now is None else now
+        self.planner.inventory.submit(room, med, qty, priority, deadline)
+        if not self.window:
+            self.window_opened = now
+        arrival, _ = self.window.get((room, med), (now, None))
+        self.window[(room, med)] = (arrival, self.planner.delivery_queue.get(room, med)[4])
+        self.metrics["orders"] += 1
+        self.metrics["units"] += qty
+
+        if len(self.window) >= self.window_size or priority == PRIORITIES["Emergency"]:
+            return self.release(now)
+        return []
+
+    def due(self, now=None):
+        now = time.monotonic() if now is None else now
+        return bool(self.window) and now - self.window_opened >= self.window_time
+
+    def poll(self, now=None):
+        """Release the window if its time is up; returns the trips released"""
+        now = time.monotonic() if now is None else now
+        return self.release(now) if self.due(now) else []
+
+    def release(self, now=None):
+        """Close the window and plan its orders as trips
+
+        Each trip has its visiting order ("rooms"), its orders as (room, med,
+        qty, deadline, arrival), its load, its room-by-room route and cost.
+        """
+        now = time.monotonic() if now is None else now
+        if not self.window:
+            return []
+        window, self.window = self.window, {}
+        self.window_opened = None
+        self.window_id += 1
+
+        deliveries = []
+        for room, med in window:
+            deliveries.append(self.planner.complete_delivery(room, med)[:3])
+        robots, _ = self.dispatcher.dispatch(deliveries)
+
+        trips = []
+        for trip in robots[0]["trips"]:
+            orders = []
+            for room, med, qty in trip["orders"]:
+                arrival, deadline = window[(room, med)]
+                orders.append((room, med, qty, deadline, arrival))
+            trips.append(dict(trip, orders=orders))
+            self.metrics["trips"] += 1
+            self.metrics["distance"] += trip["cost"]
+
+        for arrival, _ in window.values():
+            delay = now - arrival
+            self.metrics["total_delay"] += delay
+            self.metrics["max_delay"] = max(self.metrics["max_delay"], delay)
+        self.metrics["windows"] += 1
+        self.metrics["released"] += len(window)
+        return trips
+
+    def summary(self):
+        """Metrics plus orders per trip, distance per order and mean queueing delay
+
+        Orders for the same room and medicine within a window count once here.
+        """
+        m = dict(self.metrics)
+        m["orders_per_trip"] = m["released"] / m["trips"] if m["trips"] else 0
+        m["distance_per_order"] = m["distance"] / m["released"] if m["released"] else 0
+        m["mean_delay"] = m["total_delay"] / m["released"] if m["released"] else 0
+        return m
@@ -0,0 +1,1018 @@
+import argparse
+import cProfile
+import json
+import math
+import platform
+import pstats
+import random
+import sys
+import time
+import tracemalloc
+
+from heuristics import LandmarkHeuristic, ScaledEuclideanHeuristic
+from planner import HospitalPlanner
+from route_solver import HeldKarpSolver, LocalSearchSolver, NearestNeighbourSolver
+
+
+def generate_hospital(num_rooms, rooms_per_ward=10, wards_per_floor=10, floors=None, elevator_banks=2, seed=0):
+    """Generate a synthetic multi-floor hospital with roughly num_rooms nodes
+
+    With floors given, wards_per_floor is chosen to spread the rooms over that
+    many floors. Elevator bank 0 is the main elevator at the start of each
+    floor's hallway, the last bank a service elevator at its far end, and any
+    others are spaced along the hallway; each bank links to the same bank on
+    the floor below.
+    """
+    rng = random.Random(seed)
+    positions = {}
+    graph = {}
+    if floors:
+        wards_per_floor = max(1, math.ceil(num_rooms / floors / (rooms_per_ward + 2)))
+    middle_banks = {}
+    for k in range(1, elevator_banks - 1):
+        middle_banks.setdefault(min(wards_per_floor - 1, k * wards_per_floor // (elevator_banks - 1)), k)
+
+    def connect(a, b, cost):
+        graph.setdefault(a, {})[b] = cost
+        graph.setdefault(b, {})[a] = cost
+
+    def add_bank(name, k, position, hall):
+        positions[name] = position
+        if hall is not None:
+            connect(hall, name, 1)
+        if k in previous_bank:
+            connect(previous_bank[k], name, 2)
+        previous_bank[k] = name
+
+    positions["Pharmacy"] = (0, 0)
+    graph["Pharmacy"] = {}
+    previous_bank = {0: "Pharmacy"}
+    floor = 0
+    while len(positions) < num_rooms:
+        elevator = f"Floor {floor} Elevator"
+        add_bank(elevator, 0, (0, 100 + floor * 400), None)
+
+        previous_hall = elevator
+        for w in range(wards_per_floor):
+            if len(positions) >= num_rooms:
+                break
+            hall = f"Floor {floor} Hallway {w}"
+            ward = f"Floor {floor} Ward {w}"
+            positions[hall] = (100 + w * 150, 100 + floor * 400)
+            positions[ward] = (100 + w * 150, 150 + floor * 400)
+            connect(previous_hall, hall, rng.randint(1, 4))
+            connect(hall, ward, rng.randint(1, 2))
+            previous_hall = hall
+            if w in middle_banks:
+                k = middle_banks[w]
+                add_bank(f"Floor {floor} Elevator {k}", k, (100 + w * 150, 50 + floor * 400), hall)
+
+            for r in range(rooms_per_ward):
+                if len(positions) >= num_rooms:
+                    break
+                room = f"Floor {floor} Room {w}{r:02d}"
+                positions[room] = (100 + w * 150 + (r % 5) * 25, 200 + floor * 400 + (r // 5) * 25)
+                connect(ward, room, 1)
+
+        # A service elevator at the far end of each floor gives corridors a second route
+        if elevator_banks > 1:
+            service = f"Floor {floor} Service Elevator"
+            positions[service] = (100 + wards_per_floor * 150, 100 + floor * 400)
+            connect(previous_hall, service, rng.randint(1, 4))
+            if elevator_banks - 1 in previous_bank:
+                connect(previous_bank[elevator_banks - 1], service, 2)
+            previous_bank[elevator_banks - 1] = service
+        floor += 1
+
+    return positions, graph
+
+
+def floor_map(graph):
+    """Floor of every generated room, from its "Floor N" name prefix (the pharmacy is on 0)"""
+    return {room: int(room.split()[1]) if room.startswith("Floor ") else 0 for room in graph}
+
+
+def delivery_batch(graph, stops, rng):
+    """Random patient rooms for one delivery round"""
+    rooms = [r for r in graph if "Room" in r]
+    return rng.sample(rooms, min(stops, len(rooms)))
+
+
+def make_planner(positions, graph):
+    """Build a headless planner with lazily computed shortest-path rows"""
+    return HospitalPlanner(positions, graph, precompute_paths=False)
+
+
+def per_pair_astar_route(app, start, targets):
+    """Previous route planner: A* for every ordered pair, then the greedy tour"""
+    all_nodes = [start] + targets
+    paths = {node: {} for node in all_nodes}
+    for node in all_nodes:
+        for other in all_nodes:
+            if node != other:
+                paths[node][other] = app.a_star_search(node, other)[1]
+
+    path = [start]
+    unvisited = set(targets)
+    current = start
+    while unvisited:
+        nearest = min(unvisited, key=lambda x: len(paths[current][x]))
+        path += paths[current][nearest][1:]
+        current = nearest
+        unvisited.remove(nearest)
+    path += paths[current][start][1:]
+    return path
+
+
+def bench_route_planning(sizes=(100, 1000, 10000), stops=30, seed=0):
+    """Compare per-pair A* route planning with the shortest-path index"""
+    print(f"{'rooms':>8} {'per-pair A* (s)':>16} {'index (s)':>10} {'speedup':>8}")
+    for size in sizes:
+        positions, graph = generate_hospital(size, seed=seed)
+        rooms = [r for r in graph if "Room" in r]
+        targets = random.Random(seed).sample(rooms, min(stops, len(rooms)))
+
+        app = make_planner(positions, graph)
+        t0 = time.perf_counter()
+        per_pair_astar_route(app, "Pharmacy", targets)
+        astar_time = time.perf_counter() - t0
+
+        app = make_planner(positions, graph)
+        t0 = time.perf_counter()
+        app.find_optimal_path("Pharmacy", targets, solver=NearestNeighbourSolver())
+        index_time = time.perf_counter() - t0
+
+        print(f"{size:>8} {astar_time:>16.4f} {index_time:>10.4f} {astar_time / index_time:>7.1f}x")
+
+
+def path_cost(graph, path):
+    """Sum of edge weights along a room-by-room path"""
+    return sum(graph[a][b] for a, b in zip(path, path[1:]))
+
+
+def bench_route_solvers(size=1000, stop_counts=(5, 10, 12, 30, 80), trials=5, seed=0):
+    """Compare tour cost and planning time of the route engines with the old hop-count greedy"""
+    positions, graph = generate_hospital(size, seed=seed)
+    rooms = [r for r in graph if r != "Pharmacy"]
+    rng = random.Random(seed)
+    engines = [NearestNeighbourSolver(), HeldKarpSolver(), LocalSearchSolver(time_budget=0.5)]
+
+    print(f"{'stops':>6} {'engine':>14} {'avg cost':>10} {'vs greedy':>10} {'avg time (s)':>13}")
+    for stops in stop_counts:
+        batches = [rng.sample(rooms, stops) for _ in range(trials)]
+        app = make_planner(positions, graph)
+
+        results = {"hop greedy": [0, 0]}
+        for targets in batches:
+            t0 = time.perf_counter()
+            path = per_pair_astar_route(app, "Pharmacy", targets)
+            results["hop greedy"][1] += time.perf_counter() - t0
+            results["hop greedy"][0] += path_cost(graph, path)
+
+        for engine in engines:
+            if isinstance(engine, HeldKarpSolver) and stops > 12:
+                continue
+            results[engine.name] = [0, 0]
+            for targets in batches:
+                t0 = time.perf_counter()
+                path = app.find_optimal_path("Pharmacy", targets, solver=engine)
+                results[engine.name][1] += time.perf_counter() - t0
+                results[engine.name][0] += app.route_cost
+
+        baseline = results["hop greedy"][0]
+        for name, (cost, elapsed) in results.items():
+            print(f"{stops:>6} {name:>14} {cost / trials:>10.1f} {cost / baseline:>9.1%} {elapsed / trials:>13.4f}")
+
+
+def bench_heuristics(sizes=(1000, 10000), queries=200, seed=0):
+    """Check A* optimality against Dijkstra and count expanded nodes per heuristic"""
+    print(f"{'rooms':>8} {'heuristic':>12} {'expanded/query':>15} {'time (ms)':>10} {'suboptimal':>11}")
+    for size in sizes:
+        positions, graph = generate_hospital(size, seed=seed)
+        rng = random.Random(seed)
+        nodes = list(graph)
+        pairs = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(queries)]
+        app = make_planner(positions, graph)
+        exact = {pair: app.path_index.distance(*pair) for pair in pairs}
+
+        raw = ScaledEuclideanHeuristic(graph, positions)
+        raw.scale = 1  # The old pixel-unit heuristic
+        zero = ScaledEuclideanHeuristic(graph, positions)
+        zero.scale = 0  # A* without a heuristic is Dijkstra
+        models = {
+            "dijkstra": zero,
+            "raw pixels": raw,
+            "scaled": ScaledEuclideanHeuristic(graph, positions),
+            "alt": LandmarkHeuristic(graph, positions, num_landmarks=8),
+        }
+
+        for name, model in models.items():
+            app.heuristic_model = model
+            app.nodes_expanded = 0
+            suboptimal = 0
+            t0 = time.perf_counter()
+            for start, goal in pairs:
+                if app.a_star_search(start, goal)[0] != exact[(start, goal)]:
+                    suboptimal += 1
+            elapsed = time.perf_counter() - t0
+            if name != "raw pixels":
+                assert suboptimal == 0, f"{name} heuristic returned a non-shortest path"
+            print(f"{size:>8} {name:>12} {app.nodes_expanded / queries:>15.1f} "
+                  f"{elapsed / queries * 1000:>10.3f} {suboptimal:>11}")
+
+
+def bench_rendering(sizes=(100, 1000, 5000), steps=50, seed=0):
+    """Compare a full map redraw with incremental per-step frames (needs a display)"""
+    import tkinter as tk
+    from app import HospitalDeliveryApp
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"Skipping rendering benchmark: {e}")
+        return
+    root.withdraw()
+
+    print(f"{'rooms':>8} {'full redraw (ms)':>17} {'step frame (ms)':>16}")
+    for size in sizes:
+        positions, graph = generate_hospital(size, seed=seed)
+        planner = make_planner(positions, graph)
+        rooms = [r for r in graph if "Room" in r]
+        for room in random.Random(seed).sample(rooms, min(10, len(rooms))):
+            planner.add_delivery(room, "Paracetamol", 1)
+
+        app = HospitalDeliveryApp(root, planner)
+        frames = []
+        app.frame_hooks.append(frames.append)
+        planner.start_delivery()
+
+        app.rebuild_map()
+        full = frames[-1]
+        frames.clear()
+        for _ in range(steps):
+            planner.next_step()
+            app.draw_hospital_map()
+            root.update_idletasks()
+
+        print(f"{size:>8} {full * 1000:>17.2f} {sum(frames) / len(frames) * 1000:>16.3f}")
+        for child in root.winfo_children():
+            child.destroy()
+    root.destroy()
+
+
+def bench_layout_loading(sizes=(1000, 10000, 50000), seed=0):
+    """Compare startup time and memory of parsing the layout source with the mmap cache"""
+    import os
+    import tempfile
+    from layout import CompiledLayout, cache_path, load_layout, read_layout_source
+
+    def measure(load):
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        result = load()
+        elapsed = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return result, elapsed, peak
+
+    print(f"{'rooms':>8} {'mode':>16} {'time (ms)':>10} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            positions, graph = generate_hospital(size, seed=seed)
+            source = os.path.join(tmp, f"hospital_{size}.json")
+            with open(source, "w") as f:
+                json.dump({"rooms": positions, "connections": graph}, f)
+            load_layout(source)  # Compile the cache once
+
+            modes = {
+                "parse source": lambda: read_layout_source(source),
+                "cache -> dicts": lambda: (lambda l: (l.room_positions(), l.connections()))(load_layout(source)),
+                "cache (mmap)": lambda: CompiledLayout.open(cache_path(source), os.stat(source)),
+            }
+            for mode, load in modes.items():
+                _, elapsed, peak = measure(load)
+                print(f"{size:>8} {mode:>16} {elapsed * 1000:>10.2f} {peak / 2**20:>8.2f}")
+
+
+def bench_replanning(sizes=(1000, 10000), events=50, lookahead=8, seed=0):
+    """Replan latency after congestion and closures just ahead of the cart vs. a fresh A*"""
+    print(f"{'rooms':>8} {'replan p50 (ms)':>16} {'replan p90 (ms)':>16} {'fresh A* p50 (ms)':>18}")
+    for size in sizes:
+        positions, graph = generate_hospital(size, seed=seed)
+        planner = make_planner(positions, graph)
+        rng = random.Random(seed)
+        rooms = [r for r in graph if "Room" in r]
+        for room in rng.sample(rooms, 5):
+            planner.add_delivery(room, "Paracetamol", 1)
+        planner.start_delivery()
+        planner.replan()  # Build the landmark tables and the first leg search outside the timings
+        planner.replan_times.clear()
+
+        fresh = []
+        for _ in range(events):
+            if planner.next_step() is None:
+                break
+            ahead = planner.current_path[planner.current_delivery_index:][:lookahead + 1]
+            if len(ahead) < 2:
+                continue
+            i = rng.randrange(len(ahead) - 1)
+            a, b = ahead[i], ahead[i + 1]
+            try:
+                if rng.random() < 0.5:
+                    planner.close_corridor(a, b)
+                else:
+                    planner.set_corridor_weight(a, b, graph[a][b] + rng.randint(1, 5))
+            except ValueError:
+                pass  # The corridor was a bridge; closing it was rolled back
+
+            goal = planner.route_stops[planner.next_stop_index]
+            t0 = time.perf_counter()
+            planner.a_star_search(planner.current_room, goal)
+            fresh.append(time.perf_counter() - t0)
+
+        times = sorted(planner.replan_times)
+        fresh.sort()
+        print(f"{size:>8} {times[len(times) // 2] * 1000:>16.3f} {times[int(len(times) * 0.9)] * 1000:>16.3f} "
+              f"{fresh[len(fresh) // 2] * 1000:>18.3f}")
+
+
+def bench_inventory(orders=50000, threads=(1, 4, 8), seed=0):
+    """Order intake throughput with concurrent producers, and crash recovery time"""
+    import os
+    import tempfile
+    import threading
+    from inventory import InventoryStore
+
+    rng = random.Random(seed)
+    rooms = [f"Ward {w} Room {r}" for w in range(50) for r in range(20)]
+    meds = [f"Medicine {m}" for m in range(40)]
+    batch = [(rng.choice(rooms), rng.choice(meds), rng.randint(1, 3)) for _ in range(orders)]
+
+    print(f"{'producers':>10} {'log':>6} {'orders/s':>10} {'recovery (ms)':>14}")
+    for count in threads:
+        for durable in (False, True):
+            with tempfile.TemporaryDirectory() as tmp:
+                data_dir = os.path.join(tmp, "state") if durable else None
+                store = InventoryStore({med: orders * 3 for med in meds}, data_dir=data_dir)
+                chunks = [batch[i::count] for i in range(count)]
+
+                def produce(chunk):
+                    for room, med, qty in chunk:
+                        store.submit(room, med, qty)
+
+                workers = [threading.Thread(target=produce, args=(chunk,)) for chunk in chunks]
+                t0 = time.perf_counter()
+                for w in workers:
+                    w.start()
+                for w in workers:
+                    w.join()
+                elapsed = time.perf_counter() - t0
+                store.close()
+
+                recovery = ""
+                if durable:
+                    t0 = time.perf_counter()
+                    recovered = InventoryStore(data_dir=data_dir)
+                    recovery = f"{(time.perf_counter() - t0) * 1000:.1f}"
+                    assert recovered.stock == store.stock and recovered.orders.items() == store.orders.items()
+                    recovered.close()
+                print(f"{count:>10} {'wal' if durable else 'none':>6} {orders / elapsed:>10.0f} {recovery:>14}")
+
+
+def bench_simulation(sizes=(1000, 5000), orders=5000, carts=6, seed=0):
+    """Simulate a day of order traffic with several carts and report the wall-clock speed-up"""
+    import asyncio
+    from simulation import DeliverySimulation
+
+    day = 24 * 3600
+    print(f"{'rooms':>8} {'orders':>7} {'carts':>6} {'wall (s)':>9} {'speed-up':>9} {'events':>8} "
+          f"{'mean wait':>10} {'late':>5}")
+    for size in sizes:
+        positions, graph = generate_hospital(size, seed=seed)
+        planner = make_planner(positions, graph)
+        for med in planner.medicines:
+            planner.inventory.release(med, orders * 3)
+        rng = random.Random(seed)
+        rooms = [r for r in graph if "Room" in r]
+        meds = list(planner.medicines)
+        simulation = DeliverySimulation(planner, carts=carts, capacity=10, service_time=30)
+        for _ in range(orders):
+            simulation.submit(rng.choice(rooms), rng.choice(meds), rng.randint(1, 3),
+                              deadline=rng.choice([None, None, 3600]), at=rng.uniform(0, day))
+        events = []
+        simulation.sim.subscribe(lambda event, t, data: events.append(event))
+
+        t0 = time.perf_counter()
+        stats = asyncio.run(simulation.run())
+        elapsed = time.perf_counter() - t0
+        assert stats["units_delivered"] == stats["units"]
+        print(f"{size:>8} {orders:>7} {carts:>6} {elapsed:>9.2f} {stats['time'] / elapsed:>9.0f} "
+              f"{len(events):>8} {stats['mean_wait']:>10.1f} {stats['late']:>5}")
+
+
+def bench_floor_routing(sizes=(1000, 10000, 100000), floors=20, queries=20, seed=0):
+    """Cross-floor queries on the per-floor/portal index vs. flat Dijkstra rows"""
+    from floors import HierarchicalRouter
+    from pathindex import ShortestPathIndex
+
+    print(f"{'rooms':>8} {'portals':>8} {'build (ms)':>11} {'flat query (ms)':>16} {'floors query (ms)':>18}")
+    for size in sizes:
+        _, graph = generate_hospital(size, floors=floors, elevator_banks=3, seed=seed)
+        floor_of = floor_map(graph)
+        rng = random.Random(seed)
+        nodes = list(graph)
+        pairs = []
+        while len(pairs) < queries:
+            a, b = rng.sample(nodes, 2)
+            if floor_of[a] != floor_of[b]:
+                pairs.append((a, b))
+
+        t0 = time.perf_counter()
+        router = HierarchicalRouter(graph, floor_of)
+        build = time.perf_counter() - t0
+
+        flat = ShortestPathIndex(graph, precompute=False)
+        t0 = time.perf_counter()
+        expected = [flat.distance(a, b) for a, b in pairs]
+        flat_time = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        found = [router.distance(a, b) for a, b in pairs]
+        router_time = time.perf_counter() - t0
+        assert found == expected
+
+        portals = sum(len(p) for p in router.portals_on.values())
+        print(f"{size:>8} {portals:>8} {build * 1000:>11.1f} {flat_time / queries * 1000:>16.3f} "
+              f"{router_time / queries * 1000:>18.3f}")
+
+
+def bench_contraction(sizes=(1000, 10000, 50000), queries=200, stops=30, seed=0):
+    """Contraction hierarchy preprocessing, query latency and memory vs. plain A*"""
+    from contraction import ContractionHierarchy
+    from pathindex import ShortestPathIndex
+
+    print(f"{'rooms':>8} {'build (s)':>10} {'shortcuts':>10} {'+RSS MB':>8} {'A* (ms)':>8} {'A* expanded':>12} "
+          f"{'CH (ms)':>8} {'CH path (ms)':>13} {f'{stops}x{stops} rows (s)':>17} {'CH table (s)':>13}")
+    for size in sizes:
+        positions, graph = generate_hospital(size, seed=seed)
+        planner = make_planner(positions, graph)
+        rng = random.Random(seed)
+        nodes = list(graph)
+        pairs = [rng.sample(nodes, 2) for _ in range(queries)]
+
+        # Growth of the process's peak memory; tracing allocations would triple the build time
+        rss = max_rss_mb()
+        t0 = time.perf_counter()
+        hierarchy = ContractionHierarchy(graph)
+        build = time.perf_counter() - t0
+        memory = max_rss_mb() - rss if rss is not None else float('nan')
+
+        before = planner.nodes_expanded
+        t0 = time.perf_counter()
+        expected = [planner.a_star_search(a, b)[0] for a, b in pairs]
+        astar = (time.perf_counter() - t0) / queries
+        expanded = (planner.nodes_expanded - before) / queries
+
+        t0 = time.perf_counter()
+        found = [hierarchy.distance(a, b) for a, b in pairs]
+        ch_time = (time.perf_counter() - t0) / queries
+        assert found == expected
+
+        t0 = time.perf_counter()
+        for a, b in pairs:
+            hierarchy.path(a, b)
+        ch_path = (time.perf_counter() - t0) / queries
+
+        batch = delivery_batch(graph, stops, rng)
+        flat = ShortestPathIndex(graph, precompute=False)
+        t0 = time.perf_counter()
+        rows = flat.table(batch, batch)
+        rows_time = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        table = hierarchy.table(batch, batch)
+        table_time = time.perf_counter() - t0
+        assert table == rows
+
+        print(f"{size:>8} {build:>10.2f} {hierarchy.shortcuts:>10} {memory:>8.1f} {astar * 1000:>8.3f} "
+              f"{expanded:>12.0f} {ch_time * 1000:>8.3f} {ch_path * 1000:>13.3f} {rows_time:>17.3f} "
+              f"{table_time:>13.3f}")
+
+
+def bench_batching(size=1000, orders=2000, carts=4, windows=((1, 0), (10, 300), (25, 600), (50, 900)), seed=0):
+    """Simulated day with orders dispatched one cart-load at a time vs. through batching windows"""
+    import asyncio
+    from batching import OrderBatcher
+    from simulation import DeliverySimulation
+
+    positions, graph = generate_hospital(size, seed=seed)
+    day = 24 * 3600
+    rng = random.Random(seed)
+    rooms = [r for r in graph if "Room" in r]
+    traffic = [(rng.choice(rooms), rng.randint(1, 3), rng.choice([None, None, 3600]), rng.uniform(0, day))
+               for _ in range(orders)]
+
+    print(f"{'window':>12} {'trips':>6} {'orders/trip':>12} {'dist/order':>11} {'mean delay':>11} "
+          f"{'max delay':>10} {'mean wait':>10} {'late':>5} {'wall (s)':>9}")
+    for window in (None,) + tuple(windows):
+        planner = make_planner(positions, graph)
+        med = next(iter(planner.medicines))
+        planner.inventory.release(med, orders * 3)
+        batcher = None
+        if window is not None:
+            batcher = OrderBatcher(planner, window_time=window[1], window_size=window[0], capacity=10,
+                                   restarts=2)
+        simulation = DeliverySimulation(planner, carts=carts, capacity=10, service_time=30, batcher=batcher)
+        for room, qty, deadline, at in traffic:
+            simulation.submit(room, med, qty, deadline=deadline, at=at)
+
+        t0 = time.perf_counter()
+        stats = asyncio.run(simulation.run())
+        elapsed = time.perf_counter() - t0
+        assert stats["units_delivered"] == stats["units"]
+        delay = batcher.summary() if batcher is not None else {"mean_delay": 0, "max_delay": 0}
+        label = "none" if window is None else f"{window[0]}/{window[1]}s"
+        print(f"{label:>12} {stats['trips']:>6} {stats['delivered'] / stats['trips']:>12.2f} "
+              f"{stats['distance'] / stats['delivered']:>11.1f} {delay['mean_delay']:>11.1f} "
+              f"{delay['max_delay']:>10.1f} {stats['mean_wait']:>10.1f} {stats['late']:>5} {elapsed:>9.2f}")
+
+
+def bench_route_cache(size=1000, rounds=20, requests=500, stops=10, seed=0):
+    """Repeated ward rounds (some with a room or two added or dropped) with and without the route cache"""
+    positions, graph = generate_hospital(size, seed=seed)
+    rng = random.Random(seed)
+    wards = [delivery_batch(graph, stops, rng) for _ in range(rounds)]
+    rooms = [r for r in graph if "Room" in r]
+    daily = []
+    for _ in range(requests):
+        targets = list(rng.choice(wards))
+        change = rng.random()
+        if change < 0.2:
+            targets.pop(rng.randrange(len(targets)))
+        elif change < 0.4:
+            targets.append(rng.choice(rooms))
+        daily.append(targets)
+
+    planner = make_planner(positions, graph)
+
+    def plan(solver=None):
+        costs = []
+        for targets in daily:
+            planner.find_optimal_path("Pharmacy", targets, solver=solver)
+            costs.append(planner.route_cost)
+        return costs
+
+    t0 = time.perf_counter()
+    fresh = plan(planner.route_solver)
+    uncached = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    cached = plan()
+    elapsed = time.perf_counter() - t0
+    stats = planner.route_cache.stats()
+    extra = sum(cached) / sum(fresh) - 1
+
+    a = next(iter(graph["Pharmacy"]))
+    planner.set_edge_weight("Pharmacy", a, graph["Pharmacy"][a] + 1)
+    assert not planner.route_cache
+
+    print(f"{'requests':>9} {'uncached (s)':>13} {'cached (s)':>11} {'speed-up':>9} {'hits':>5} {'reused':>7} "
+          f"{'misses':>7} {'hit rate':>9} {'extra cost':>11}")
+    print(f"{requests:>9} {uncached:>13.3f} {elapsed:>11.3f} {uncached / elapsed:>8.1f}x {stats['hits']:>5} "
+          f"{stats['reused']:>7} {stats['misses']:>7} {stats['hit_rate']:>9.1%} {extra:>11.2%}")
+
+
+def bench_geometry(sizes=(1000, 10000), goals=50, clicks=200, seed=0):
+    """Batch geometry kernels (heuristic vectors, weight labels, hit-testing) vs. per-item Python loops"""
+    import geometry
+    from geometry import RoomGeometry
+
+    def timed(fn, repeat):
+        t0 = time.perf_counter()
+        for i in range(repeat):
+            result = fn(i)
+        return (time.perf_counter() - t0) / repeat * 1000, result
+
+    engines = [("loops", False)] + ([("numpy", True)] if geometry.np is not None else [])
+    if geometry.np is None:
+        print("NumPy is not installed; timing the pure-Python fallback only")
+    print(f"{'rooms':>8} {'kernel':>11} {'scalar (ms)':>12} "
+          + " ".join(f"{name + ' (ms)':>11} {'speed-up':>9}" for name, _ in engines))
+    for size in sizes:
+        positions, graph = generate_hospital(size, seed=seed)
+        heuristic = ScaledEuclideanHeuristic(graph, positions)
+        nodes = list(positions)
+        edges = [(room, neighbor) for room, connections in graph.items() for neighbor in connections]
+        rng = random.Random(seed)
+        targets = rng.sample(nodes, goals)
+        points = [(x + rng.uniform(-20, 20), y + rng.uniform(-20, 20))
+                  for x, y in (positions[room] for room in rng.sample(nodes, clicks))]
+
+        def scalar_labels(_):
+            labels = []
+            for a, b in edges:
+                (x1, y1), (x2, y2) = positions[a], positions[b]
+                dx, dy = x2 - x1, y2 - y1
+                angle = math.atan2(dy, dx)
+                labels.append((x1 + dx / 2 + 10 * math.sin(angle), y1 + dy / 2 - 10 * math.cos(angle)))
+            return labels
+
+        def scalar_nearest(i):
+            x, y = points[i]
+            best = min(nodes, key=lambda room: (positions[room][0] - x) ** 2 + (positions[room][1] - y) ** 2)
+            return best if math.dist(positions[best], (x, y)) <= 25 else None
+
+        kernels = [
+            ("heuristic", lambda i: [heuristic(room, targets[i]) for room in nodes],
+             lambda geo: lambda i: geo.distances_to(targets[i], heuristic.scale), goals),
+            ("labels", scalar_labels, lambda geo: lambda i: geo.label_positions(edges), 3),
+            ("hit-test", scalar_nearest, lambda geo: lambda i: geo.nearest(*points[i], radius=25), clicks),
+        ]
+        for name, scalar, batch, repeat in kernels:
+            base, expected = timed(scalar, repeat)
+            cells = []
+            for _, vectorized in engines:
+                elapsed, result = timed(batch(RoomGeometry(positions, vectorized)), repeat)
+                if isinstance(result, list):
+                    flat = [v for item in result for v in (item if isinstance(item, tuple) else (item,))]
+                    reference = [v for item in expected for v in (item if isinstance(item, tuple) else (item,))]
+                    assert all(math.isclose(u, v, abs_tol=1e-9) for u, v in zip(flat, reference))
+                else:
+                    assert result == expected
+                cells.append(f"{elapsed:>11.3f} {base / elapsed:>8.1f}x")
+            print(f"{size:>8} {name:>11} {base:>12.3f} " + " ".join(cells))
+
+
+def bench_depots(size=1000, order_counts=(100, 300, 1000), cabinets=4, capacity=20, seed=0):
+    """Single-pharmacy vs. pharmacy-plus-cabinets routes with restock stops for batches of orders"""
+    from depots import DepotPlanner
+
+    positions, graph = generate_hospital(size, seed=seed)
+    rng = random.Random(seed)
+    rooms = [r for r in graph if "Room" in r]
+    planner = make_planner(positions, graph)
+    meds = list(planner.medicines)
+    for med in meds:
+        planner.inventory.release(med, 10000)
+    stocked = {room: {med: 40 for med in rng.sample(meds, 5)} for room in rng.sample(rooms, cabinets)}
+
+    print(f"{'orders':>7} {'depots':>7} {'plan (s)':>9} {'cost':>9} {'restocks':>9} {'unserved':>9}")
+    for count in order_counts:
+        orders = [(rng.choice(rooms), rng.choice(meds), rng.randint(1, 3)) for _ in range(count)]
+        for name, depots in (("1", DepotPlanner(planner, {}, capacity)),
+                             (str(cabinets + 1), DepotPlanner(planner, stocked, capacity))):
+            t0 = time.perf_counter()
+            plan = depots.plan(orders)
+            elapsed = time.perf_counter() - t0
+
+            served = {}
+            for _, action, items in plan["stops"]:
+                if action == "pickup":
+                    assert sum(qty for _, _, qty in items) <= capacity
+                    for room, med, qty in items:
+                        served[(room, med)] = served.get((room, med), 0) + qty
+            for room, med, qty in plan["unserved"]:
+                served[(room, med)] = served.get((room, med), 0) + qty
+            wanted = {}
+            for room, med, qty in orders:
+                wanted[(room, med)] = wanted.get((room, med), 0) + qty
+            assert served == wanted
+            print(f"{count:>7} {name:>7} {elapsed:>9.3f} {plan['cost']:>9.0f} {plan['restocks']:>9} "
+                  f"{len(plan['unserved']):>9}")
+
+
+# Benchmark suite: the planner's hot paths on parametric hospitals, written as
+# JSON lines so later runs can be compared against them
+
+def max_rss_mb():
+    """Peak resident memory of this process so far, or None where unavailable"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+def proc_status_mb(field):
+    """A memory field of /proc/self/status (e.g. VmRSS, VmHWM) in MB, or None off Linux"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 2**10
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss():
+    """Restart the kernel's resident memory high-water mark (VmHWM); returns whether it could"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+class PhaseProfiler:
+    """Run benchmark phases plainly, under cProfile, or under tracemalloc"""
+
+    def __init__(self, mode=None, top=15):
+        if mode not in (None, "cprofile", "tracemalloc"):
+            raise ValueError(f"Unknown profile mode {mode}")
+        self.mode = mode
+        self.top = top
+        self.reports = []
+
+    def run(self, label, fn):
+        """Call fn() and return (result, seconds, peak MB or None)
+
+        The peak is that of traced allocations under tracemalloc; otherwise it
+        is the resident memory high-water mark above the phase's starting
+        resident size, where the kernel lets it be reset (Linux).
+        """
+        if self.mode == "tracemalloc":
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - t0
+            peak = tracemalloc.get_traced_memory()[1]
+            self.reports.append((label, tracemalloc.take_snapshot()))
+            tracemalloc.stop()
+            return result, elapsed, peak / 2**20
+        start_rss = proc_status_mb("VmRSS") if reset_peak_rss() else None
+        t0 = time.perf_counter()
+        if self.mode == "cprofile":
+            profile = cProfile.Profile()
+            result = profile.runcall(fn)
+            self.reports.append((label, profile))
+        else:
+            result = fn()
+        elapsed = time.perf_counter() - t0
+        peak = None if start_rss is None else max(proc_status_mb("VmHWM") - start_rss, 0)
+        return result, elapsed, peak
+
+    def print_reports(self):
+        for label, report in self.reports:
+            print(f"\n== {label} ==")
+            if self.mode == "cprofile":
+                pstats.Stats(report).sort_stats("cumulative").print_stats(self.top)
+            else:
+                for stat in report.statistics("lineno")[:self.top]:
+                    print(stat)
+
+
+def run_suite(sizes=(100, 1000, 10000, 100000), rooms_per_ward=10, floors=None, elevator_banks=2,
+              queries=50, batches=3, stops=20, render=True, profile=None, seed=0):
+    """Time planner construction, A* search, tour construction and rendering per size
+
+    Returns one record per (size, phase) with the time in ms per operation,
+    nodes expanded per search, mean route cost and memory use.
+    """
+    profiler = PhaseProfiler(profile)
+    root = None
+    if render:
+        import tkinter as tk
+        try:
+            root = tk.Tk()
+            root.withdraw()
+        except tk.TclError as e:
+            print(f"Skipping rendering phases: {e}")
+
+    records = []
+    print(f"{'rooms':>8} {'phase':>12} {'time (ms)':>10} {'expanded':>9} {'cost':>8} {'peak MB':>8} {'rss MB':>8}")
+
+    def record(size, phase, seconds, peak, **extra):
+        entry = {"size": size, "phase": phase, "time_ms": seconds * 1000, **extra,
+                 "peak_mb": peak, "rss_mb": max_rss_mb()}
+        records.append(entry)
+        cells = [(extra.get("nodes_expanded"), ".0f", 9), (extra.get("route_cost"), ".1f", 8),
+                 (peak, ".1f", 8), (entry["rss_mb"], ".0f", 8)]
+        print(f"{size:>8} {phase:>12} {entry['time_ms']:>10.3f} "
+              + " ".join(("" if v is None else format(v, fmt)).rjust(width) for v, fmt, width in cells))
+
+    for size in sizes:
+        positions, graph = generate_hospital(size, rooms_per_ward, floors=floors, elevator_banks=elevator_banks,
+                                             seed=seed)
+        rng = random.Random(seed)
+        nodes = list(graph)
+        planner, elapsed, peak = profiler.run(f"build {size}", lambda: make_planner(positions, graph))
+        record(size, "build", elapsed, peak, nodes=len(graph))
+
+        pairs = [rng.sample(nodes, 2) for _ in range(queries)]
+
+        def search():
+            before = planner.nodes_expanded
+            for a, b in pairs:
+                planner.a_star_search(a, b)
+            return planner.nodes_expanded - before
+
+        expanded, elapsed, peak = profiler.run(f"path_search {size}", search)
+        record(size, "path_search", elapsed / queries, peak, nodes_expanded=expanded / queries)
+
+        rounds = [delivery_batch(graph, stops, rng) for _ in range(batches)]
+
+        def tours():
+            total = 0
+            for targets in rounds:
+                planner.find_optimal_path("Pharmacy", targets)
+                total += planner.route_cost
+            return total
+
+        total, elapsed, peak = profiler.run(f"tour {size}", tours)
+        record(size, "tour", elapsed / batches, peak, route_cost=total / batches)
+
+        if root is not None:
+            from app import HospitalDeliveryApp
+            for room in rounds[0]:
+                planner.add_delivery(room, "Paracetamol", 1)
+            app = HospitalDeliveryApp(root, planner)
+            frames = []
+            app.frame_hooks.append(frames.append)
+            planner.start_delivery()
+
+            _, elapsed, peak = profiler.run(f"render_full {size}", app.rebuild_map)
+            record(size, "render_full", elapsed, peak)
+
+            def steps():
+                for _ in range(queries):
+                    planner.next_step()
+                    app.draw_hospital_map()
+                    root.update_idletasks()
+
+            _, elapsed, peak = profiler.run(f"render_step {size}", steps)
+            record(size, "render_step", elapsed / queries, peak)
+            for child in root.winfo_children():
+                child.destroy()
+
+    if root is not None:
+        root.destroy()
+    profiler.print_reports()
+    return records
+
+
+def compare_runs(previous, current, threshold=1.25, min_ms=1.0, timings=True):
+    """Print current records against a previous run; returns the regressions found
+
+    A phase regresses when it is more than threshold times slower (and at least
+    min_ms slower), expands more nodes, or finds a costlier route. With
+    timings=False (e.g. runs under different profilers) only the latter count.
+    """
+    old = {(r["size"], r["phase"]): r for r in previous if "phase" in r}
+    regressions = []
+    print(f"{'rooms':>8} {'phase':>12} {'before (ms)':>12} {'after (ms)':>11} {'ratio':>7}")
+    for r in current:
+        before = old.get((r["size"], r["phase"]))
+        if before is None:
+            continue
+        ratio = r["time_ms"] / before["time_ms"] if before["time_ms"] else float('inf')
+        reasons = []
+        if timings and ratio > threshold and r["time_ms"] - before["time_ms"] >= min_ms:
+            reasons.append("slower")
+        for key in ("nodes_expanded", "route_cost"):
+            if key in r and key in before and r[key] > before[key] + 1e-9:
+                reasons.append(f"{key} {before[key]:g} -> {r[key]:g}")
+        print(f"{r['size']:>8} {r['phase']:>12} {before['time_ms']:>12.3f} {r['time_ms']:>11.3f} {ratio:>6.2f}x"
+              f"{'  REGRESSION: ' + ', '.join(reasons) if reasons else ''}")
+        if reasons:
+            regressions.append((r, reasons))
+    return regressions
+
+
+def bench_ui(order_counts=(1000, 10000), edits=50, meds=40, seed=0):
+    """Control panel update latency per order added or removed, diffed Treeviews vs. full rebuilds (needs a display)"""
+    import tkinter as tk
+    from tkinter import ttk
+    from app import HospitalDeliveryApp
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"Skipping control panel benchmark: {e}")
+        return
+    root.withdraw()
+
+    def rebuild_listbox(app, listbox):
+        """Previous order list: clear the Listbox and insert every order again"""
+        listbox.delete(0, tk.END)
+        for room, med, qty, _, _ in app.planner.delivery_queue.items():
+            listbox.insert(tk.END, f"{room}: {med} x{qty}")
+
+    def rebuild_stock(app, frame):
+        """Previous stock display: destroy and recreate a row of labels per medicine"""
+        for widget in frame.winfo_children():
+            widget.destroy()
+        for med, qty in app.planner.medicines.items():
+            row = ttk.Frame(frame)
+            row.pack(fill=tk.X, pady=2)
+            ttk.Label(row, text=f"{med}:", width=20).pack(side=tk.LEFT)
+            ttk.Label(row, text=str(qty), width=10).pack(side=tk.LEFT)
+
+    positions, graph = generate_hospital(max(order_counts) // meds * 2, seed=seed)
+    rooms = [r for r in graph if "Room" in r]
+    medicines = [f"Medicine {m}" for m in range(meds)]
+    print(f"{'orders':>8} {'rebuild (ms)':>13} {'diffed (ms)':>12} {'speedup':>8}")
+    for count in order_counts:
+        rng = random.Random(seed)
+        orders = rng.sample([(room, med) for room in rooms for med in medicines], count + edits)
+        planner = HospitalPlanner(positions, graph, medicines={med: 10 * count for med in medicines},
+                                  precompute_paths=False)
+        for room, med in orders[:count]:
+            planner.add_delivery(room, med, 1)
+        app = HospitalDeliveryApp(root, planner)
+        listbox = tk.Listbox(root)
+        stock_frame = ttk.Frame(root)
+
+        def diffed():
+            app.update_stock_display()
+            app.update_delivery_listbox()
+
+        def rebuilt():
+            rebuild_stock(app, stock_frame)
+            rebuild_listbox(app, listbox)
+
+        timings = {}
+        for name, update in (("rebuild", rebuilt), ("diffed", diffed)):
+            update()
+            elapsed = 0
+            for room, med in orders[count:]:
+                for change in (lambda: planner.add_delivery(room, med, 1), lambda: planner.remove_delivery(0)):
+                    change()
+                    t0 = time.perf_counter()
+                    update()
+                    root.update_idletasks()
+                    elapsed += time.perf_counter() - t0
+            timings[name] = elapsed / (2 * edits)
+        print(f"{count:>8} {timings['rebuild'] * 1000:>13.2f} {timings['diffed'] * 1000:>12.2f} "
+              f"{timings['rebuild'] / timings['diffed']:>7.1f}x")
+        for child in root.winfo_children():
+            child.destroy()
+    root.destroy()
+
+
+COMPARISONS = [bench_route_planning, bench_route_solvers, bench_heuristics, bench_rendering, bench_layout_loading,
+               bench_replanning, bench_inventory, bench_simulation, bench_floor_routing,
+               bench_contraction, bench_batching,
+               bench_route_cache, bench_geometry, bench_depots, bench_ui]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the delivery planner on synthetic hospitals; "
+                                                 "without a command, run every before/after comparison")
+    commands = parser.add_subparsers(dest="command")
+    suite = commands.add_parser("suite", help="measure the hot paths across hospital sizes")
+    suite.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000],
+                       help="approximate number of rooms per generated hospital")
+    suite.add_argument("--rooms-per-ward", type=int, default=10)
+    suite.add_argument("--floors", type=int, help="spread each hospital over this many floors")
+    suite.add_argument("--elevator-banks", type=int, default=2, help="elevators per floor")
+    suite.add_argument("--queries", type=int, default=50, help="A* searches and render steps per size")
+    suite.add_argument("--batches", type=int, default=3, help="delivery rounds to plan per size")
+    suite.add_argument("--stops", type=int, default=20, help="rooms per delivery round")
+    suite.add_argument("--no-render", action="store_true", help="skip the Tk rendering phases")
+    suite.add_argument("--profile", choices=("cprofile", "tracemalloc"),
+                       help="profile every phase and print the top functions or allocation sites")
+    suite.add_argument("--seed", type=int, default=0)
+    suite.add_argument("-o", "--output", help="write the results here as JSON lines")
+    suite.add_argument("--compare", help="results of an earlier run to check for regressions")
+    suite.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio that counts as a regression")
+    args = parser.parse_args(argv)
+
+    if args.command is None:
+        for i, bench in enumerate(COMPARISONS):
+            if i:
+                print()
+            bench()
+        return 0
+
+    records = run_suite(args.sizes, args.rooms_per_ward, args.floors, args.elevator_banks, args.queries,
+                        args.batches, args.stops, not args.no_render, args.profile, args.seed)
+    params = {key: getattr(args, key) for key in ("rooms_per_ward", "floors", "elevator_banks", "queries",
+                                                   "batches", "stops", "seed")}
+    if args.output:
+        meta = {"meta": {"params": params, "python": platform.python_version(), "platform": platform.platform(),
+                         "profile": args.profile, "date": time.time()}}
+        with open(args.output, "w") as f:
+            for entry in [meta] + records:
+                f.write(json.dumps(entry) + "\n")
+    if args.compare:
+        with open(args.compare) as f:
+            previous = [json.loads(line) for line in f if line.strip()]
+        print()
+        meta = next((r["meta"] for r in previous if "meta" in r), {})
+        # The profiler is reported on its own below
+        old_params = {key: value for key, value in meta.get("params", params).items() if key != "profile"}
+        if old_params != params:
+            print(f"Warning: {args.compare} used different parameters {old_params}")
+        # Profilers slow every phase down several times over, so their timings only compare with their own
+        timings = meta.get("profile", args.profile) == args.profile
+        if not timings:
+            print(f"Not comparing timings: {args.compare} was profiled with {meta.get('profile') or 'nothing'}, "
+                  f"this run with {args.profile or 'nothing'}")
+        if compare_runs(previous, records, args.threshold, timings=timings):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
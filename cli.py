@@ -0,0 +1,150 @@
+import argparse
+import csv
+import json
+import sys
+import time
+
+from fleet import FleetDispatcher
+from layout import DEFAULT_LAYOUT
+from planner import HospitalPlanner
+from route_solver import SOLVERS
+
+
+def load_orders(path):
+    """Read (room, medicine, quantity) orders from a JSON list or a CSV file with a header row"""
+    with open(path, newline='') as f:
+        if path.lower().endswith(".json"):
+            records = json.load(f)
+        else:
+            records = list(csv.DictReader(f))
+    return [(r["room"], r["medicine"], int(r.get("quantity", 1))) for r in records]
+
+
+def accept_orders(planner, orders, check_stock=True):
+    """Validate orders against the layout and reserve their stock
+
+    Returns (accepted, rejected) where rejected lists (order, reason) pairs.
+    """
+    accepted = []
+    rejected = []
+    for order in orders:
+        room, med, qty = order
+        if room not in planner.hospital:
+            rejected.append((order, f"Unknown room {room}"))
+            continue
+        if check_stock:
+            try:
+                planner.inventory.reserve(med, qty)
+            except ValueError as e:
+                rejected.append((order, str(e)))
+                continue
+        accepted.append(order)
+    return accepted, rejected
+
+
+def plan_batch(planner, orders, start="Pharmacy", trip_size=12, check_stock=True):
+    """Split orders into trips of at most trip_size rooms and plan a route for each
+
+    Returns (trips, rejected) where each trip is a dict with its rooms, orders,
+    route and weighted cost, and rejected lists (order, reason) pairs.
+    """
+    trips = []
+    accepted, rejected = accept_orders(planner, orders, check_stock)
+    pending = {}
+    for order in accepted:
+        pending.setdefault(order[0], []).append(order)
+
+    rooms = list(pending)
+    for i in range(0, len(rooms), trip_size):
+        trip_rooms = rooms[i:i + trip_size]
+        route = planner.find_optimal_path(start, trip_rooms)
+        trips.append({
+            "trip": len(trips) + 1,
+            "rooms": trip_rooms,
+            "orders": [list(o) for room in trip_rooms for o in pending[room]],
+            "route": route,
+            "cost": planner.route_cost,
+        })
+    return trips, rejected
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Plan delivery routes for a batch of orders without the GUI")
+    parser.add_argument("orders", help="JSON or CSV file with room, medicine and quantity per order")
+    parser.add_argument("-o", "--output", help="write one JSON route per line here instead of stdout")
+    parser.add_argument("--layout", default=DEFAULT_LAYOUT, help="JSON or YAML hospital layout")
+    parser.add_argument("--start", default="Pharmacy", help="room every trip starts and ends at")
+    parser.add_argument("--trip-size", type=int, default=12, help="maximum rooms per trip")
+    parser.add_argument("--solver", choices=sorted(SOLVERS), default="auto")
+    parser.add_argument("--robots", type=int, help="dispatch across this many robots instead of fixed-size trips")
+    parser.add_argument("--capacity", default="20",
+                        help="robot payload limit, or a comma-separated limit per robot")
+    parser.add_argument("--objective", choices=("makespan", "distance"), default="makespan")
+    parser.add_argument("--cabinets", action="store_true",
+                        help="plan one route that picks stock up from the pharmacy and the layout's medicine "
+                             "cabinets, restocking when the cart (--capacity) or a cabinet runs low")
+    parser.add_argument("--workers", type=int, help="processes for the fleet search (default: all CPUs)")
+    parser.add_argument("--ignore-stock", action="store_true", help="do not check orders against inventory")
+    parser.add_argument("--contraction", action="store_true",
+                        help="preprocess the layout into a contraction hierarchy (large campuses)")
+    parser.add_argument("--metrics", help="write planning telemetry here: Prometheus text for a .prom file, "
+                                          "otherwise appended as one JSON line")
+    args = parser.parse_args(argv)
+
+    planner = HospitalPlanner.from_layout(args.layout, contraction=args.contraction)
+    planner.route_solver = SOLVERS[args.solver]()
+    orders = load_orders(args.orders)
+
+    t0 = time.perf_counter()
+    if args.robots:
+        capacities = [int(c) for c in args.capacity.split(",")]
+        if len(capacities) == 1:
+            capacities *= args.robots
+        dispatcher = FleetDispatcher(planner, capacities, args.objective, workers=args.workers, start=args.start)
+        accepted, rejected = accept_orders(planner, orders, not args.ignore_stock)
+        records, stats = dispatcher.dispatch(accepted)
+        trips = [trip for robot in records for trip in robot["trips"]]
+        print(f"Fleet makespan {stats['makespan']}, search took {stats['planning_time']:.3f}s", file=sys.stderr)
+    elif args.cabinets:
+        if planner.depots is None:
+            parser.error("the layout has no medicine cabinets")
+        planner.depots.capacity = int(args.capacity.split(",")[0])
+        accepted, rejected = accept_orders(planner, orders, check_stock=False)
+        plan = planner.depots.plan(accepted, start=args.start)
+        if not args.ignore_stock:
+            planner.depots.commit(plan)
+        rejected += [(order, f"Not enough {order[1]} at any depot") for order in plan["unserved"]]
+        trips = [{"trip": 1, "rooms": plan["visits"][1:-1], "stops": plan["stops"],
+                  "route": planner.expand_route(plan["visits"]), "cost": plan["cost"],
+                  "restocks": plan["restocks"]}]
+        records = trips
+    else:
+        trips, rejected = plan_batch(planner, orders, args.start, args.trip_size, not args.ignore_stock)
+        records = trips
+    elapsed = time.perf_counter() - t0
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for record in records:
+            out.write(json.dumps(record) + "\n")
+    finally:
+        if args.output:
+            out.close()
+
+    if args.metrics:
+        if args.metrics.endswith(".prom"):
+            planner.telemetry.write_prometheus(args.metrics)
+        else:
+            planner.telemetry.append_json(args.metrics)
+
+    for order, reason in rejected:
+        print(f"Rejected {order}: {reason}", file=sys.stderr)
+    planned = len(orders) - len(rejected)
+    print(f"{len(orders)} orders, {planned} planned in {len(trips)} trips, "
+          f"total distance {sum(t['cost'] for t in trips)}, "
+          f"{elapsed:.3f}s ({planned / elapsed if elapsed else 0:.0f} orders/s)", file=sys.stderr)
+    return 0 if not rejected else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+import heapq
+from collections import defaultdict
+
+
+class ContractionHierarchy:
+    """Shortest paths by Contraction Hierarchies, rebuilt on the next query after a corridor change"""
+
+    def __init__(self, graph, witness_limit=20):
+        self.graph = graph
+        self.witness_limit = witness_limit
+        self.stale = True
+        self.build()
+
+    def build(self):
+        """Contract every room and build the upward search graphs"""
+        self.nodes = list(self.graph)
+        self.node_ids = {node: i for i, node in enumerate(self.nodes)}
+        n = len(self.nodes)
+        out_edges = [{} for _ in range(n)]
+        in_edges = [{} for _ in range(n)]
+        for node, connections in self.graph.items():
+            u = self.node_ids[node]
+            for neighbor, cost in connections.items():
+                v = self.node_ids[neighbor]
+                if u != v and cost < out_edges[u].get(v, float('inf')):
+                    out_edges[u][v] = cost
+                    in_edges[v][u] = cost
+
+        self.middle = {}  # (u, w) -> room contracted between them for shortcut edges
+        self.rank = [0] * n
+        self.up_out = [[] for _ in range(n)]  # forward edges to more important rooms
+        self.up_in = [[] for _ in range(n)]  # backward edges from more important rooms
+        self.shortcuts = 0
+        contracted = [False] * n
+        deleted_neighbors = [0] * n
+
+        def shortcuts_for(v):
+            """Shortcuts (u, w, cost) needed to contract v"""
+            needed = []
+            for u, cost_in in in_edges[v].items():
+                targets = {w: cost_in + cost_out for w, cost_out in out_edges[v].items() if w != u}
+                if not targets:
+                    continue
+                witness = self.witness_search(out_edges, u, v, targets)
+                for w, cost in targets.items():
+                    if witness.get(w, float('inf')) > cost:
+                        needed.append((u, w, cost))
+            return needed
+
+        def priority(v):
+            added = len(shortcuts_for(v))
+            return added - len(in_edges[v]) - len(out_edges[v]) + deleted_neighbors[v]
+
+        current_priority = [priority(v) for v in range(n)]
+        heap = [(p, v) for v, p in enumerate(current_priority)]
+        heapq.heapify(heap)
+        level = 0
+        while heap:
+            p, v = heapq.heappop(heap)
+            if contracted[v] or p != current_priority[v]:
+                continue
+            # Lazy update: re-evaluate and put back if no longer the least important
+            current = current_priority[v] = priority(v)
+            if heap and current > heap[0][0]:
+                heapq.heappush(heap, (current, v))
+                continue
+
+            for u, w, cost in shortcuts_for(v):
+                if cost < out_edges[u].get(w, float('inf')):
+                    out_edges[u][w] = cost
+                    in_edges[w][u] = cost
+                    self.middle[(u, w)] = v
+                    self.shortcuts += 1
+
+            contracted[v] = True
+            self.rank[v] = level
+            level += 1
+            for w, cost in out_edges[v].items():
+                self.up_out[v].append((w, cost))
+                del in_edges[w][v]
+                deleted_neighbors[w] += 1
+            for u, cost in in_edges[v].items():
+                self.up_in[v].append((u, cost))
+                del out_edges[u][v]
+                deleted_neighbors[u] += 1
+            out_edges[v] = {}
+            in_edges[v] = {}
+
+            # Neighbours gained shortcuts and lost an edge, so refresh their priority
+            for u in {u for u, _ in self.up_out[v]} | {u for u, _ in self.up_in[v]}:
+                current_priority[u] = priority(u)
+                heapq.heappush(heap, (current_priority[u], u))
+        self.stale = False
+
+    def witness_search(self, out_edges, source, skip, targets):
+        """Distances from source avoiding skip, until every target is settled or
+        beyond its shortcut cost, or witness_limit rooms are settled"""
+        limit = max(targets.values())
+        remaining = len(targets)
+        dist = {source: 0}
+        heap = [(0, source)]
+        settled = 0
+        while heap and settled < self.witness_limit:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            if d > limit:
+                break
+            if u in targets:
+                remaining -= 1
+                if not remaining:
+                    break
+            settled += 1
+            for v, cost in out_edges[u].items():
+                if v == skip:
+                    continue
+                nd = d + cost
+                if nd < dist.get(v, float('inf')):
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd, v))
+        return dist
+
+    def upward(self, source, edges):
+        """Full Dijkstra over the upward graph; returns (dist, parent)"""
+        dist = {source: 0}
+        parent = {source: None}
+        heap = [(0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for v, cost in edges[u]:
+                nd = d + cost
+                if nd < dist.get(v, float('inf')):
+                    dist[v] = nd
+                    parent[v] = u
+                    heapq.heappush(heap, (nd, v))
+        return dist, parent
+
+    def query(self, s, t):
+        """Bidirectional upward search; returns (distance, meeting room, forward parents, backward parents)"""
+        inf = float('inf')
+        dist = ({s: 0}, {t: 0})
+        parent = ({s: None}, {t: None})
+        heaps = ([(0, s)], [(0, t)])
+        edges = (self.up_out, self.up_in)
+        best, meet = (0, s) if s == t else (inf, None)
+        while heaps[0] or heaps[1]:
+            side = 0 if heaps[0] and (not heaps[1] or heaps[0][0][0] <= heaps[1][0][0]) else 1
+            d, u = heapq.heappop(heaps[side])
+            if d >= best:
+                heaps[side].clear()  # Nothing cheaper left on this side
+                continue
+            if d > dist[side][u]:
+                continue
+            other = dist[1 - side].get(u)
+            if other is not None and d + other < best:
+                best, meet = d + other, u
+            for v, cost in edges[side][u]:
+                nd = d + cost
+                if nd < dist[side].get(v, inf):
+                    dist[side][v] = nd
+                    parent[side][v] = u
+                    heapq.heappush(heaps[side], (nd, v))
+        return best, meet, parent[0], parent[1]
+
+    def ensure_built(self):
+        if self.stale:
+            self.build()
+
+    def distance(self, start, goal):
+        """Shortest weighted distance between two rooms"""
+        self.ensure_built()
+        return self.query(self.node_ids[start], self.node_ids[goal])[0]
+
+    def path(self, start, goal):
+        """Shortest room-by-room path between two rooms, or [] if unreachable"""
+        self.ensure_built()
+        _, meet, forward, backward = self.query(self.node_ids[start], self.node_ids[goal])
+        if meet is None:
+            return []
+        up = [meet]
+        while forward[up[-1]] is not None:
+            up.append(forward[up[-1]])
+        up.reverse()
+        down = [meet]
+        while backward[down[-1]] is not None:
+            down.append(backward[down[-1]])
+
+        hops = up + down[1:]
+        path = [hops[0]]
+        for u, w in zip(hops, hops[1:]):
+            self.unpack(u, w, path)
+        return [self.nodes[i] for i in path]
+
+    def unpack(self, u, w, path):
+        """Append the rooms after u on the original path that edge u -> w stands for"""
+        stack = [(u, w)]
+        while stack:
+            a, b = stack.pop()
+            m = self.middle.get((a, b))
+            if m is None:
+                path.append(b)
+            else:
+                stack.append((m, b))
+                stack.append((a, m))
+
+    def table(self, sources, targets):
+        """Many-to-many distances as a list of rows, one per source"""
+        self.ensure_built()
+        buckets = defaultdict(list)
+        for j, target in enumerate(targets):
+            for v, d in self.upward(self.node_ids[target], self.up_in)[0].items():
+                buckets[v].append((j, d))
+
+        rows = []
+        for source in sources:
+            row = [float('inf')] * len(targets)
+            for v, d in self.upward(self.node_ids[source], self.up_out)[0].items():
+                for j, dt in buckets.get(v, ()):
+                    if d + dt < row[j]:
+                        row[j] = d + dt
+            rows.append(row)
+        return rows
+
+    def update_edge(self, a, b, cost):
+        """Note a corridor change already made in the graph dict; rebuilt on the next query"""
+        self.stale = True
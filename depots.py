@@ -0,0 +1,238 @@
+import os
+
+from inventory import InventoryStore
+
+
+class DepotPlanner:
+    """Cart routes that pick medicine up at the pharmacy and satellite cabinets on the way"""
+
+    def __init__(self, planner, cabinets, capacity=20, home="Pharmacy", data_dir=None):
+        if capacity < 1:
+            raise ValueError("Cart capacity must be at least 1")
+        unknown = [room for room in list(cabinets) + [home] if room not in planner.hospital]
+        if unknown:
+            raise ValueError(f"Unknown depot room {unknown[0]}")
+        self.planner = planner
+        self.capacity = capacity
+        self.home = home
+        self.stores = {home: planner.inventory}
+        for room, stock in cabinets.items():
+            if room != home:
+                path = os.path.join(data_dir, "cabinets", room) if data_dir else None
+                self.stores[room] = InventoryStore(stock, data_dir=path)
+        self.sourced = {}  # (room, med) -> {cabinet: qty} for queued orders served by a cabinet
+        for cabinet, store in self.stores.items():
+            if cabinet != home:
+                for key, qty in store.held.items():
+                    self.sourced.setdefault(key, {})[cabinet] = qty
+        # Orders cancelled just before a crash still have their holds; hand them back
+        for room, med in [key for key in self.sourced if key not in planner.inventory.orders]:
+            self.unsource(room, med)
+
+    def stock(self, depot):
+        return self.stores[depot].stock
+
+    def available(self, reserved=()):
+        """Stock per depot, counting the given queued orders' holdings as free again"""
+        available = {depot: dict(store.stock) for depot, store in self.stores.items()}
+        for room, med, qty in reserved:
+            parts = self.sourced.get((room, med), {})
+            home = available[self.home]
+            home[med] = home.get(med, 0) + qty - sum(parts.values())
+            for cabinet, part in parts.items():
+                available[cabinet][med] = available[cabinet].get(med, 0) + part
+        return available
+
+    def one_load(self, orders, reserved=False):
+        """Whether a single cart load from one depot can carry all (room, med, qty) orders"""
+        if sum(order[2] for order in orders) > self.capacity:
+            return False
+        needed = {}
+        for _, med, qty in orders:
+            needed[med] = needed.get(med, 0) + qty
+        return any(all(stock.get(med, 0) >= qty for med, qty in needed.items())
+                   for stock in self.available(orders if reserved else ()).values())
+
+    def plan(self, orders, reserved=False, start=None, sequence=None):
+        """Plan one cart's route for (room, med, qty) orders; stock is not touched
+
+        With reserved=True the orders are queued ones that already hold stock.
+        The cart leaves from and returns to start (the pharmacy by default),
+        delivering in the order of sequence (a list of rooms) when given.
+        Returns a dict with the room "visits" from start and back, the
+        "stops" as (room, "pickup" or "deliver", [(room, med, qty), ...]), the
+        weighted "cost", the number of "restocks" (pickups after the first),
+        "sources" mapping (room, med) to {depot: qty} and the "unserved"
+        (room, med, qty) that no depot had stock for.
+        """
+        start = start or self.home
+        memo = {}
+
+        def d(a, b):
+            if a == b:
+                return 0
+            if (a, b) not in memo:
+                memo[(a, b)] = self.planner.path_index.distance(a, b)
+            return memo[(a, b)]
+
+        available = self.available(orders if reserved else ())
+        loads = []  # {"depot", "rooms", "units", "items"} in route order
+        sources = {}
+        unserved = []
+        if sequence is None:
+            orders = sorted(orders, key=lambda order: -d(start, order[0]))
+        else:
+            position = {room: i for i, room in reversed(list(enumerate(sequence)))}
+            # Rooms not in the sequence (the start room itself) are served before its first stop
+            orders = sorted(orders, key=lambda order: position.get(order[0], -1))
+        for room, med, qty in orders:
+            remaining = qty
+            while remaining:
+                # Fixed sequence: only the last load can take the room, and only at its end
+                if sequence is None:
+                    candidates, new_at = range(len(loads)), range(len(loads) + 1)
+                else:
+                    candidates, new_at = range(max(len(loads) - 1, 0), len(loads)), [len(loads)]
+                # Ranked by splitting the order, cost per unit carried and size of the part
+                best = None  # (split, cost per unit, -part, cost, part, load index, depot, insert position)
+                for k in candidates:
+                    load = loads[k]
+                    part = min(remaining, self.capacity - load["units"], available[load["depot"]].get(med, 0))
+                    if part <= 0:
+                        continue
+                    if room in load["rooms"]:
+                        cost, pos = 0, None
+                    elif sequence is not None:
+                        last = (load["rooms"] or [load["depot"]])[-1]
+                        cost, pos = d(last, room) + d(room, start) - d(last, start), len(load["rooms"])
+                    else:
+                        nxt = loads[k + 1]["depot"] if k + 1 < len(loads) else start
+                        seq = [load["depot"]] + load["rooms"] + [nxt]
+                        cost, pos = min((d(seq[j], room) + d(room, seq[j + 1]) - d(seq[j], seq[j + 1]), j)
+                                        for j in range(len(seq) - 1))
+                    option = (part < remaining, cost / part, -part, cost, part, k, None, pos)
+                    best = option if best is None or option[:3] < best[:3] else best
+
+                for depot, stock in available.items():
+                    part = min(remaining, self.capacity, stock.get(med, 0))
+                    if part <= 0:
+                        continue
+                    for k in new_at:
+                        prev = (loads[k - 1]["rooms"] or [loads[k - 1]["depot"]])[-1] if k else start
+                        nxt = loads[k]["depot"] if k < len(loads) else start
+                        cost = d(prev, depot) + d(depot, room) + d(room, nxt) - d(prev, nxt)
+                        option = (part < remaining, cost / part, -part, cost, part, k, depot, None)
+                        best = option if best is None or option[:3] < best[:3] else best
+
+                if best is None or best[3] == float('inf'):
+                    unserved.append((room, med, remaining))
+                    break
+                part, k, depot, pos = best[4:]
+                if depot is not None:
+                    loads.insert(k, {"depot": depot, "rooms": [room], "units": 0, "items": []})
+                elif pos is not None:
+                    loads[k]["rooms"].insert(pos, room)
+                load = loads[k]
+                load["units"] += part
+                load["items"].append((room, med, part))
+                available[load["depot"]][med] -= part
+                parts = sources.setdefault((room, med), {})
+                parts[load["depot"]] = parts.get(load["depot"], 0) + part
+                remaining -= part
+
+        visits = [start]
+        stops = []
+        for load in loads:
+            pickup = sorted(load["items"])
+            if visits[-1] != load["depot"]:
+                visits.append(load["depot"])
+            stops.append((load["depot"], "pickup", pickup))
+            for room in load["rooms"]:
+                if visits[-1] != room:
+                    visits.append(room)
+                stops.append((room, "deliver", [item for item in pickup if item[0] == room]))
+        if visits[-1] != start or len(visits) == 1:
+            visits.append(start)
+        return {
+            "visits": visits,
+            "stops": stops,
+            "cost": sum(d(a, b) for a, b in zip(visits, visits[1:])),
+            "restocks": max(len(loads) - 1, 0),
+            "sources": sources,
+            "unserved": unserved,
+        }
+
+    def commit(self, plan, reserved=False):
+        """Take the plan's stock from its depots (or, for queued orders, move it there)
+
+        Raises ValueError, changing nothing, if a depot no longer has the stock.
+        """
+        if not reserved:
+            needed = {}
+            for (room, med), parts in plan["sources"].items():
+                for depot, qty in parts.items():
+                    needed[(depot, med)] = needed.get((depot, med), 0) + qty
+            self.check(needed)
+            for (depot, med), qty in needed.items():
+                self.stores[depot].reserve(med, qty)
+            return
+
+        moves = []
+        for (room, med), parts in plan["sources"].items():
+            old = self.sourced.get((room, med), {})
+            new = {depot: qty for depot, qty in parts.items() if depot != self.home}
+            if old != new:
+                moves.append((room, med, old, new))
+        self.move(moves)
+        for room, med, old, new in moves:
+            if new:
+                self.sourced[(room, med)] = new
+            else:
+                del self.sourced[(room, med)]
+
+    def check(self, needed):
+        """Raise ValueError if some depot lacks the net (depot, med) -> units taken"""
+        for (depot, med), qty in needed.items():
+            if qty > self.stock(depot).get(med, 0):
+                raise ValueError(f"Not enough {med} at {depot}")
+
+    def move(self, moves):
+        """Shift queued orders' holdings between the pharmacy and cabinets, for (room, med, old, new) parts
+
+        Only the net change per depot has to be in stock: every order's stock is
+        given back before any is taken.
+        """
+        changes = []  # (room, med, cabinet, units moved onto the cabinet)
+        needed = {}
+        for room, med, old, new in moves:
+            for cabinet in set(old) | set(new):
+                change = new.get(cabinet, 0) - old.get(cabinet, 0)
+                if change:
+                    changes.append((room, med, cabinet, change))
+                    needed[(cabinet, med)] = needed.get((cabinet, med), 0) + change
+                    needed[(self.home, med)] = needed.get((self.home, med), 0) - change
+        self.check(needed)
+
+        home = self.stores[self.home]
+        for room, med, cabinet, change in changes:
+            if change < 0:
+                self.stores[cabinet].unhold(room, med, -change)
+            else:
+                home.release(med, change)
+        for room, med, cabinet, change in changes:
+            if change < 0:
+                home.reserve(med, -change)
+            else:
+                self.stores[cabinet].hold(room, med, change)
+
+    def unsource(self, room, med):
+        """Hand a queued order's cabinet stock back to the pharmacy (e.g. before cancelling it)"""
+        parts = self.sourced.get((room, med))
+        if parts:
+            self.move([(room, med, parts, {})])
+            del self.sourced[(room, med)]
+
+    def forget(self, room, med):
+        """Drop the holds of an order that has been delivered; their stock left with the cart"""
+        for cabinet, qty in self.sourced.pop((room, med), {}).items():
+            self.stores[cabinet].unhold(room, med, qty, restock=False)
@@ -0,0 +1,105 @@
+import heapq
+
+
+class EvacuationField:
+    """Nearest emergency exit and next hop for every room, repaired locally on changes"""
+
+    def __init__(self, graph, exits):
+        self.graph = graph
+        self.pred = {room: {} for room in graph}
+        for room, connections in graph.items():
+            for neighbor, cost in connections.items():
+                self.pred[neighbor][room] = cost
+        self.exits = set(exits)
+        self.dist = {room: float('inf') for room in graph}
+        self.next_hop = {room: None for room in graph}
+        self.exit_of = {room: None for room in graph}
+
+        heap = []
+        for exit_room in self.exits:
+            self.dist[exit_room] = 0
+            self.exit_of[exit_room] = exit_room
+            heap.append((0, exit_room))
+        heapq.heapify(heap)
+        self.propagate(heap)
+
+    def propagate(self, heap):
+        """Dijkstra over reversed corridors from the rooms already queued"""
+        dist, pred = self.dist, self.pred
+        while heap:
+            d, v = heapq.heappop(heap)
+            if d > dist[v]:
+                continue
+            for u, cost in pred[v].items():
+                nd = d + cost
+                if nd < dist[u]:
+                    dist[u] = nd
+                    self.next_hop[u] = v
+                    self.exit_of[u] = self.exit_of[v]
+                    heapq.heappush(heap, (nd, u))
+
+    def repair(self, roots):
+        """Recompute the rooms whose route to an exit passed through any of roots"""
+        affected = set()
+        stack = [r for r in roots if r not in self.exits]
+        while stack:
+            v = stack.pop()
+            if v in affected:
+                continue
+            affected.add(v)
+            stack.extend(u for u in self.pred[v] if self.next_hop[u] == v and u not in affected)
+
+        for u in affected:
+            self.dist[u] = float('inf')
+            self.next_hop[u] = self.exit_of[u] = None
+
+        # Reseed each affected room from its best unaffected neighbour
+        heap = []
+        for u in affected:
+            for v, cost in self.graph[u].items():
+                if v not in affected and cost + self.dist[v] < self.dist[u]:
+                    self.dist[u] = cost + self.dist[v]
+                    self.next_hop[u] = v
+                    self.exit_of[u] = self.exit_of[v]
+            if self.dist[u] < float('inf'):
+                heap.append((self.dist[u], u))
+        heapq.heapify(heap)
+        self.propagate(heap)
+
+    def update_edge(self, a, b, cost):
+        """Repair the exit routes through a changed corridor a -> b"""
+        if cost is None:
+            self.pred[b].pop(a, None)
+        else:
+            self.pred[b][a] = cost
+
+        if self.next_hop[a] == b:
+            self.repair([a])
+        elif cost is not None and cost + self.dist[b] < self.dist[a]:
+            self.dist[a] = cost + self.dist[b]
+            self.next_hop[a] = b
+            self.exit_of[a] = self.exit_of[b]
+            self.propagate([(self.dist[a], a)])
+
+    def add_exit(self, room):
+        self.exits.add(room)
+        self.dist[room] = 0
+        self.next_hop[room] = None
+        self.exit_of[room] = room
+        self.propagate([(0, room)])
+
+    def remove_exit(self, room):
+        self.exits.discard(room)
+        self.repair([room])
+
+    def nearest_exit(self, room):
+        return self.exit_of[room]
+
+    def path(self, room):
+        """Route from a room to its nearest exit, or [] if no exit is reachable"""
+        if self.exit_of[room] is None:
+            return []
+        path = [room]
+        while self.next_hop[path[-1]] is not None:
+            path.append(self.next_hop[path[-1]])
+        return path
@@ -0,0 +1,176 @@
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from route_solver import AutoSolver, distance_matrix
+
+# Problem shared with pool workers once, instead of pickling it with every task
+_problem = None
+
+
+def _init_worker(problem):
+    global _problem
+    _problem = problem
+
+
+def _plan_candidate(seed):
+    """Build one randomized capacity-aware plan; returns (objective, robots)
+
+    robots is a list with, per robot, a list of (stop indices, trip cost) trips.
+    Seed 0 is the deterministic Clarke-Wright savings plan.
+    """
+    d, loads, capacities, objective, time_budget = _problem
+    rng = random.Random(seed)
+    n = len(d)
+    max_capacity = max(capacities)
+
+    # For makespan, cap trip loads near an even share so every robot gets work,
+    # and cycle through the robot capacities so smaller robots can take trips too
+    trip_capacity = max_capacity
+    if objective == "makespan":
+        sizes = sorted(set(capacities), reverse=True)
+        share = math.ceil(sum(loads) / len(capacities) * (rng.uniform(1.0, 1.5) if seed else 1.0))
+        trip_capacity = min(sizes[seed % len(sizes)], max(share, max(loads)))
+    shape = rng.uniform(0.6, 1.4) if seed else 1.0
+
+    # Clarke-Wright savings: merge the end of one trip into the start of another
+    trips = {i: [i] for i in range(1, n)}
+    trip_of = list(range(n))
+    trip_load = {i: loads[i] for i in range(1, n)}
+    savings = []
+    for i in range(1, n):
+        for j in range(1, n):
+            if i != j:
+                s = d[i][0] + d[0][j] - shape * d[i][j]
+                if seed:
+                    s += rng.uniform(-0.5, 0.5)
+                if s > 0:
+                    savings.append((s, i, j))
+    savings.sort(reverse=True)
+
+    for _, i, j in savings:
+        a, b = trip_of[i], trip_of[j]
+        if a == b or trips[a][-1] != i or trips[b][0] != j:
+            continue
+        if trip_load[a] + trip_load[b] > trip_capacity:
+            continue
+        trips[a] += trips[b]
+        for stop in trips[b]:
+            trip_of[stop] = a
+        trip_load[a] += trip_load.pop(b)
+        del trips[b]
+
+    # Reorder the stops of each trip with the route solver
+    solver = AutoSolver(time_budget=time_budget)
+    planned = []
+    for key, stops in trips.items():
+        nodes = [0] + stops
+        sub = [[d[u][v] for v in nodes] for u in nodes]
+        order = solver.solve_matrix(sub)
+        trip = [nodes[k] for k in order]
+        cost = sum(d[u][v] for u, v in zip([0] + trip, trip + [0]))
+        planned.append((trip, cost, trip_load[key]))
+
+    # Longest trips first, each to the capable robot that finishes earliest
+    robots = [[] for _ in capacities]
+    finish = [0] * len(capacities)
+    for trip, cost, load in sorted(planned, key=lambda t: -t[1]):
+        robot = min((r for r, cap in enumerate(capacities) if cap >= load), key=lambda r: finish[r])
+        robots[robot].append((trip, cost))
+        finish[robot] += cost
+
+    value = max(finish) if objective == "makespan" else sum(finish)
+    return value, robots
+
+
+class FleetDispatcher:
+    """Split deliveries across capacity-limited robots, keeping the best of many savings plans"""
+
+    def __init__(self, planner, capacities, objective="makespan", restarts=8, workers=None,
+                 time_budget=0.05, start="Pharmacy"):
+        if not capacities or min(capacities) < 1:
+            raise ValueError("Every robot needs a capacity of at least 1")
+        if objective not in ("makespan", "distance"):
+            raise ValueError(f"Unknown objective {objective}")
+        self.planner = planner
+        self.capacities = list(capacities)
+        self.objective = objective
+        self.restarts = restarts
+        self.workers = workers
+        self.time_budget = time_budget
+        self.start = start
+
+    def make_stops(self, deliveries):
+        """Group deliveries by room into stops no heavier than the largest robot can carry"""
+        max_capacity = max(self.capacities)
+        stops = []
+        open_stop = {}
+        for room, med, qty in deliveries:
+            while qty > 0:
+                stop = open_stop.get(room)
+                if stop is None or stop[1] == max_capacity:
+                    stop = [room, 0, []]
+                    open_stop[room] = stop
+                    stops.append(stop)
+                part = min(qty, max_capacity - stop[1])
+                stop[1] += part
+                stop[2].append((room, med, part))
+                qty -= part
+        return stops
+
+    def dispatch(self, deliveries=None):
+        """Plan all deliveries and return (robots, stats)
+
+        Each robot entry holds its trips (rooms, orders, load, route, cost) and
+        total distance; stats has the objective value and the planning time.
+        """
+        t0 = time.perf_counter()
+        deliveries = self.planner.deliveries if deliveries is None else deliveries
+        stops = self.make_stops(deliveries)
+        rooms = [self.start] + [stop[0] for stop in stops]
+        d = distance_matrix(rooms, self.planner.path_index.distance, self.planner.path_index.table)
+        loads = [0] + [stop[1] for stop in stops]
+        problem = (d, loads, self.capacities, self.objective, self.time_budget)
+
+        workers = self.workers or os.cpu_count() or 1
+        seeds = range(max(1, self.restarts))
+        if workers == 1 or len(seeds) == 1 or not stops:
+            _init_worker(problem)
+            results = [_plan_candidate(seed) for seed in seeds]
+        else:
+            with ProcessPoolExecutor(min(workers, len(seeds)), initializer=_init_worker,
+                                     initargs=(problem,)) as pool:
+                results = list(pool.map(_plan_candidate, seeds))
+        value, plan = min(results, key=lambda r: r[0])
+
+        robots = []
+        for r, trips in enumerate(plan):
+            robot_trips = []
+            for trip, cost in trips:
+                route = [self.start]
+                for a, b in zip([0] + trip, trip + [0]):
+                    route += self.planner.path_index.path(rooms[a], rooms[b])[1:]
+                robot_trips.append({
+                    "rooms": [rooms[k] for k in trip],
+                    "orders": [list(o) for k in trip for o in stops[k - 1][2]],
+                    "load": sum(stops[k - 1][1] for k in trip),
+                    "route": route,
+                    "cost": cost,
+                })
+            robots.append({
+                "robot": r + 1,
+                "capacity": self.capacities[r],
+                "trips": robot_trips,
+                "distance": sum(t["cost"] for t in robot_trips),
+            })
+
+        stats = {
+            "objective": self.objective,
+            "value": value,
+            "makespan": max(robot["distance"] for robot in robots),
+            "distance": sum(robot["distance"] for robot in robots),
+            "planning_time": time.perf_counter() - t0,
+        }
+        return robots, stats
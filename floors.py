@@ -0,0 +1,192 @@
+import heapq
+
+
+def elevator_rides(elevators):
+    """Ride edges for elevator shafts given as name -> {"stops", "wait", "per_floor"}
+
+    stops maps each floor the shaft serves to the room where it stops. Riding
+    between two stops costs the wait for a car plus per_floor for every floor
+    travelled. Returns [(room_a, room_b, cost), ...] with both directions.
+    """
+    rides = []
+    for name, spec in elevators.items():
+        stops = {int(floor): room for floor, room in spec["stops"].items()}
+        wait, per_floor = spec.get("wait", 0), spec.get("per_floor", 1)
+        if wait < 0 or per_floor < 0:
+            raise ValueError(f"Elevator {name} has a negative wait or travel cost")
+        for a, room_a in stops.items():
+            for b, room_b in stops.items():
+                if a != b:
+                    rides.append((room_a, room_b, wait + per_floor * abs(a - b)))
+    return rides
+
+
+class HierarchicalRouter:
+    """Shortest paths through per-floor trees and the portal graph between floors"""
+
+    def __init__(self, graph, floor_of):
+        missing = [room for room in graph if room not in floor_of]
+        if missing:
+            raise ValueError(f"No floor given for {missing[0]}")
+        self.graph = graph
+        self.floor_of = floor_of
+        self.pred = {room: {} for room in graph}
+        for room, connections in graph.items():
+            for neighbor, cost in connections.items():
+                self.pred[neighbor][room] = cost
+
+        self.rooms_on = {}
+        for room in graph:
+            self.rooms_on.setdefault(floor_of[room], []).append(room)
+        self.portals_on = {}
+        self.down = {}  # portal -> (dist, parent) of paths from the portal on its floor
+        self.up = {}  # portal -> (dist, next hop) of paths to the portal on its floor
+        self.local = {}  # room -> (dist, parent) of paths from the room on its floor
+        for floor in self.rooms_on:
+            self.build_floor(floor)
+        self.solve_portals()
+
+    def floor_search(self, source, edges):
+        """Dijkstra from source over edges (graph or pred) without leaving its floor"""
+        floor = self.floor_of[source]
+        dist = {source: 0}
+        parent = {source: None}
+        heap = [(0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for v, cost in edges[u].items():
+                if self.floor_of[v] != floor:
+                    continue
+                nd = d + cost
+                if nd < dist.get(v, float('inf')):
+                    dist[v] = nd
+                    parent[v] = u
+                    heapq.heappush(heap, (nd, v))
+        return dist, parent
+
+    def build_floor(self, floor):
+        """Find the floor's portals and rebuild their trees and the floor's cached rows"""
+        for portal in self.portals_on.get(floor, ()):
+            self.down.pop(portal, None)
+            self.up.pop(portal, None)
+        rooms = self.rooms_on[floor]
+        for room in rooms:
+            self.local.pop(room, None)
+
+        portals = [room for room in rooms
+                   if any(self.floor_of[v] != floor for v in self.graph[room])
+                   or any(self.floor_of[u] != floor for u in self.pred[room])]
+        self.portals_on[floor] = portals
+        for portal in portals:
+            self.down[portal] = self.floor_search(portal, self.graph)
+            self.up[portal] = self.floor_search(portal, self.pred)
+
+    def solve_portals(self):
+        """All-pairs shortest paths over the portal graph"""
+        edges = {}
+        for floor, portals in self.portals_on.items():
+            for p in portals:
+                dist = self.down[p][0]
+                edges[p] = {q: dist[q] for q in portals if q != p and q in dist}
+                for v, cost in self.graph[p].items():
+                    if self.floor_of[v] != floor:
+                        edges[p][v] = cost
+
+        self.portal_rows = {}
+        for source in edges:
+            dist = {source: 0}
+            parent = {source: None}
+            heap = [(0, source)]
+            while heap:
+                d, u = heapq.heappop(heap)
+                if d > dist[u]:
+                    continue
+                for v, cost in edges[u].items():
+                    nd = d + cost
+                    if nd < dist.get(v, float('inf')):
+                        dist[v] = nd
+                        parent[v] = u
+                        heapq.heappush(heap, (nd, v))
+            self.portal_rows[source] = (dist, parent)
+
+    def local_row(self, room):
+        if room not in self.local:
+            self.local[room] = self.floor_search(room, self.graph)
+        return self.local[room]
+
+    def best_route(self, start, goal):
+        """(distance, exit portal, entry portal); portals are None when staying on the floor"""
+        inf = float('inf')
+        best = (inf, None, None)
+        start_floor, goal_floor = self.floor_of[start], self.floor_of[goal]
+        if start_floor == goal_floor:
+            best = (self.local_row(start)[0].get(goal, inf), None, None)
+
+        entries = [(q, self.down[q][0][goal]) for q in self.portals_on[goal_floor] if goal in self.down[q][0]]
+        for p in self.portals_on[start_floor]:
+            to_portal = self.up[p][0].get(start)
+            if to_portal is None or to_portal >= best[0]:
+                continue
+            row = self.portal_rows[p][0]
+            for q, from_portal in entries:
+                d = to_portal + row.get(q, inf) + from_portal
+                if d < best[0]:
+                    best = (d, p, q)
+        return best
+
+    def distance(self, start, goal):
+        """Shortest weighted distance between two rooms"""
+        if start == goal:
+            return 0
+        return self.best_route(start, goal)[0]
+
+    def table(self, sources, targets):
+        """Many-to-many distances as a list of rows, one per source"""
+        return [[self.distance(s, t) for t in targets] for s in sources]
+
+    def path(self, start, goal):
+        """Shortest room-by-room path between two rooms, or [] if unreachable"""
+        if start == goal:
+            return [start]
+        d, p, q = self.best_route(start, goal)
+        if d == float('inf'):
+            return []
+        if p is None:
+            return self.tree_path(self.local_row(start)[1], goal)
+
+        nxt = self.up[p][1]
+        path = [start]
+        while path[-1] != p:
+            path.append(nxt[path[-1]])
+
+        parent = self.portal_rows[p][1]
+        portals = [q]
+        while portals[-1] != p:
+            portals.append(parent[portals[-1]])
+        portals.reverse()
+        for x, y in zip(portals, portals[1:]):
+            if self.floor_of[x] == self.floor_of[y]:
+                path += self.tree_path(self.down[x][1], y)[1:]
+            else:
+                path.append(y)
+
+        return path + self.tree_path(self.down[q][1], goal)[1:]
+
+    def tree_path(self, parent, goal):
+        path = []
+        while goal is not None:
+            path.append(goal)
+            goal = parent[goal]
+        return path[::-1]
+
+    def update_edge(self, a, b, cost):
+        """Rebuild the floors at either end of a changed corridor, then the portal graph"""
+        if cost is None:
+            self.pred[b].pop(a, None)
+        else:
+            self.pred[b][a] = cost
+        for floor in {self.floor_of[a], self.floor_of[b]}:
+            self.build_floor(floor)
+        self.solve_portals()
@@ -0,0 +1,77 @@
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class RoomGeometry:
+    """Room coordinates by node ID with batch geometry kernels, vectorized when NumPy is available"""
+
+    def __init__(self, positions, vectorized=None):
+        if vectorized and np is None:
+            raise ImportError("NumPy is required for vectorized geometry")
+        self.vectorized = np is not None if vectorized is None else vectorized
+        self.nodes = list(positions)
+        self.node_ids = {node: i for i, node in enumerate(self.nodes)}
+        if self.vectorized:
+            self.xy = np.array([positions[node] for node in self.nodes], dtype=float).reshape(-1, 2)
+        else:
+            self.xy = [tuple(map(float, positions[node])) for node in self.nodes]
+
+    def distances_to(self, goal, scale=1):
+        """Euclidean distance from every room to goal times scale, as a list indexed by node ID"""
+        gx, gy = self.xy[self.node_ids[goal]]
+        if self.vectorized:
+            return (scale * np.hypot(self.xy[:, 0] - gx, self.xy[:, 1] - gy)).tolist()
+        return [scale * math.hypot(x - gx, y - gy) for x, y in self.xy]
+
+    def label_positions(self, edges, offset=10):
+        """Weight label positions for (a, b) edges: the midpoint moved offset pixels to the left of a -> b"""
+        if not edges:
+            return []
+        if self.vectorized:
+            start, end = self.endpoints(edges)
+            delta = end - start
+            angle = np.arctan2(delta[:, 1], delta[:, 0])
+            x = start[:, 0] + delta[:, 0] / 2 + offset * np.sin(angle)
+            y = start[:, 1] + delta[:, 1] / 2 - offset * np.cos(angle)
+            return list(zip(x.tolist(), y.tolist()))
+
+        labels = []
+        for a, b in edges:
+            (x1, y1), (x2, y2) = self.xy[self.node_ids[a]], self.xy[self.node_ids[b]]
+            dx, dy = x2 - x1, y2 - y1
+            angle = math.atan2(dy, dx)
+            labels.append((x1 + dx / 2 + offset * math.sin(angle), y1 + dy / 2 - offset * math.cos(angle)))
+        return labels
+
+    def lengths(self, edges):
+        """Pixel length of every (a, b) edge"""
+        if not edges:
+            return []
+        if self.vectorized:
+            start, end = self.endpoints(edges)
+            return np.hypot(end[:, 0] - start[:, 0], end[:, 1] - start[:, 1]).tolist()
+        return [math.hypot(x2 - x1, y2 - y1) for (x1, y1), (x2, y2)
+                in ((self.xy[self.node_ids[a]], self.xy[self.node_ids[b]]) for a, b in edges)]
+
+    def endpoints(self, edges):
+        node_ids = self.node_ids
+        ids = np.array([node_ids[room] for edge in edges for room in edge], dtype=np.intp).reshape(-1, 2)
+        return self.xy[ids[:, 0]], self.xy[ids[:, 1]]
+
+    def nearest(self, x, y, radius=None):
+        """Room closest to point (x, y), or None if there is none within radius"""
+        if not self.nodes:
+            return None
+        if self.vectorized:
+            d2 = (self.xy[:, 0] - x) ** 2 + (self.xy[:, 1] - y) ** 2
+            i = int(np.argmin(d2))
+            best = float(d2[i])
+        else:
+            best, i = min(((px - x) ** 2 + (py - y) ** 2, i) for i, (px, py) in enumerate(self.xy))
+        if radius is not None and best > radius * radius:
+            return None
+        return self.nodes[i]
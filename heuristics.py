@@ -0,0 +1,110 @@
+import math
+
+from geometry import RoomGeometry
+from pathindex import ShortestPathIndex
+
+
+class ScaledEuclideanHeuristic:
+    """Euclidean distance in edge-cost units, scaled by the cheapest cost per pixel so it never overestimates"""
+
+    def __init__(self, graph, positions, geometry=None):
+        self.positions = positions
+        self.geometry = geometry or RoomGeometry(positions)
+        self.scale = float('inf')
+        self.version = 0
+        edges = [(room, neighbor) for room, connections in graph.items() for neighbor in connections]
+        for (room, neighbor), length in zip(edges, self.geometry.lengths(edges)):
+            cost = graph[room][neighbor]
+            if length > 0 and cost / length < self.scale:
+                self.scale = cost / length
+        if self.scale == float('inf'):
+            self.scale = 0
+
+    def calibrate(self, a, b, cost):
+        """Lower the scale if edge a -> b is cheaper per pixel than any seen so far"""
+        length = self.pixel_distance(a, b)
+        if length > 0 and cost / length < self.scale:
+            self.scale = cost / length
+            self.version += 1
+
+    def pixel_distance(self, a, b):
+        x1, y1 = self.positions[a]
+        x2, y2 = self.positions[b]
+        return math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
+
+    def __call__(self, a, b):
+        return self.scale * self.pixel_distance(a, b)
+
+    def estimates_to(self, goal):
+        """Estimates from every room to goal in one call, as a list indexed by geometry node ID"""
+        return self.geometry.distances_to(goal, self.scale)
+
+    def update_edge(self, a, b, cost):
+        if cost is not None:
+            self.calibrate(a, b, cost)
+
+
+class LandmarkHeuristic:
+    """ALT heuristic from landmark distance tables; only cheaper or new edges force a rebuild"""
+
+    def __init__(self, graph, positions=None, num_landmarks=4):
+        self.graph = graph
+        self.num_landmarks = num_landmarks
+        self.euclidean = ScaledEuclideanHeuristic(graph, positions) if positions else None
+        self.version = 0
+        self.build()
+
+    def build(self):
+        """Pick landmarks by farthest-point selection and compute their distance tables"""
+        forward = ShortestPathIndex(self.graph, precompute=False)
+        reverse_graph = {room: {} for room in self.graph}
+        for room, connections in self.graph.items():
+            for neighbor, cost in connections.items():
+                reverse_graph[neighbor][room] = cost
+        backward = ShortestPathIndex(reverse_graph, precompute=False)
+
+        self.node_ids = forward.node_ids
+        self.built_costs = {(room, neighbor): cost for room, connections in self.graph.items()
+                            for neighbor, cost in connections.items()}
+        self.landmarks = []
+        self.from_landmark = []
+        self.to_landmark = []
+        nearest = [float('inf')] * len(forward.nodes)
+        candidate = forward.nodes[0] if forward.nodes else None
+
+        while candidate is not None and len(self.landmarks) < self.num_landmarks:
+            self.landmarks.append(candidate)
+            dist_from = forward.row(candidate)[0]
+            self.from_landmark.append(dist_from)
+            self.to_landmark.append(backward.row(candidate)[0])
+
+            nearest = [min(n, d) for n, d in zip(nearest, dist_from)]
+            reachable = [(d, i) for i, d in enumerate(nearest) if 0 < d < float('inf')]
+            candidate = forward.nodes[max(reachable)[1]] if reachable else None
+
+        self.dirty = False
+
+    def __call__(self, a, b):
+        if self.dirty:
+            self.build()
+        u, v = self.node_ids[a], self.node_ids[b]
+        best = self.euclidean(a, b) if self.euclidean else 0
+        for dist_from, dist_to in zip(self.from_landmark, self.to_landmark):
+            if dist_from[u] < float('inf'):
+                best = max(best, dist_from[v] - dist_from[u])
+            if dist_to[v] < float('inf'):
+                best = max(best, dist_to[u] - dist_to[v])
+        return best
+
+    def update_edge(self, a, b, cost):
+        """Rebuild lazily when an edge gets cheaper than in the tables; dearer or removed edges keep them valid"""
+        changed = False
+        if self.euclidean:
+            old_version = self.euclidean.version
+            self.euclidean.update_edge(a, b, cost)
+            changed = self.euclidean.version != old_version
+        if cost is not None and cost < self.built_costs.get((a, b), float('inf')):
+            self.dirty = True
+            changed = True
+        if changed:
+            self.version += 1
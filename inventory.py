@@ -0,0 +1,235 @@
+import itertools
+import json
+import os
+import threading
+
+from scheduling import NO_DEADLINE, DeliveryQueue
+
+
+class InventoryStore:
+    """Thread-safe medicine stock and pending orders, persisted with a write-ahead log and snapshots"""
+
+    def __init__(self, stock=None, data_dir=None, snapshot_every=10000, sync=False):
+        self.lock = threading.RLock()
+        self.stock = dict(stock or {})
+        self.orders = DeliveryQueue()
+        self.rooms_by_med = {}
+        self.meds_by_room = {}
+        self.held = {}  # (room, med) -> units held for an order queued elsewhere
+        self.data_dir = data_dir
+        self.snapshot_every = snapshot_every
+        self.sync = sync
+        self.seq = 0
+        self.since_snapshot = 0
+        self.log = None
+        if data_dir:
+            os.makedirs(data_dir, exist_ok=True)
+            self.recover()
+            self.log = open(self.log_path, "a")
+
+    @property
+    def log_path(self):
+        return os.path.join(self.data_dir, "inventory.wal")
+
+    @property
+    def snapshot_path(self):
+        return os.path.join(self.data_dir, "inventory.snapshot.json")
+
+    # Operations
+
+    def submit(self, room, med, qty, priority=None, deadline=None):
+        """Reserve stock and add (or merge) an order in one step"""
+        with self.lock:
+            self.apply_reserve(med, qty)
+            self.apply_add(room, med, qty, priority, deadline)
+            self.write({"op": "submit", "room": room, "med": med, "qty": qty,
+                        "priority": priority, "deadline": deadline})
+
+    def cancel(self, room, med):
+        """Remove an order and return its stock; returns (room, med, qty, priority, deadline)"""
+        with self.lock:
+            order = self.apply_remove(room, med)
+            self.stock[med] += order[2]
+            self.write({"op": "cancel", "room": room, "med": med})
+            return order
+
+    def complete(self, room, med, qty=None):
+        """Remove a delivered order, or qty units of it; its stock has left the pharmacy"""
+        with self.lock:
+            order = self.apply_complete(room, med, qty)
+            self.write({"op": "complete", "room": room, "med": med, "qty": qty})
+            return order
+
+    def reserve(self, med, qty):
+        """Take stock for an order handled outside the queue (e.g. a batch plan)"""
+        with self.lock:
+            self.apply_reserve(med, qty)
+            self.write({"op": "stock", "med": med, "qty": -qty})
+
+    def release(self, med, qty):
+        """Return previously reserved stock, or restock"""
+        with self.lock:
+            self.stock[med] = self.stock.get(med, 0) + qty
+            self.write({"op": "stock", "med": med, "qty": qty})
+
+    def hold(self, room, med, qty):
+        """Take stock for an order queued at another store and remember it under the order"""
+        with self.lock:
+            self.apply_reserve(med, qty)
+            self.apply_hold(room, med, qty)
+            self.write({"op": "hold", "room": room, "med": med, "qty": qty})
+
+    def unhold(self, room, med, qty, restock=True):
+        """Drop qty units of an order's hold, returning them to stock unless they were delivered"""
+        with self.lock:
+            self.apply_hold(room, med, -qty)
+            if restock:
+                self.stock[med] = self.stock.get(med, 0) + qty
+            self.write({"op": "unhold", "room": room, "med": med, "qty": qty, "restock": restock})
+
+    # Queries
+
+    def orders_for_room(self, room):
+        with self.lock:
+            meds = sorted(self.meds_by_room.get(room, ()), key=lambda med: self.orders.entries[(room, med)])
+            return [self.orders.get(room, med) for med in meds]
+
+    def rooms_for_medicine(self, med):
+        with self.lock:
+            return set(self.rooms_by_med.get(med, ()))
+
+    # State changes shared by live operations and log replay
+
+    def apply_reserve(self, med, qty):
+        if qty < 1:
+            raise ValueError("Quantity must be at least 1")
+        if qty > self.stock.get(med, 0):
+            raise ValueError(f"Not enough {med} in stock")
+        self.stock[med] -= qty
+
+    def apply_add(self, room, med, qty, priority, deadline, arrival=None):
+        self.orders.push(room, med, qty, priority, deadline, arrival)
+        self.rooms_by_med.setdefault(med, set()).add(room)
+        self.meds_by_room.setdefault(room, set()).add(med)
+
+    def apply_complete(self, room, med, qty):
+        order = self.orders.get(room, med)
+        if order is not None and qty is not None and qty < order[2]:
+            return self.orders.take(room, med, qty)
+        return self.apply_remove(room, med)
+
+    def apply_hold(self, room, med, qty):
+        held = self.held.get((room, med), 0) + qty
+        if held < 0:
+            raise ValueError(f"Only {held - qty} {med} held for {room}")
+        if held:
+            self.held[(room, med)] = held
+        else:
+            self.held.pop((room, med), None)
+
+    def apply_remove(self, room, med):
+        if (room, med) not in self.orders:
+            raise ValueError(f"No pending {med} for {room}")
+        order = self.orders.remove(room, med)
+        self.rooms_by_med[med].discard(room)
+        self.meds_by_room[room].discard(med)
+        return order
+
+    # Persistence
+
+    def write(self, record):
+        if self.log is None:
+            return
+        self.seq += 1
+        record["seq"] = self.seq
+        self.log.write(json.dumps(record) + "\n")
+        self.log.flush()
+        if self.sync:
+            os.fsync(self.log.fileno())
+        self.since_snapshot += 1
+        if self.since_snapshot >= self.snapshot_every:
+            self.snapshot()
+
+    def snapshot(self):
+        """Write the full state atomically and start a new log"""
+        with self.lock:
+            state = {
+                "seq": self.seq,
+                "stock": self.stock,
+                # Arrival numbers and the counter keep FIFO order within a priority across restarts
+                "orders": [[room, med, qty, priority, None if deadline == NO_DEADLINE else deadline, arrival]
+                           for priority, deadline, arrival, _, (room, med), qty in self.orders.ordered],
+                "counter": next(self.orders.counter),
+                "held": [[room, med, qty] for (room, med), qty in self.held.items()],
+            }
+            tmp = self.snapshot_path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(state, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.snapshot_path)
+            if self.log is not None:
+                self.log.close()
+            self.log = open(self.log_path, "w")
+            self.since_snapshot = 0
+
+    def recover(self):
+        """Load the latest snapshot and replay newer log records"""
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path) as f:
+                state = json.load(f)
+            self.seq = state["seq"]
+            self.stock = state["stock"]
+            if "counter" in state:
+                self.orders.counter = itertools.count(state["counter"])
+            for room, med, qty, priority, deadline, *arrival in state["orders"]:
+                self.apply_add(room, med, qty, priority, deadline, arrival[0] if arrival else None)
+            for room, med, qty in state.get("held", []):
+                self.apply_hold(room, med, qty)
+
+        if not os.path.exists(self.log_path):
+            return
+        good_end = 0
+        with open(self.log_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Torn write at the tail of the log
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                good_end += len(line)
+                if record["seq"] <= self.seq:
+                    continue
+                self.replay(record)
+                self.seq = record["seq"]
+                self.since_snapshot += 1
+        if good_end != os.path.getsize(self.log_path):
+            with open(self.log_path, "r+b") as f:
+                f.truncate(good_end)
+
+    def replay(self, record):
+        op = record["op"]
+        if op == "submit":
+            self.stock[record["med"]] -= record["qty"]
+            self.apply_add(record["room"], record["med"], record["qty"], record["priority"], record["deadline"])
+        elif op == "cancel":
+            order = self.apply_remove(record["room"], record["med"])
+            self.stock[record["med"]] += order[2]
+        elif op == "complete":
+            self.apply_complete(record["room"], record["med"], record.get("qty"))
+        elif op == "hold":
+            self.stock[record["med"]] -= record["qty"]
+            self.apply_hold(record["room"], record["med"], record["qty"])
+        elif op == "unhold":
+            self.apply_hold(record["room"], record["med"], -record["qty"])
+            if record["restock"]:
+                self.stock[record["med"]] = self.stock.get(record["med"], 0) + record["qty"]
+        elif op == "stock":
+            self.stock[record["med"]] = self.stock.get(record["med"], 0) + record["qty"]
+
+    def close(self):
+        with self.lock:
+            if self.log is not None:
+                self.log.close()
+                self.log = None
@@ -0,0 +1,189 @@
+import json
+import mmap
+import os
+import struct
+from array import array
+
+from floors import elevator_rides
+
+DEFAULT_LAYOUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "layouts", "hospital.json")
+
+# Cache file: header, then offsets (int64), weights and coordinates (float64),
+# targets (int32), newline-joined room names and a JSON metadata blob.
+MAGIC = b"HDLC"
+VERSION = 3
+HEADER = struct.Struct("<4sIqqqqqq")
+
+
+def read_layout_source(path):
+    """Parse a JSON or YAML layout into (room_positions, connections, emergency_exits, floors, cabinets)
+
+    The source has "rooms" (name -> [x, y]), "connections" (room -> {neighbor: cost})
+    and an optional "emergency_exits" mapping, mirroring the planner's dicts.
+    Optional "floors" (room -> floor number) and "elevators" (name -> {"stops":
+    {floor: room}, "wait", "per_floor"}) describe a multi-floor building; the
+    elevator rides are added to connections. Optional "cabinets" (room ->
+    {medicine: quantity}) are satellite medicine cabinets with their stock.
+    """
+    with open(path) as f:
+        if path.lower().endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("PyYAML is required to read YAML layouts") from None
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+
+    positions = {room: tuple(xy) for room, xy in data["rooms"].items()}
+    connections = {room: {} for room in positions}
+    for room, neighbors in data.get("connections", {}).items():
+        for neighbor, cost in neighbors.items():
+            if room not in positions or neighbor not in positions:
+                raise ValueError(f"Connection {room} -> {neighbor} uses an unknown room")
+            connections[room][neighbor] = cost
+    for room, neighbor, cost in elevator_rides(data.get("elevators", {})):
+        if room not in positions or neighbor not in positions:
+            raise ValueError(f"Elevator stop {room if room not in positions else neighbor} is an unknown room")
+        connections[room][neighbor] = cost
+
+    floors = data.get("floors", {})
+    if floors and set(floors) != set(positions):
+        raise ValueError("Floors must be given for every room or none")
+    cabinets = data.get("cabinets", {})
+    for room in cabinets:
+        if room not in positions:
+            raise ValueError(f"Cabinet {room} is an unknown room")
+    return positions, connections, data.get("emergency_exits", {}), floors, cabinets
+
+
+class CompiledLayout:
+    """Hospital graph as CSR arrays; node i's edges are targets[offsets[i]:offsets[i+1]]"""
+
+    def __init__(self, names, offsets, targets, weights, xs, ys, emergency_exits, floors=None, cabinets=None,
+                 buffer=None):
+        self.names = names
+        self.node_ids = {name: i for i, name in enumerate(names)}
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.xs = xs
+        self.ys = ys
+        self.emergency_exits = emergency_exits
+        self.floors = floors or {}
+        self.cabinets = cabinets or {}
+        self.buffer = buffer  # Keeps the memory map alive while the views are in use
+
+    @classmethod
+    def compile(cls, positions, connections, emergency_exits=None, floors=None, cabinets=None):
+        """Intern room names and pack the adjacency dicts into CSR arrays"""
+        names = list(positions)
+        node_ids = {name: i for i, name in enumerate(names)}
+        offsets, targets, weights = array('q', [0]), array('i'), array('d')
+        for name in names:
+            for neighbor, cost in connections.get(name, {}).items():
+                targets.append(node_ids[neighbor])
+                weights.append(cost)
+            offsets.append(len(targets))
+        xs = array('d', (positions[name][0] for name in names))
+        ys = array('d', (positions[name][1] for name in names))
+        return cls(names, offsets, targets, weights, xs, ys, dict(emergency_exits or {}), dict(floors or {}),
+                   dict(cabinets or {}))
+
+    def room_positions(self):
+        return {name: (self.xs[i], self.ys[i]) for i, name in enumerate(self.names)}
+
+    def connections(self):
+        """Materialize the dict-of-dicts graph used by the planner"""
+        names, targets, weights, offsets = self.names, self.targets, self.weights, self.offsets
+        graph = {}
+        for i, name in enumerate(names):
+            start, end = offsets[i], offsets[i + 1]
+            graph[name] = {names[targets[k]]: _number(weights[k]) for k in range(start, end)}
+        return graph
+
+    def save(self, path, source_stat=None):
+        """Write the binary cache, stamped with the source file's mtime and size"""
+        mtime, size = (source_stat.st_mtime_ns, source_stat.st_size) if source_stat else (0, 0)
+        names_blob = "\n".join(self.names).encode("utf-8")
+        meta_blob = json.dumps({"emergency_exits": self.emergency_exits, "floors": self.floors,
+                                "cabinets": self.cabinets}).encode("utf-8")
+        n, m = len(self.names), len(self.targets)
+        header = HEADER.pack(MAGIC, VERSION, mtime, size, n, m, len(names_blob), len(meta_blob))
+
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(header)
+            for arr in (array('q', self.offsets), array('d', self.weights),
+                        array('d', self.xs), array('d', self.ys), array('i', self.targets)):
+                arr.tofile(f)
+            f.write(names_blob)
+            f.write(meta_blob)
+        os.replace(tmp, path)
+
+    @classmethod
+    def open(cls, path, source_stat=None):
+        """Memory-map a cache file; return None if it is missing, stale or unreadable"""
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return None
+        with f:
+            try:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                return None  # Empty file
+
+        if len(buffer) < HEADER.size:
+            return None
+        magic, version, mtime, size, n, m, names_len, meta_len = HEADER.unpack_from(buffer)
+        if magic != MAGIC or version != VERSION:
+            return None
+        if source_stat and (mtime, size) != (source_stat.st_mtime_ns, source_stat.st_size):
+            return None
+
+        view = memoryview(buffer)
+        pos = HEADER.size
+
+        def section(fmt, count):
+            nonlocal pos
+            nbytes = count * struct.calcsize(fmt)
+            part = view[pos:pos + nbytes].cast(fmt)
+            pos += nbytes
+            return part
+
+        offsets = section('q', n + 1)
+        weights = section('d', m)
+        xs = section('d', n)
+        ys = section('d', n)
+        targets = section('i', m)
+        names = bytes(view[pos:pos + names_len]).decode("utf-8").split("\n") if n else []
+        pos += names_len
+        meta = json.loads(bytes(view[pos:pos + meta_len]))
+        return cls(names, offsets, targets, weights, xs, ys, meta["emergency_exits"], meta["floors"],
+                   meta["cabinets"], buffer)
+
+
+def _number(value):
+    """Return whole-number weights as ints so labels and costs look like the source"""
+    return int(value) if value == int(value) else value
+
+
+def cache_path(source):
+    return source + ".cache"
+
+
+def load_layout(source=DEFAULT_LAYOUT, use_cache=True):
+    """Load a compiled layout, recompiling the cache only when the source changed"""
+    if not use_cache:
+        return CompiledLayout.compile(*read_layout_source(source))
+
+    source_stat = os.stat(source)
+    layout = CompiledLayout.open(cache_path(source), source_stat)
+    if layout is None:
+        layout = CompiledLayout.compile(*read_layout_source(source))
+        try:
+            layout.save(cache_path(source), source_stat)
+        except OSError:
+            pass  # Read-only install; fall back to compiling every launch
+    return layout
@@ -0,0 +1,93 @@
+import heapq
+
+
+class ShortestPathIndex:
+    """Shortest-path distance and next-hop table over an integer-indexed graph"""
+
+    def __init__(self, graph, precompute=True):
+        self.nodes = list(graph.keys())
+        self.node_ids = {node: i for i, node in enumerate(self.nodes)}
+        self.adjacency = [[] for _ in self.nodes]
+        for node, connections in graph.items():
+            self.adjacency[self.node_ids[node]] = [
+                (self.node_ids[neighbor], cost) for neighbor, cost in connections.items()
+            ]
+
+        # source id -> (distance list, parent list) of its shortest-path tree
+        self.rows = {}
+        if precompute:
+            self.precompute()
+
+    def precompute(self):
+        """Build the full table with one Dijkstra per source"""
+        for source in range(len(self.nodes)):
+            if source not in self.rows:
+                self.rows[source] = self.dijkstra(source)
+
+    def dijkstra(self, source):
+        """Single-source Dijkstra returning distance and parent arrays"""
+        dist = [float('inf')] * len(self.nodes)
+        parent = [-1] * len(self.nodes)
+        dist[source] = 0
+        heap = [(0, source)]
+
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for v, cost in self.adjacency[u]:
+                nd = d + cost
+                if nd < dist[v]:
+                    dist[v] = nd
+                    parent[v] = u
+                    heapq.heappush(heap, (nd, v))
+
+        return dist, parent
+
+    def row(self, source):
+        """Return the (distance, parent) row for a source node, computing it if needed"""
+        s = self.node_ids[source]
+        if s not in self.rows:
+            self.rows[s] = self.dijkstra(s)
+        return self.rows[s]
+
+    def distance(self, start, goal):
+        """Shortest weighted distance between two rooms"""
+        return self.row(start)[0][self.node_ids[goal]]
+
+    def table(self, sources, targets):
+        """Many-to-many distances as a list of rows, one per source"""
+        target_ids = [self.node_ids[t] for t in targets]
+        return [[self.row(s)[0][t] for t in target_ids] for s in sources]
+
+    def path(self, start, goal):
+        """Reconstruct the shortest path between two rooms in O(path length)"""
+        dist, parent = self.row(start)
+        t = self.node_ids[goal]
+        if dist[t] == float('inf'):
+            return []
+
+        path = []
+        while t != -1:
+            path.append(self.nodes[t])
+            t = parent[t]
+        return path[::-1]
+
+    def update_edge(self, a, b, cost):
+        """Change the weight of edge a -> b (None removes it) and drop only the affected rows"""
+        u, v = self.node_ids[a], self.node_ids[b]
+        edges = [(n, c) for n, c in self.adjacency[u] if n != v]
+        old_cost = next((c for n, c in self.adjacency[u] if n == v), None)
+        if cost is not None:
+            edges.append((v, cost))
+        self.adjacency[u] = edges
+
+        for source, (dist, parent) in list(self.rows.items()):
+            if dist[u] == float('inf'):
+                continue
+            # A cheaper edge only matters if it improves v; a dearer or removed
+            # edge only matters if the tree actually routes through it.
+            improves = cost is not None and dist[u] + cost < dist[v]
+            breaks = old_cost is not None and parent[v] == u and (cost is None or cost > old_cost)
+            if improves or breaks:
+                del self.rows[source]
@@ -0,0 +1,518 @@
+import heapq
+import time
+from collections import defaultdict
+
+from contraction import ContractionHierarchy
+from depots import DepotPlanner
+from evacuation import EvacuationField
+from floors import HierarchicalRouter
+from geometry import RoomGeometry
+from heuristics import LandmarkHeuristic, ScaledEuclideanHeuristic
+from inventory import InventoryStore
+from layout import DEFAULT_LAYOUT, load_layout
+from pathindex import ShortestPathIndex
+from replanning import DStarLite
+from routecache import RouteCache
+from route_solver import AutoSolver
+from scheduling import NO_DEADLINE, TimeWindowScheduler
+from telemetry import Telemetry
+
+# Above this many rooms the all-pairs table costs seconds and tens of MB up
+# front, so rows are only computed when a query needs them
+PRECOMPUTE_ROOMS = 200
+
+
+class HospitalPlanner:
+    """GUI-free routing, inventory and emergency logic for the delivery system"""
+
+    def __init__(self, room_positions=None, hospital=None, medicines=None, emergency_exits=None,
+                 precompute_paths=None, data_dir=None, floors=None, contraction=False, cabinets=None,
+                 cart_capacity=20):
+        if hospital is None:
+            layout = load_layout()
+            room_positions, hospital = layout.room_positions(), layout.connections()
+            emergency_exits = emergency_exits or layout.emergency_exits
+            floors = floors or layout.floors
+            cabinets = cabinets or layout.cabinets
+        self.room_positions = room_positions
+        self.geometry = RoomGeometry(room_positions)
+        
+        # Hospital layout graph; routes come from a contraction hierarchy when
+        # asked for, or with a floor for every room through the per-floor
+        # tables and the portal graph between floors
+        self.hospital = hospital
+        self.floors = dict(floors or {})
+        if contraction:
+            self.path_index = ContractionHierarchy(self.hospital)
+        elif self.floors:
+            self.path_index = HierarchicalRouter(self.hospital, self.floors)
+        else:
+            if precompute_paths is None:
+                precompute_paths = len(self.hospital) <= PRECOMPUTE_ROOMS
+            self.path_index = ShortestPathIndex(self.hospital, precompute=precompute_paths)
+        self.route_solver = AutoSolver()
+        self.route_cache = RouteCache()
+        self.route_cost = 0
+        self.heuristic_model = ScaledEuclideanHeuristic(self.hospital, self.room_positions, self.geometry)
+        self.nodes_expanded = 0
+        
+        # Medicine inventory and pending orders, persisted when data_dir is given
+        medicines = medicines if medicines is not None else {
+            "Paracetamol": 100, "Ibuprofen": 80, "Amoxicillin": 60,
+            "Omeprazole": 75, "Loratadine": 50, "Morphine": 30,
+            "Insulin": 40, "Chemotherapy Drugs": 20, "Pediatric Antibiotics": 45
+        }
+        self.inventory = InventoryStore(medicines, data_dir=data_dir)
+        self.medicines = self.inventory.stock
+        
+        # Satellite medicine cabinets: tours then pick stock up on the way,
+        # restocking whenever the cart of cart_capacity units runs low
+        self.depots = DepotPlanner(self, cabinets, cart_capacity, data_dir=data_dir) if cabinets else None
+        self.depot_stops = []
+        
+        # Delivery system state
+        self.delivery_queue = self.inventory.orders
+        self.scheduler = TimeWindowScheduler()
+        self.late_rooms = []
+        self.current_path = []
+        self.current_delivery_index = 0
+        self.delivery_in_progress = False
+        
+        # Remaining tour: stop rooms, the path of each leg between them and the
+        # incremental search for the leg the cart is on
+        self.route_stops = []
+        self.route_legs = []
+        self.next_stop_index = 0
+        self.leg_search = None
+        self.replan_heuristic = None
+        self.closed_corridors = {}
+        self.replan_times = []
+        self.emergency_activated = False
+        
+        # Emergency exits mapping and the precomputed route to the nearest one
+        self.emergency_exits = dict(emergency_exits or {})
+        self.evacuation = EvacuationField(self.hospital, self.emergency_exits.values())
+        
+        # Called as hook(a, b, cost) after every corridor weight change (cost None: closed)
+        self.edge_hooks = []
+        
+        # Planning latencies, order and emergency counters, queue and cart gauges
+        self.telemetry = Telemetry()
+        self.created = time.perf_counter()
+        self.busy_time = 0
+        self.busy_since = None
+        self.telemetry.set_gauge("queue_depth", lambda: len(self.delivery_queue))
+        self.telemetry.set_gauge("out_of_stock_medicines", lambda: sum(1 for q in self.medicines.values() if q <= 0))
+        self.telemetry.set_gauge("cart_utilization", self.cart_utilization)
+
+    @classmethod
+    def from_layout(cls, path=DEFAULT_LAYOUT, use_cache=True, **kwargs):
+        """Build a planner from a layout file, using its compiled cache when up to date"""
+        layout = load_layout(path, use_cache)
+        kwargs.setdefault("emergency_exits", layout.emergency_exits)
+        kwargs.setdefault("floors", layout.floors)
+        kwargs.setdefault("cabinets", layout.cabinets)
+        return cls(layout.room_positions(), layout.connections(), **kwargs)
+
+    @property
+    def current_room(self):
+        """Room the cart is currently at, or None when idle"""
+        if self.current_path and self.current_delivery_index < len(self.current_path):
+            return self.current_path[self.current_delivery_index]
+        return None
+
+    @property
+    def deliveries(self):
+        """Pending deliveries as (room, med, qty), most urgent first"""
+        return [order[:3] for order in self.delivery_queue.items()]
+
+    def add_delivery(self, room, med, qty, priority=None, deadline=None):
+        """Add a delivery, merging it with an existing one for the same room and medicine
+
+        priority is a level from scheduling.PRIORITIES (defaults by room type) and
+        deadline an optional latest arrival, in edge-cost units after departure.
+        """
+        if self.delivery_in_progress:
+            raise ValueError("Cannot add during active delivery")
+        if not room:
+            raise ValueError("Please select a room")
+        if room not in self.hospital:
+            raise ValueError(f"Unknown room {room}")
+        if med not in self.medicines:
+            raise ValueError(f"Unknown medicine {med}")
+        if deadline is not None and deadline < 0:
+            raise ValueError("Deadline cannot be negative")
+        
+        self.inventory.submit(room, med, qty, priority, deadline)
+        self.telemetry.increment("orders_added")
+        if self.medicines[med] <= 0:
+            self.telemetry.increment("stock_depletions")
+
+    def remove_delivery(self, index):
+        """Remove a delivery by list index and return its stock"""
+        if self.delivery_in_progress:
+            raise ValueError("Cannot remove during active delivery")
+        room, med = self.delivery_queue.items()[index][:2]
+        room, med, qty, _, _ = self.inventory.cancel(room, med)
+        if self.depots is not None:
+            self.depots.unsource(room, med)
+        self.telemetry.increment("orders_removed")
+        return room, med, qty
+
+    def complete_delivery(self, room, med, qty=None):
+        """Take a delivered order (or qty units of it) off the queue and return the part taken"""
+        order = self.delivery_queue.get(room, med)
+        if self.depots is not None and (qty is None or order is None or qty >= order[2]):
+            self.depots.forget(room, med)
+        return self.inventory.complete(room, med, qty)
+
+    def deliveries_to(self, room):
+        """Deliveries addressed to a room"""
+        return [order[:3] for order in self.inventory.orders_for_room(room)]
+
+    def start_delivery(self, start="Pharmacy"):
+        """Plan the round trip through all delivery rooms and return the route
+
+        When orders differ in priority or carry deadlines, the time-window
+        scheduler serves urgent rooms first; otherwise the route solver finds
+        the shortest tour. With medicine cabinets the depot planner fits
+        pickup and restock stops into the route.
+        """
+        if not self.delivery_queue:
+            raise ValueError("No deliveries in the list")
+        
+        # One stop per room, with the tightest priority and deadline of its orders
+        stops = {}
+        for room, _, _, priority, deadline in self.delivery_queue.items():
+            p, d = stops.get(room, (priority, deadline))
+            stops[room] = (min(p, priority), min(d, deadline))
+        
+        self.late_rooms = []
+        windows = set(stops.values())
+        if len({p for p, _ in windows}) > 1 or any(d != NO_DEADLINE for _, d in windows):
+            stops = [(room, p, d) for room, (p, d) in stops.items()]
+            if self.depots is not None:
+                self.current_path = self.depot_path(start, stops)
+            else:
+                self.route_cost, self.current_path, self.late_rooms = self.schedule_path(start, stops)
+        elif self.depots is not None:
+            self.current_path = self.depot_path(start)
+        else:
+            self.current_path = self.find_optimal_path(start, list(stops))
+        
+        self.delivery_in_progress = True
+        self.emergency_activated = False
+        if self.busy_since is None:
+            self.busy_since = time.perf_counter()
+        self.telemetry.increment("deliveries_started")
+        self.current_delivery_index = 0
+        self.next_stop_index = 1
+        self.pass_reached_stops()
+        self.leg_search = None
+        return self.current_path
+
+    def depot_path(self, start, stops=None):
+        """Route the queued orders through cabinet pickups and move their stock holdings to match
+
+        With (room, priority, deadline) stops the rooms keep the time-window
+        scheduler's order, and a room is late if any delivery to it on the
+        final route, pickup detours included, arrives after its deadline.
+        When one cart load carries every order, the rooms keep the order of
+        the route solver's (cached) tour. Raises ValueError, changing nothing,
+        if some order cannot be served from any depot.
+        """
+        started = time.perf_counter()
+        orders = self.deliveries
+        sequence = None
+        if stops is not None:
+            _, order, _, _ = self.scheduler.schedule(start, stops, self.path_index.distance,
+                                                     self.path_index.table)
+            sequence = order[1:-1]
+        elif self.depots.one_load(orders, reserved=True):
+            rooms = list(dict.fromkeys(order[0] for order in orders))
+            _, order = self.route_cache.solve(self.route_solver, start, rooms, self.path_index.distance,
+                                              self.path_index.table)
+            sequence = order[1:-1]
+        plan = self.depots.plan(orders, reserved=True, start=start, sequence=sequence)
+        if plan["unserved"]:
+            room, med, qty = plan["unserved"][0]
+            raise ValueError(f"Not enough {med} at any depot for {room} ({qty} short)")
+        self.depots.commit(plan, reserved=True)
+        self.depot_stops = plan["stops"]
+        self.route_cost = plan["cost"]
+        if stops is not None:
+            self.late_rooms = self.late_deliveries(start, plan["stops"], {stop[0]: stop[2] for stop in stops})
+        path = self.expand_route(plan["visits"])
+        self.telemetry.observe("plan", time.perf_counter() - started)
+        return path
+
+    def late_deliveries(self, start, depot_stops, deadlines):
+        """Rooms with a delivery among the depot stops that arrives after the room's deadline"""
+        late = []
+        t, at = -self.scheduler.service_time, start  # No service time is spent at the start
+        for room, kind, _ in depot_stops:
+            if room != at:
+                t += self.scheduler.service_time + self.path_index.distance(at, room)
+                at = room
+            if kind == "deliver" and max(t, 0) > deadlines[room] and room not in late:
+                late.append(room)
+        return late
+
+    def schedule_path(self, start, stops):
+        """Time-window route through (room, priority, deadline) stops; returns (cost, path, late rooms)"""
+        started = time.perf_counter()
+        cost, order, _, late = self.scheduler.schedule(start, stops, self.path_index.distance,
+                                                       self.path_index.table)
+        path = self.expand_route(order)
+        self.telemetry.observe("plan", time.perf_counter() - started)
+        return cost, path, late
+
+    def next_step(self):
+        """Advance one room along the current path; return the new room or None at the end"""
+        if self.current_delivery_index < len(self.current_path) - 1:
+            self.current_delivery_index += 1
+            room = self.current_path[self.current_delivery_index]
+            self.pass_reached_stops()
+            return room
+        return None
+
+    def pass_reached_stops(self):
+        """Count the next stops as reached while they are the cart's room (e.g. deliveries to the start)"""
+        room = self.current_room
+        while self.next_stop_index < len(self.route_stops) and self.route_stops[self.next_stop_index] == room:
+            self.next_stop_index += 1
+
+    def reset_delivery(self):
+        """Reset delivery state"""
+        if self.busy_since is not None:
+            self.busy_time += time.perf_counter() - self.busy_since
+            self.busy_since = None
+        self.delivery_in_progress = False
+        self.current_path = []
+        self.current_delivery_index = 0
+        self.route_stops = []
+        self.route_legs = []
+        self.leg_search = None
+
+    def activate_emergency(self):
+        """Reroute the cart from its current room to the emergency exit and return the path"""
+        if not self.delivery_in_progress:
+            raise ValueError("No active delivery to interrupt")
+            
+        current_room = self.current_room
+        
+        # Nearest exit from the precomputed evacuation field
+        path = self.evacuation.path(current_room)
+        if not path:
+            raise ValueError("No path to emergency exit!")
+        exit_room = path[-1]
+            
+        self.emergency_activated = True
+        self.telemetry.increment("emergency_activations")
+        self.current_path = path
+        self.current_delivery_index = 0
+        self.route_stops = [current_room, exit_room]
+        self.route_legs = [path]
+        self.next_stop_index = 1
+        self.leg_search = None
+        return path
+
+    def a_star_search(self, start, goal):
+        """A* pathfinding algorithm"""
+        started = time.perf_counter()
+        open_set = []
+        heapq.heappush(open_set, (0, start))
+        came_from = {}
+        g_score = defaultdict(lambda: float('inf'))
+        g_score[start] = 0
+        f_score = defaultdict(lambda: float('inf'))
+        f_score[start] = self.heuristic(start, goal)
+        
+        while open_set:
+            current_f, current = heapq.heappop(open_set)
+            if current_f > f_score[current]:
+                continue  # Stale heap entry
+            self.nodes_expanded += 1
+            
+            if current == goal:
+                path = []
+                while current in came_from:
+                    path.append(current)
+                    current = came_from[current]
+                path.append(start)
+                self.telemetry.observe("a_star", time.perf_counter() - started)
+                return (g_score[goal], path[::-1])
+            
+            for neighbor, cost in self.hospital[current].items():
+                tentative_g = g_score[current] + cost
+                if tentative_g < g_score[neighbor]:
+                    came_from[neighbor] = current
+                    g_score[neighbor] = tentative_g
+                    f_score[neighbor] = tentative_g + self.heuristic(neighbor, goal)
+                    heapq.heappush(open_set, (f_score[neighbor], neighbor))
+        
+        self.telemetry.observe("a_star", time.perf_counter() - started)
+        return (float('inf'), [])
+
+    def set_edge_weight(self, a, b, cost):
+        """Change a corridor weight and refresh the affected shortest-path rows"""
+        if cost is None:
+            self.hospital[a].pop(b, None)
+        else:
+            self.hospital[a][b] = cost
+        self.path_index.update_edge(a, b, cost)
+        self.route_cache.invalidate()
+        self.heuristic_model.update_edge(a, b, cost)
+        self.evacuation.update_edge(a, b, cost)
+        if self.replan_heuristic is not None:
+            self.replan_heuristic.update_edge(a, b, cost)
+        if self.leg_search is not None:
+            self.leg_search.move_to(self.current_room)
+            self.leg_search.update_edge(a, b, cost)
+        for hook in self.edge_hooks:
+            hook(a, b, cost)
+
+    def add_emergency_exit(self, name, room):
+        """Register an emergency exit and extend the evacuation field to it"""
+        if room not in self.hospital:
+            raise ValueError(f"Unknown room {room}")
+        old = self.emergency_exits.get(name)
+        self.emergency_exits[name] = room
+        self.evacuation.add_exit(room)
+        if old is not None and old not in self.emergency_exits.values():
+            self.evacuation.remove_exit(old)
+
+    def remove_emergency_exit(self, name):
+        """Unregister an emergency exit; rooms that used it switch to their next nearest exit"""
+        room = self.emergency_exits.pop(name)
+        if room not in self.emergency_exits.values():
+            self.evacuation.remove_exit(room)
+        return room
+
+    def close_corridor(self, a, b, both_ways=True):
+        """Block a corridor and reroute the active delivery around it"""
+        changes = [(a, b), (b, a)] if both_ways else [(a, b)]
+        weights = {(u, v): self.hospital[u][v] for u, v in changes if v in self.hospital[u]}
+        if not weights:
+            raise ValueError(f"No open corridor between {a} and {b}")
+        path = self.change_corridors({edge: None for edge in weights})
+        self.closed_corridors.update(weights)
+        return path
+
+    def reopen_corridor(self, a, b):
+        """Restore a closed corridor with its previous weight(s)"""
+        changes = [(u, v) for u, v in ((a, b), (b, a)) if (u, v) in self.closed_corridors]
+        if not changes:
+            raise ValueError(f"Corridor between {a} and {b} is not closed")
+        path = self.change_corridors({edge: self.closed_corridors[edge] for edge in changes})
+        for edge in changes:
+            del self.closed_corridors[edge]
+        return path
+
+    def set_corridor_weight(self, a, b, cost, both_ways=True):
+        """Re-weight a corridor, e.g. for congestion, and reroute the active delivery"""
+        if cost is None or cost < 0:
+            raise ValueError("Corridor weight must be a non-negative number")
+        changes = [(a, b), (b, a)] if both_ways else [(a, b)]
+        return self.change_corridors({edge: cost for edge in changes})
+
+    def change_corridors(self, weights):
+        """Set (u, v) -> cost corridor weights (None closes) and reroute; restores them if rerouting fails"""
+        old = {(u, v): self.hospital[u].get(v) for u, v in weights}
+        improved = any(cost is not None and (old[edge] is None or cost < old[edge])
+                       for edge, cost in weights.items())
+        for (u, v), cost in weights.items():
+            self.set_edge_weight(u, v, cost)
+        try:
+            return self.replan(weights, improved)
+        except ValueError:
+            for (u, v), cost in old.items():
+                self.set_edge_weight(u, v, cost)
+            raise
+
+    def replan(self, changed=(), improved=False):
+        """Reroute the active delivery from the cart's room after corridor changes
+
+        The leg to the next stop is repaired incrementally with D* Lite. Later
+        legs are searched again (A*) if they use one of the changed corridors,
+        or all of them if improved (a corridor got cheaper or reopened), since
+        a shorter route may then exist anywhere. Returns the new path
+        (unchanged when no delivery is active); raises ValueError without
+        changing the route if a stop cannot be reached.
+        """
+        if not self.delivery_in_progress or self.next_stop_index >= len(self.route_stops):
+            return self.current_path
+        started = time.perf_counter()
+        current = self.current_room
+        goal = self.route_stops[self.next_stop_index]
+        
+        if self.replan_heuristic is None:
+            # Landmark bounds survive closures and congestion, so one table serves every replan
+            self.replan_heuristic = LandmarkHeuristic(self.hospital, self.room_positions)
+        if self.leg_search is None or self.leg_search.goal != goal:
+            self.leg_search = DStarLite(self.hospital, self.replan_heuristic, current, goal)
+        else:
+            self.leg_search.move_to(current)
+        leg = self.leg_search.path() or self.a_star_search(current, goal)[1]
+        if not leg:
+            raise ValueError(f"No open route from {current} to {goal}")
+        
+        changed = set(changed)
+        legs = list(self.route_legs)
+        path = self.current_path[:self.current_delivery_index] + leg
+        for i in range(self.next_stop_index, len(self.route_stops) - 1):
+            old = legs[i]
+            if improved or changed.intersection(zip(old, old[1:])) or not old:
+                a, b = self.route_stops[i], self.route_stops[i + 1]
+                legs[i] = self.a_star_search(a, b)[1]
+                if not legs[i]:
+                    raise ValueError(f"No open route from {a} to {b}")
+            path += legs[i][1:]
+        legs[self.next_stop_index - 1] = leg
+        
+        self.route_legs = legs
+        self.current_path = path
+        self.replan_times.append(time.perf_counter() - started)
+        return path
+
+    def cart_utilization(self):
+        """Share of the planner's lifetime the cart has spent on deliveries"""
+        busy = self.busy_time
+        if self.busy_since is not None:
+            busy += time.perf_counter() - self.busy_since
+        uptime = time.perf_counter() - self.created
+        return busy / uptime if uptime > 0 else 0
+
+    def heuristic(self, a, b):
+        """Admissible distance estimate from the configured heuristic model"""
+        return self.heuristic_model(a, b)
+
+    def find_optimal_path(self, start, targets, solver=None):
+        """Find the cheapest round trip through all targets with the configured route solver
+
+        Tours from the configured solver go through the route cache; passing
+        a solver bypasses it.
+        """
+        if not targets:
+            self.route_cost = 0
+            return self.expand_route([start])
+            
+        started = time.perf_counter()
+        if solver is None:
+            self.route_cost, order = self.route_cache.solve(self.route_solver, start, targets,
+                                                            self.path_index.distance, self.path_index.table)
+        else:
+            self.route_cost, order = solver.solve(start, targets, self.path_index.distance,
+                                                  self.path_index.table)
+        path = self.expand_route(order)
+        self.telemetry.observe("plan", time.perf_counter() - started)
+        return path
+
+    def expand_route(self, order):
+        """Expand a visiting order into the full room-by-room path, keeping each leg for rerouting"""
+        self.route_stops = list(order)
+        self.route_legs = [self.path_index.path(a, b) for a, b in zip(order, order[1:])]
+        path = [order[0]]
+        for leg in self.route_legs:
+            path += leg[1:]  # Skip current node
+        return path
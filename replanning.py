@@ -0,0 +1,112 @@
+import heapq
+
+
+class DStarLite:
+    """D* Lite search from a moving cart to a fixed goal over the live graph dict"""
+
+    def __init__(self, graph, heuristic, start, goal):
+        self.graph = graph
+        self.pred = {room: {} for room in graph}
+        for room, connections in graph.items():
+            for neighbor, cost in connections.items():
+                self.pred[neighbor][room] = cost
+        self.heuristic = heuristic
+        self.start = start
+        self.last = start
+        self.goal = goal
+        self.reset()
+
+    def reset(self):
+        self.heuristic_version = getattr(self.heuristic, "version", None)
+        self.h_cache = {}
+        self.km = 0
+        self.g = {}
+        self.rhs = {self.goal: 0}
+        self.heap = []
+        self.queued = {}
+        self.nodes_expanded = 0
+        self.push(self.goal)
+
+    def key(self, s):
+        m = min(self.g.get(s, float('inf')), self.rhs.get(s, float('inf')))
+        h = self.h_cache.get(s)
+        if h is None:
+            h = self.h_cache[s] = self.heuristic(self.start, s)
+        return (m + h + self.km, m)
+
+    def push(self, s):
+        k = self.key(s)
+        self.queued[s] = k
+        heapq.heappush(self.heap, (k, s))
+
+    def update_vertex(self, u):
+        if u != self.goal:
+            self.rhs[u] = min((cost + self.g.get(v, float('inf')) for v, cost in self.graph[u].items()),
+                              default=float('inf'))
+        if self.g.get(u, float('inf')) != self.rhs.get(u, float('inf')):
+            self.push(u)
+        else:
+            self.queued.pop(u, None)
+
+    def compute(self):
+        """Expand inconsistent vertices until the cart's goal distance is settled"""
+        inf = float('inf')
+        if getattr(self.heuristic, "version", None) != self.heuristic_version:
+            self.reset()
+        while self.heap:
+            k_old, u = self.heap[0]
+            if self.queued.get(u) != k_old:
+                heapq.heappop(self.heap)  # Stale entry
+                continue
+            start_rhs = self.rhs.get(self.start, inf)
+            if not (k_old < self.key(self.start) or start_rhs != self.g.get(self.start, inf)):
+                break
+
+            heapq.heappop(self.heap)
+            del self.queued[u]
+            self.nodes_expanded += 1
+            k_new = self.key(u)
+            if k_old < k_new:
+                self.queued[u] = k_new
+                heapq.heappush(self.heap, (k_new, u))
+            elif self.g.get(u, inf) > self.rhs.get(u, inf):
+                self.g[u] = self.rhs[u]
+                for p in self.pred[u]:
+                    self.update_vertex(p)
+            else:
+                self.g[u] = inf
+                for p in list(self.pred[u]) + [u]:
+                    self.update_vertex(p)
+
+    def move_to(self, room):
+        """Record that the cart moved; keys already queued stay valid via km"""
+        if room != self.start:
+            self.km += self.heuristic(self.last, room)
+            self.last = self.start = room
+            self.h_cache = {}
+
+    def update_edge(self, a, b, cost):
+        """Re-evaluate room a after its corridor to b changed; compute() then repairs the path"""
+        if cost is None:
+            self.pred[b].pop(a, None)
+        else:
+            self.pred[b][a] = cost
+        self.update_vertex(a)
+
+    def distance(self):
+        self.compute()
+        return self.g.get(self.start, float('inf'))
+
+    def path(self):
+        """Current shortest path from the cart to the goal, or [] if unreachable"""
+        if self.distance() == float('inf'):
+            return []
+        path = [self.start]
+        current = self.start
+        while current != self.goal:
+            if len(path) > len(self.graph):
+                return []  # Not settled along this route; callers fall back to a full search
+            current = min(self.graph[current].items(),
+                          key=lambda item: item[1] + self.g.get(item[0], float('inf')))[0]
+            path.append(current)
+        return path
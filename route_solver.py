@@ -0,0 +1,184 @@
+import time
+
+
+class RouteSolver:
+    """Base class for multi-stop tour engines"""
+
+    name = "base"
+
+    def solve(self, start, targets, distance, table=None):
+        """(cost, [start, stop, ..., start]) through targets; table(sources, targets) is an optional batch distance"""
+        nodes = [start] + list(targets)
+        d = distance_matrix(nodes, distance, table)
+        order = self.solve_matrix(d)
+        return tour_cost(d, order), [nodes[i] for i in [0] + order + [0]]
+
+    def solve_matrix(self, d):
+        """Return the visiting order of stop indices 1..n-1 for distance matrix d"""
+        raise NotImplementedError
+
+
+def distance_matrix(nodes, distance, table=None):
+    """Pairwise distances between nodes, from one table(sources, targets) query when given"""
+    if table is None:
+        return [[distance(a, b) if a != b else 0 for b in nodes] for a in nodes]
+    d = table(nodes, nodes)
+    for i in range(len(nodes)):
+        d[i][i] = 0
+    return d
+
+
+def tour_cost(d, order):
+    """Weighted cost of leaving index 0, visiting order and returning to 0"""
+    tour = [0] + order + [0]
+    return sum(d[tour[i]][tour[i + 1]] for i in range(len(tour) - 1))
+
+
+class NearestNeighbourSolver(RouteSolver):
+    """Greedy tour that always moves to the closest unvisited stop by weighted distance"""
+
+    name = "nearest"
+
+    def solve_matrix(self, d):
+        unvisited = set(range(1, len(d)))
+        order = []
+        current = 0
+        while unvisited:
+            nearest = min(unvisited, key=lambda x: (d[current][x], x))
+            order.append(nearest)
+            unvisited.remove(nearest)
+            current = nearest
+        return order
+
+
+class HeldKarpSolver(RouteSolver):
+    """Exact bitmask dynamic programming, O(2^n * n^2) for n stops"""
+
+    name = "held-karp"
+
+    def solve_matrix(self, d):
+        n = len(d) - 1
+        if n == 0:
+            return []
+
+        full = 1 << n
+        inf = float('inf')
+        # cost[mask][j]: cheapest path from the start covering mask and ending at stop j
+        cost = [[inf] * n for _ in range(full)]
+        parent = [[-1] * n for _ in range(full)]
+        for j in range(n):
+            cost[1 << j][j] = d[0][j + 1]
+
+        for mask in range(1, full):
+            row = cost[mask]
+            for j in range(n):
+                c = row[j]
+                if c == inf:
+                    continue
+                dj = d[j + 1]
+                for k in range(n):
+                    bit = 1 << k
+                    if mask & bit:
+                        continue
+                    nc = c + dj[k + 1]
+                    nxt = mask | bit
+                    if nc < cost[nxt][k]:
+                        cost[nxt][k] = nc
+                        parent[nxt][k] = j
+
+        mask = full - 1
+        last = min(range(n), key=lambda j: cost[mask][j] + d[j + 1][0])
+        order = []
+        while last != -1:
+            order.append(last + 1)
+            mask, last = mask ^ (1 << last), parent[mask][last]
+        return order[::-1]
+
+
+class LocalSearchSolver(RouteSolver):
+    """Nearest neighbour start improved by 2-opt and Or-opt moves within a time budget"""
+
+    name = "local-search"
+
+    def __init__(self, time_budget=0.2):
+        self.time_budget = time_budget
+
+    def solve_matrix(self, d):
+        deadline = time.perf_counter() + self.time_budget
+        order = NearestNeighbourSolver().solve_matrix(d)
+        # Segment reversal is only cost-neutral inside the segment on symmetric graphs
+        symmetric = all(d[i][j] == d[j][i] for i in range(len(d)) for j in range(i))
+
+        tour = [0] + order + [0]
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            if symmetric and self.two_opt(tour, d, deadline):
+                improved = True
+            if self.or_opt(tour, d, deadline):
+                improved = True
+        return tour[1:-1]
+
+    def two_opt(self, tour, d, deadline):
+        """Reverse tour segments while that shortens the tour"""
+        improved = False
+        n = len(tour)
+        for i in range(1, n - 2):
+            if time.perf_counter() > deadline:
+                break
+            for j in range(i + 1, n - 1):
+                a, b, c, e = tour[i - 1], tour[i], tour[j], tour[j + 1]
+                if d[a][c] + d[b][e] < d[a][b] + d[c][e] - 1e-9:
+                    tour[i:j + 1] = tour[i:j + 1][::-1]
+                    improved = True
+        return improved
+
+    def or_opt(self, tour, d, deadline):
+        """Move segments of one to three stops to a cheaper position"""
+        improved = False
+        for length in (1, 2, 3):
+            i = 1
+            while i + length < len(tour):
+                if time.perf_counter() > deadline:
+                    return improved
+                prev, first, last, nxt = tour[i - 1], tour[i], tour[i + length - 1], tour[i + length]
+                gain = d[prev][first] + d[last][nxt] - d[prev][nxt]
+                segment = tour[i:i + length]
+                rest = tour[:i] + tour[i + length:]
+
+                best, best_pos = 1e-9, None
+                for j in range(len(rest) - 1):
+                    if j == i - 1:
+                        continue
+                    a, b = rest[j], rest[j + 1]
+                    delta = gain - (d[a][first] + d[last][b] - d[a][b])
+                    if delta > best:
+                        best, best_pos = delta, j
+
+                if best_pos is not None:
+                    tour[:] = rest[:best_pos + 1] + segment + rest[best_pos + 1:]
+                    improved = True
+                else:
+                    i += 1
+        return improved
+
+
+class AutoSolver(RouteSolver):
+    """Exact Held-Karp for small stop counts, local search beyond that"""
+
+    name = "auto"
+
+    def __init__(self, exact_limit=12, time_budget=0.2):
+        self.exact_limit = exact_limit
+        self.time_budget = time_budget
+
+    def solve_matrix(self, d):
+        if len(d) - 1 <= self.exact_limit:
+            return HeldKarpSolver().solve_matrix(d)
+        return LocalSearchSolver(self.time_budget).solve_matrix(d)
+
+
+SOLVERS = {
+    solver.name: solver
+    for solver in (NearestNeighbourSolver, HeldKarpSolver, LocalSearchSolver, AutoSolver)
+}
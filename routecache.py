@@ -0,0 +1,86 @@
+from collections import OrderedDict
+
+
+class RouteCache:
+    """LRU cache of solved tours by start room, stop set and graph version"""
+
+    def __init__(self, capacity=256, reuse_limit=3):
+        if capacity < 1:
+            raise ValueError("Route cache capacity must be at least 1")
+        self.capacity = capacity
+        self.reuse_limit = reuse_limit
+        self.version = 0
+        self.entries = OrderedDict()  # (solver, start, stops, version) -> (cost, order, exact)
+        self.hits = 0
+        self.reused = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def invalidate(self):
+        """Drop every tour; the planner calls this on each corridor change"""
+        self.version += 1
+        self.entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.reused + self.misses
+        return {"hits": self.hits, "reused": self.reused, "misses": self.misses, "evictions": self.evictions,
+                "entries": len(self.entries), "hit_rate": (self.hits + self.reused) / lookups if lookups else 0}
+
+    def solve(self, solver, start, targets, distance, table=None):
+        """(cost, [start, stop, ..., start]) from the cache, an adapted cached tour or the solver"""
+        stops = frozenset(targets) - {start}
+        key = (solver.name, start, stops, self.version)
+        entry = self.entries.get(key)
+        if entry is not None and entry[2]:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], list(entry[1])
+
+        # An approximate entry means the stops come up again: worth a real solve
+        adapted = self.adapt(key, distance, table) if entry is None else None
+        if adapted is not None:
+            self.reused += 1
+            entry = adapted[0], adapted[1], False
+        else:
+            self.misses += 1
+            cost, order = solver.solve(start, list(stops), distance, table)
+            entry = cost, order, True
+        self.store(key, entry)
+        return entry[0], list(entry[1])
+
+    def store(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def adapt(self, key, distance, table=None):
+        """Tour for key built from the closest cached tour, or None if none is close enough"""
+        name, start, stops, version = key
+        best, best_diff = None, self.reuse_limit + 1
+        for (other_name, other_start, other_stops, other_version), entry in self.entries.items():
+            if other_name != name or other_start != start or other_version != version:
+                continue
+            diff = len(stops ^ other_stops)
+            if diff < best_diff and stops & other_stops and entry[2] and entry[0] != float('inf'):
+                best, best_diff = entry, diff
+        if best is None:
+            return None
+
+        tour = [room for room in best[1] if room == start or room in stops]
+        legs = [distance(a, b) for a, b in zip(tour, tour[1:])]
+        for room in stops.difference(tour):
+            if table is not None:
+                to_room = [row[0] for row in table(tour, [room])]
+                from_room = table([room], tour)[0]
+            else:
+                to_room = [distance(a, room) for a in tour]
+                from_room = [distance(room, b) for b in tour]
+            _, i = min((to_room[i] + from_room[i + 1] - legs[i], i) for i in range(len(legs)))
+            tour.insert(i + 1, room)
+            legs[i:i + 1] = [to_room[i], from_room[i + 1]]
+        return sum(legs), tour
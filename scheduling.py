@@ -0,0 +1,174 @@
+import bisect
+import heapq
+import itertools
+
+from route_solver import distance_matrix
+
+# Lower numbers are served first
+PRIORITIES = {"Emergency": 0, "Urgent": 1, "Routine": 2}
+PRIORITY_NAMES = {level: name for name, level in PRIORITIES.items()}
+NO_DEADLINE = float('inf')
+
+
+def default_priority(room):
+    """Critical-care rooms are urgent by default, everything else is routine"""
+    if "ICU" in room or "Emergency" in room or "Theater" in room:
+        return PRIORITIES["Urgent"]
+    return PRIORITIES["Routine"]
+
+
+class DeliveryQueue:
+    """Pending deliveries keyed by (room, medicine) in a heap ordered by (priority, deadline, arrival)"""
+
+    def __init__(self):
+        self.heap = []
+        self.ordered = []  # Live entries in service order
+        self.entries = {}  # (room, med) -> [priority, deadline, arrival, tiebreak, key, qty]
+        self.counter = itertools.count()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def push(self, room, med, qty, priority=None, deadline=None, arrival=None):
+        """Add an order or merge it into the pending one for the same room and medicine
+
+        arrival restores a new order's place in the arrival order (e.g. from a
+        snapshot); by default it is the next one.
+        """
+        key = (room, med)
+        priority = default_priority(room) if priority is None else priority
+        deadline = NO_DEADLINE if deadline is None else deadline
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.discard(old)
+            priority = min(priority, old[0])
+            deadline = min(deadline, old[1])
+            qty += old[5]
+            arrival = old[2]
+        elif arrival is None:
+            arrival = next(self.counter)
+        entry = [priority, deadline, arrival, next(self.counter), key, qty]
+        self.entries[key] = entry
+        heapq.heappush(self.heap, entry)
+        bisect.insort(self.ordered, entry)
+
+    def remove(self, room, med):
+        """Remove an order and return it as (room, med, qty, priority, deadline)"""
+        entry = self.entries.pop((room, med))
+        self.discard(entry)
+        return room, med, entry[5], entry[0], entry[1]
+
+    def discard(self, entry):
+        """Drop an entry from the sorted list and mark its heap slot stale"""
+        # Entries compare on (priority, deadline, arrival, tiebreak), which is unique
+        del self.ordered[bisect.bisect_left(self.ordered, entry)]
+        entry[4] = None
+        self.compact()
+
+    def compact(self):
+        """Rebuild the heap without stale entries once they outnumber the live ones"""
+        if len(self.heap) > 2 * len(self.entries) + 16:
+            self.heap = [e for e in self.heap if e[4] is not None]
+            heapq.heapify(self.heap)
+
+    def take(self, room, med, qty):
+        """Take qty units off a pending order, which stays queued in place; returns the part taken"""
+        entry = self.entries[(room, med)]
+        if not 0 < qty < entry[5]:
+            raise ValueError(f"Can only take part of the {entry[5]} {med} pending for {room}")
+        entry[5] -= qty  # Not part of the ordering, so the heap and sorted list stay valid
+        return room, med, qty, entry[0], entry[1]
+
+    def peek(self):
+        """Most urgent order without removing it, or None"""
+        while self.heap and self.heap[0][4] is None:
+            heapq.heappop(self.heap)
+        if not self.heap:
+            return None
+        priority, deadline, _, _, (room, med), qty = self.heap[0]
+        return room, med, qty, priority, deadline
+
+    def pop(self):
+        """Remove and return the most urgent order"""
+        order = self.peek()
+        if order is None:
+            raise IndexError("pop from an empty delivery queue")
+        entry = heapq.heappop(self.heap)
+        del self.entries[(order[0], order[1])]
+        del self.ordered[0]  # The heap's live minimum is the first in service order
+        entry[4] = None
+        self.compact()
+        return order
+
+    def get(self, room, med):
+        entry = self.entries.get((room, med))
+        return None if entry is None else (room, med, entry[5], entry[0], entry[1])
+
+    def items(self):
+        """All pending orders in service order as (room, med, qty, priority, deadline)"""
+        return [(e[4][0], e[4][1], e[5], e[0], e[1]) for e in self.ordered]
+
+
+class TimeWindowScheduler:
+    """Insertion heuristic for one cart that keeps priority classes in order and deadlines where it can"""
+
+    def __init__(self, service_time=0):
+        self.service_time = service_time
+
+    def schedule(self, start, stops, distance, table=None):
+        """Plan a round trip from start through stops [(room, priority, deadline), ...]
+
+        Returns (cost, [start, room, ..., start], arrival times per stop, late rooms).
+        """
+        nodes = [start] + [stop[0] for stop in stops]
+        d = distance_matrix(nodes, distance, table)
+        priority = [-1] + [stop[1] for stop in stops]
+        deadline = [NO_DEADLINE] + [stop[2] for stop in stops]
+
+        insertion_order = sorted(range(1, len(nodes)), key=lambda i: (priority[i], deadline[i], -d[0][i]))
+        route = []
+        for s in insertion_order:
+            # Keep priority classes in order: s goes after every more urgent stop
+            lo = 0
+            for pos, other in enumerate(route):
+                if priority[other] < priority[s]:
+                    lo = pos + 1
+
+            arrivals = self.arrival_times(route, d)
+            late_before = [0]  # Lateness of the first pos stops
+            for r, t in zip(route, arrivals):
+                late_before.append(late_before[-1] + max(0, t - deadline[r]))
+            timed = [j for j, r in enumerate(route) if deadline[r] != NO_DEADLINE]
+
+            best = None
+            for pos in range(lo, len(route) + 1):
+                prev = route[pos - 1] if pos else 0
+                nxt = route[pos] if pos < len(route) else 0
+                delta = d[prev][s] + d[s][nxt] - d[prev][nxt]
+                arrival = (arrivals[pos - 1] + self.service_time if pos else 0) + d[prev][s]
+                shift = delta + self.service_time
+                lateness = late_before[pos] + max(0, arrival - deadline[s])
+                for j in timed[bisect.bisect_left(timed, pos):]:
+                    lateness += max(0, arrivals[j] + shift - deadline[route[j]])
+                key = (lateness, delta)
+                if best is None or key < best[0]:
+                    best = (key, pos)
+            route.insert(best[1], s)
+
+        arrivals = self.arrival_times(route, d)
+        late = [nodes[s] for s, t in zip(route, arrivals) if t > deadline[s]]
+        cost = sum(d[u][v] for u, v in zip([0] + route, route + [0]))
+        return cost, [nodes[i] for i in [0] + route + [0]], arrivals, late
+
+    def arrival_times(self, route, d):
+        times = []
+        t, prev = 0, 0
+        for s in route:
+            t += d[prev][s]
+            times.append(t)
+            t += self.service_time
+            prev = s
+        return times
@@ -0,0 +1,266 @@
+import asyncio
+import heapq
+import itertools
+from collections import deque
+
+from scheduling import NO_DEADLINE
+
+
+class Simulation:
+    """Discrete-event simulation on asyncio with a virtual clock"""
+
+    def __init__(self):
+        self.now = 0
+        self.timers = []  # (time, seq, future)
+        self.seq = itertools.count()
+        self.running = 0
+        self.starting = []
+        self.errors = []
+        self.subscribers = []
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+
+    def emit(self, event, **data):
+        for callback in self.subscribers:
+            callback(event, self.now, data)
+
+    def process(self, coro):
+        """Start a process at the current simulated time"""
+        self.running += 1
+        self.starting.append(coro)
+
+    def wait(self):
+        """Future the calling process blocks on until trigger() is called for it"""
+        self.running -= 1
+        return asyncio.get_running_loop().create_future()
+
+    def trigger(self, future, value=None):
+        if not future.done():
+            self.running += 1
+            future.set_result(value)
+
+    def timeout(self, delay):
+        """Future the calling process blocks on for delay units of simulated time"""
+        future = self.wait()
+        heapq.heappush(self.timers, (self.now + delay, next(self.seq), future))
+        return future
+
+    def finished(self, task):
+        self.running -= 1
+        if not task.cancelled() and task.exception() is not None:
+            self.errors.append(task.exception())
+
+    async def settle(self):
+        """Let processes run until every one of them is blocked on the clock or a wait()"""
+        loop = asyncio.get_running_loop()
+        while self.running > 0:
+            starting, self.starting = self.starting, []
+            for coro in starting:
+                loop.create_task(coro).add_done_callback(self.finished)
+            await asyncio.sleep(0)
+            if self.errors:
+                raise self.errors.pop(0)
+
+    async def run(self, until=None):
+        """Advance the clock until no timers are left or the next one is after until"""
+        await self.settle()
+        while self.timers and (until is None or self.timers[0][0] <= until):
+            time, _, future = heapq.heappop(self.timers)
+            self.now = time
+            self.trigger(future)
+            await self.settle()
+        if until is not None:
+            self.now = max(self.now, until)
+
+
+async def follow_route(sim, planner, speed=1.0):
+    """Move the planner's cart along its current path, taking cost / speed per corridor
+
+    Emits "move" on every arrival and "route_done" at the end of the path. If
+    the path is replaced while the cart is in a corridor (an emergency stop or
+    a replan), the cart continues along the new path from its current room.
+    """
+    while planner.delivery_in_progress:
+        path, index = planner.current_path, planner.current_delivery_index
+        if index >= len(path) - 1:
+            sim.emit("route_done", room=path[-1] if path else None, emergency=planner.emergency_activated)
+            return
+        a, b = path[index], path[index + 1]
+        cost = planner.hospital[a].get(b)
+        if cost is None:
+            sim.emit("blocked", room=a, next_room=b)
+            return
+        await sim.timeout(cost / speed)
+        if planner.current_path is path and planner.current_delivery_index == index:
+            room = planner.next_step()
+            sim.emit("move", room=room, deliveries=planner.deliveries_to(room))
+
+
+class DeliverySimulation:
+    """Several carts serving orders from the planner's inventory in simulated time"""
+
+    def __init__(self, planner, carts=1, capacity=10, speed=1.0, service_time=0, start="Pharmacy",
+                 solver=None, batcher=None):
+        if carts < 1 or capacity < 1:
+            raise ValueError("Need at least one cart with a capacity of at least 1")
+        self.planner = planner
+        self.sim = Simulation()
+        self.carts = carts
+        self.capacity = capacity
+        self.speed = speed
+        self.service_time = service_time
+        self.start = start
+        self.solver = solver or planner.route_solver
+        self.batcher = batcher
+        self.trips = deque()
+        self.arrivals = {}  # (room, med) -> arrival time of the oldest pending order
+        self.pending_arrivals = 0
+        self.idle = []
+        self.started = False
+        # Orders for the same room and medicine merge while pending, so units
+        # are what to compare between submitted and delivered
+        self.stats = {"orders": 0, "rejected": 0, "units": 0, "delivered": 0, "units_delivered": 0,
+                      "late": 0, "trips": 0, "distance": 0, "total_wait": 0, "max_wait": 0, "busy_time": 0}
+
+    def submit(self, room, med, qty, priority=None, deadline=None, at=0):
+        """Schedule an order to arrive at simulated time at"""
+        self.pending_arrivals += 1
+        self.sim.process(self.arrive(at, room, med, qty, priority, deadline))
+
+    async def arrive(self, at, room, med, qty, priority, deadline):
+        if at > self.sim.now:
+            await self.sim.timeout(at - self.sim.now)
+        self.pending_arrivals -= 1
+        deadline = None if deadline is None else self.sim.now + deadline
+        try:
+            if self.batcher is None:
+                self.planner.inventory.submit(room, med, qty, priority, deadline)
+            else:
+                window = self.batcher.window_id
+                opened = not self.batcher.window
+                self.trips.extend(self.batcher.add(room, med, qty, priority, deadline, self.sim.now))
+                if opened and self.batcher.window_id == window:
+                    self.sim.process(self.close_window(window))
+        except ValueError as e:
+            self.stats["rejected"] += 1
+            self.sim.emit("rejected", room=room, med=med, qty=qty, reason=str(e))
+        else:
+            self.stats["orders"] += 1
+            self.stats["units"] += qty
+            if self.batcher is None:
+                self.arrivals.setdefault((room, med), self.sim.now)
+            self.sim.emit("order", room=room, med=med, qty=qty)
+        self.wake_all()
+
+    async def close_window(self, window):
+        """Release the batcher's window when its time is up, unless it closed early"""
+        await self.sim.timeout(self.batcher.window_time)
+        if self.batcher.window_id == window:
+            self.trips.extend(self.batcher.release(self.sim.now))
+            self.wake_all()
+
+    def wake_all(self):
+        idle, self.idle = self.idle, []
+        for future in idle:
+            self.sim.trigger(future)
+
+    def load(self):
+        """Take the most urgent pending orders that fit in one cart
+
+        An order larger than the whole cart is split: the cart takes what fits
+        and the rest stays first in the queue for the next trip.
+        """
+        queue = self.planner.delivery_queue
+        batch = []
+        space = self.capacity
+        while queue:
+            room, med, qty, _, deadline = queue.peek()
+            if batch and qty > space:
+                break
+            part = min(qty, space)
+            self.planner.complete_delivery(room, med, part)
+            if part == qty:
+                arrival = self.arrivals.pop((room, med), self.sim.now)
+            else:
+                arrival = self.arrivals.get((room, med), self.sim.now)
+            batch.append((room, med, part, deadline, arrival))
+            space -= part
+            if space <= 0:
+                break
+        return batch
+
+    def next_trip(self):
+        """Visiting order and orders of the cart's next trip, or None if there is no work"""
+        if self.batcher is not None:
+            if not self.trips:
+                return None
+            trip = self.trips.popleft()
+            return [self.start] + trip["rooms"] + [self.start], trip["orders"]
+
+        batch = self.load()
+        if not batch:
+            return None
+        rooms = list(dict.fromkeys(order[0] for order in batch))
+        _, order = self.solver.solve(self.start, rooms, self.planner.path_index.distance,
+                                     self.planner.path_index.table)
+        return order, batch
+
+    async def cart(self, cart_id):
+        while True:
+            trip = self.next_trip()
+            if trip is None:
+                if not self.pending_arrivals and not (self.batcher is not None and self.batcher.window):
+                    return
+                await self.idle_wait()
+                continue
+
+            order, batch = trip
+            departed = self.sim.now
+            self.stats["trips"] += 1
+            self.sim.emit("trip", cart=cart_id, rooms=order[1:-1])
+            for a, b in zip(order, order[1:]):
+                path = self.planner.path_index.path(a, b)
+                for u, v in zip(path, path[1:]):
+                    cost = self.planner.hospital[u][v]
+                    await self.sim.timeout(cost / self.speed)
+                    self.stats["distance"] += cost
+                    self.sim.emit("move", cart=cart_id, room=v)
+                if b != self.start:
+                    self.unload(cart_id, b, batch)
+                    if self.service_time:
+                        await self.sim.timeout(self.service_time)
+            self.stats["busy_time"] += self.sim.now - departed
+            self.sim.emit("returned", cart=cart_id)
+
+    def idle_wait(self):
+        future = self.sim.wait()
+        self.idle.append(future)
+        return future
+
+    def unload(self, cart_id, room, batch):
+        now = self.sim.now
+        for order_room, med, qty, deadline, arrival in batch:
+            if order_room != room:
+                continue
+            late = deadline != NO_DEADLINE and now > deadline
+            wait = now - arrival
+            self.stats["delivered"] += 1
+            self.stats["units_delivered"] += qty
+            self.stats["late"] += late
+            self.stats["total_wait"] += wait
+            self.stats["max_wait"] = max(self.stats["max_wait"], wait)
+            self.sim.emit("delivered", cart=cart_id, room=room, med=med, qty=qty, late=late, wait=wait)
+
+    async def run(self, until=None):
+        """Run until every order is delivered (or until); returns the stats"""
+        if not self.started:
+            self.started = True
+            for cart_id in range(1, self.carts + 1):
+                self.sim.process(self.cart(cart_id))
+        await self.sim.run(until)
+        stats = dict(self.stats)
+        stats["time"] = self.sim.now
+        stats["mean_wait"] = stats["total_wait"] / stats["delivered"] if stats["delivered"] else 0
+        stats["utilization"] = stats["busy_time"] / (self.carts * self.sim.now) if self.sim.now else 0
+        return stats
@@ -0,0 +1,118 @@
+import bisect
+import json
+import os
+import threading
+import time
+
+# Latency bucket upper bounds in seconds: 1 microsecond doubling up to about 67 seconds
+LATENCY_BUCKETS = tuple(1e-6 * 2**i for i in range(27))
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and a few additions"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot counts values above every bound
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Estimate of the q-quantile, interpolated within its bucket"""
+        if not self.count:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                low = self.buckets[i - 1] if i else 0
+                high = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(low + (high - low) * (rank - seen) / n, self.max)
+            seen += n
+        return self.max
+
+    def snapshot(self):
+        return {"count": self.count, "sum": self.sum, "max": self.max,
+                "p50": self.quantile(0.5), "p95": self.quantile(0.95), "p99": self.quantile(0.99)}
+
+
+class Telemetry:
+    """Counters, gauges and latency histograms with Prometheus and JSON export"""
+
+    def __init__(self, prefix="hospital"):
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+
+    def increment(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def set_gauge(self, name, value):
+        self.gauges[name] = value
+
+    def observe(self, name, seconds):
+        """Record a duration in the histogram called name"""
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    def gauge(self, name):
+        value = self.gauges.get(name, 0)
+        return value() if callable(value) else value
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "time": time.time(),
+                "uptime": time.time() - self.started,
+                "counters": dict(self.counters),
+                "gauges": {name: self.gauge(name) for name in self.gauges},
+                "histograms": {name: h.snapshot() for name, h in self.histograms.items()},
+            }
+
+    def prometheus(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            for name, value in sorted(self.counters.items()):
+                metric = f"{self.prefix}_{name}_total"
+                lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+            for name in sorted(self.gauges):
+                metric = f"{self.prefix}_{name}"
+                lines += [f"# TYPE {metric} gauge", f"{metric} {self.gauge(name)}"]
+            for name, h in sorted(self.histograms.items()):
+                metric = f"{self.prefix}_{name}_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                cumulative = 0
+                for bound, n in zip(h.buckets, h.counts):
+                    cumulative += n
+                    lines.append(f'{metric}_bucket{{le="{bound:.6g}"}} {cumulative}')
+                lines += [f'{metric}_bucket{{le="+Inf"}} {h.count}', f"{metric}_sum {h.sum}",
+                          f"{metric}_count {h.count}"]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Replace path with the current metrics, atomically so scrapers never see half a file"""
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+
+    def append_json(self, path):
+        """Append the current snapshot to path as one JSON line"""
+        with open(path, "a") as f:
+            f.write(json.dumps(self.snapshot()) + "\n")
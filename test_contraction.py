@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from benchmark import generate_hospital
+from contraction import ContractionHierarchy
+from pathindex import ShortestPathIndex
+from planner import HospitalPlanner
+from test_heuristics import grid_hospital
+
+LAYOUTS = {
+    "grid": lambda: grid_hospital(side=15),
+    "generated": lambda: generate_hospital(300, seed=4),
+}
+
+
+def assert_exact(hierarchy, graph, rng, queries=60):
+    """Distances, paths and tables match a freshly built index of the current graph"""
+    exact = ShortestPathIndex(graph, precompute=False)
+    nodes = list(graph)
+    for _ in range(queries):
+        start, goal = rng.choice(nodes), rng.choice(nodes)
+        assert hierarchy.distance(start, goal) == exact.distance(start, goal), f"{start} -> {goal}"
+        path = hierarchy.path(start, goal)
+        if exact.distance(start, goal) == float('inf'):
+            assert path == []
+        else:
+            assert path[0] == start and path[-1] == goal
+            assert sum(graph[a][b] for a, b in zip(path, path[1:])) == exact.distance(start, goal)
+    sources, targets = rng.sample(nodes, 5), rng.sample(nodes, 7)
+    assert hierarchy.table(sources, targets) == exact.table(sources, targets)
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_queries_are_exact(layout):
+    _, graph = LAYOUTS[layout]()
+    assert_exact(ContractionHierarchy(graph), graph, random.Random(0))
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_queries_stay_exact_after_weight_updates(layout):
+    positions, graph = LAYOUTS[layout]()
+    planner = HospitalPlanner(positions, graph, contraction=True)
+    rng = random.Random(1)
+    assert_exact(planner.path_index, graph, rng, queries=10)  # Query the hierarchy built on the old weights
+
+    edges = [(a, b) for a in graph for b in graph[a]]
+    closed = []
+    for a, b in rng.sample(edges, 20):
+        old = graph[a][b]
+        change = rng.random()
+        if change < 0.4:
+            planner.set_edge_weight(a, b, max(old // 4, 1))
+        elif change < 0.8:
+            planner.set_edge_weight(a, b, old * 5)
+        else:
+            planner.set_edge_weight(a, b, None)
+            closed.append((a, b, old))
+    assert_exact(planner.path_index, graph, rng)
+
+    for a, b, old in closed:
+        planner.set_edge_weight(a, b, old)
+    assert_exact(planner.path_index, graph, rng)
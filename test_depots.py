@@ -0,0 +1,117 @@
+import pytest
+
+from planner import HospitalPlanner
+
+CABINETS = {"ICU": {"Morphine": 10, "Insulin": 10}, "Nurses Station": {"Paracetamol": 30}}
+
+
+def make_planner(data_dir=None, cabinets=CABINETS):
+    return HospitalPlanner(data_dir=str(data_dir) if data_dir else None, cabinets=cabinets)
+
+
+def total_units(planner, med):
+    """Stock in every depot plus what queued orders hold; moving holdings must not change it"""
+    stock = sum(store.stock.get(med, 0) for store in planner.depots.stores.values())
+    return stock + sum(qty for _, order_med, qty, _, _ in planner.delivery_queue.items() if order_med == med)
+
+
+def test_start_room_order_with_cabinets():
+    planner = make_planner()
+    planner.add_delivery("Pharmacy", "Paracetamol", 2)
+    planner.add_delivery("Cafeteria", "Paracetamol", 2)
+    path = planner.start_delivery()
+    assert path[0] == path[-1] == "Pharmacy"
+    assert "Cafeteria" in path
+    assert any(stop[0] == "Pharmacy" and stop[1] == "deliver" for stop in planner.depot_stops)
+
+
+def test_cabinet_serves_what_the_pharmacy_lacks():
+    planner = make_planner()
+    before = total_units(planner, "Morphine")
+    planner.add_delivery("ICU Room 1", "Morphine", 25)
+    planner.start_delivery()
+    assert planner.depots.sourced == {("ICU Room 1", "Morphine"): {"ICU": 5}}
+    assert planner.medicines["Morphine"] == 10
+    assert planner.depots.stock("ICU")["Morphine"] == 5
+    assert total_units(planner, "Morphine") == before
+
+
+def test_commit_moves_holds_between_orders():
+    # ICU's Morphine is all held for Room 1; the new plan hands it to Room 2 instead
+    planner = make_planner(cabinets={"ICU": {"Morphine": 5}})
+    planner.add_delivery("ICU Room 1", "Morphine", 5)
+    planner.add_delivery("ICU Room 2", "Morphine", 5)
+    planner.depots.commit({"sources": {("ICU Room 1", "Morphine"): {"ICU": 5},
+                                       ("ICU Room 2", "Morphine"): {"Pharmacy": 5}}}, reserved=True)
+    before = total_units(planner, "Morphine")
+    assert planner.depots.stock("ICU")["Morphine"] == 0
+
+    # Room 2 comes first, so taking its hold before Room 1 gives its back would run out
+    planner.depots.commit({"sources": {("ICU Room 2", "Morphine"): {"ICU": 5},
+                                       ("ICU Room 1", "Morphine"): {"Pharmacy": 5}}}, reserved=True)
+    assert planner.depots.sourced == {("ICU Room 2", "Morphine"): {"ICU": 5}}
+    assert planner.depots.stores["ICU"].held == {("ICU Room 2", "Morphine"): 5}
+    assert planner.depots.stock("ICU")["Morphine"] == 0
+    assert total_units(planner, "Morphine") == before
+
+
+def test_infeasible_commit_changes_nothing():
+    planner = make_planner(cabinets={"ICU": {"Morphine": 5}})
+    planner.add_delivery("ICU Room 1", "Morphine", 5)
+    planner.add_delivery("ICU Room 2", "Morphine", 5)
+    planner.depots.commit({"sources": {("ICU Room 1", "Morphine"): {"ICU": 2}}}, reserved=True)
+    sourced = dict(planner.depots.sourced)
+    stocks = {depot: dict(store.stock) for depot, store in planner.depots.stores.items()}
+
+    with pytest.raises(ValueError):
+        planner.depots.commit({"sources": {("ICU Room 1", "Morphine"): {"ICU": 1},
+                                           ("ICU Room 2", "Morphine"): {"ICU": 5}}}, reserved=True)
+    assert planner.depots.sourced == sourced
+    assert {depot: dict(store.stock) for depot, store in planner.depots.stores.items()} == stocks
+
+
+def test_holds_survive_restart(tmp_path):
+    planner = make_planner(tmp_path)
+    planner.add_delivery("ICU Room 1", "Morphine", 25)
+    planner.start_delivery()
+    planner.reset_delivery()
+
+    restarted = make_planner(tmp_path)
+    assert restarted.depots.sourced == {("ICU Room 1", "Morphine"): {"ICU": 5}}
+    restarted.remove_delivery(0)
+    assert restarted.medicines["Morphine"] == 30
+    assert restarted.depots.stock("ICU")["Morphine"] == 10
+    assert make_planner(tmp_path).depots.stores["ICU"].held == {}
+
+
+def test_delivery_releases_holds_without_restocking(tmp_path):
+    planner = make_planner(tmp_path)
+    planner.add_delivery("ICU Room 1", "Morphine", 25)
+    planner.start_delivery()
+    planner.reset_delivery()
+    planner.complete_delivery("ICU Room 1", "Morphine")
+
+    restarted = make_planner(tmp_path)
+    assert restarted.depots.sourced == {}
+    assert restarted.medicines["Morphine"] == 10
+    assert restarted.depots.stock("ICU")["Morphine"] == 5
+
+
+def test_pickup_detours_count_towards_lateness():
+    planner = make_planner()
+    deadline = planner.path_index.distance("Pharmacy", "ICU Room 1")
+    planner.add_delivery("ICU Room 1", "Morphine", 25, deadline=deadline)
+    planner.add_delivery("Cafeteria", "Paracetamol", 1)
+    planner.start_delivery()
+    # The scheduler's direct route is on time, but the ICU cabinet's 5 units come on a second trip
+    assert [stop[:2] for stop in planner.depot_stops[:4]] == [
+        ("Pharmacy", "pickup"), ("ICU Room 1", "deliver"), ("ICU", "pickup"), ("ICU Room 1", "deliver")]
+    assert planner.late_rooms == ["ICU Room 1"]
+
+
+def test_start_room_delivery_is_on_time():
+    planner = make_planner()
+    planner.add_delivery("Pharmacy", "Paracetamol", 1, deadline=0)
+    planner.add_delivery("Cafeteria", "Paracetamol", 1, deadline=100)
+    planner.start_delivery()
+    assert planner.late_rooms == []
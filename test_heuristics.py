@@ -0,0 +1,105 @@
+import random
+
+import pytest
+
+from benchmark import generate_hospital
+from heuristics import LandmarkHeuristic, ScaledEuclideanHeuristic
+from pathindex import ShortestPathIndex
+from planner import HospitalPlanner
+
+HEURISTICS = {
+    "scaled": lambda graph, positions: ScaledEuclideanHeuristic(graph, positions),
+    "alt": lambda graph, positions: LandmarkHeuristic(graph, positions, num_landmarks=4),
+}
+
+
+def grid_hospital(side=20, seed=0):
+    """Corridor grid with costs from 1 to 3 per 10 pixels, so most rooms have many alternative routes"""
+    rng = random.Random(seed)
+    positions = {f"R{x}-{y}": (x * 40, y * 40) for x in range(side) for y in range(side)}
+    graph = {room: {} for room in positions}
+    for x in range(side):
+        for y in range(side):
+            for nx, ny in ((x + 1, y), (x, y + 1)):
+                if nx < side and ny < side:
+                    cost = 4 * rng.randint(1, 3)
+                    graph[f"R{x}-{y}"][f"R{nx}-{ny}"] = graph[f"R{nx}-{ny}"][f"R{x}-{y}"] = cost
+    return positions, graph
+
+
+LAYOUTS = {
+    "grid": grid_hospital,
+    "generated": lambda seed: generate_hospital(400, seed=seed),
+}
+
+
+def make_planner(name, layout="grid", seed=0):
+    positions, graph = LAYOUTS[layout](seed=seed)
+    planner = HospitalPlanner(positions, graph, precompute_paths=False)
+    planner.heuristic_model = HEURISTICS[name](graph, positions)
+    return planner
+
+
+def assert_optimal(planner, rng, pairs=(), queries=60):
+    """A* costs equal Dijkstra distances on a freshly built index of the current graph"""
+    exact = ShortestPathIndex(planner.hospital, precompute=False)
+    nodes = list(planner.hospital)
+    for start, goal in list(pairs) + [(rng.choice(nodes), rng.choice(nodes)) for _ in range(queries)]:
+        cost, path = planner.a_star_search(start, goal)
+        assert cost == exact.distance(start, goal), f"{start} -> {goal}"
+        if path:
+            assert sum(planner.hospital[a][b] for a, b in zip(path, path[1:])) == cost
+
+
+@pytest.mark.parametrize("name", HEURISTICS)
+@pytest.mark.parametrize("layout", LAYOUTS)
+@pytest.mark.parametrize("seed", [0, 1])
+def test_a_star_is_optimal(name, layout, seed):
+    planner = make_planner(name, layout, seed)
+    assert_optimal(planner, random.Random(seed))
+
+
+@pytest.mark.parametrize("name", HEURISTICS)
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_a_star_stays_optimal_after_edge_updates(name, layout):
+    planner = make_planner(name, layout, seed=2)
+    rng = random.Random(2)
+    nodes = list(planner.hospital)
+    pairs = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(40)]
+    for start, goal in pairs:
+        planner.a_star_search(start, goal)  # Warm up calibration and landmark tables on the old weights
+
+    # Corridors on the queried shortest paths get much cheaper, dearer or closed
+    closed = []
+    for start, goal in pairs[:15]:
+        path = planner.a_star_search(start, goal)[1]
+        for a, b in zip(path, path[1:]):
+            if rng.random() < 0.5:
+                continue
+            old = planner.hospital[a][b]
+            change = rng.random()
+            if change < 0.6:
+                planner.set_edge_weight(a, b, old // 4)
+            elif change < 0.8:
+                planner.set_edge_weight(a, b, old * 3)
+            else:
+                planner.set_edge_weight(a, b, None)
+                closed.append((a, b, old))
+    assert_optimal(planner, rng, pairs)
+
+    for a, b, old in closed:
+        planner.set_edge_weight(a, b, old)
+    assert_optimal(planner, rng, pairs)
+
+
+def test_set_edge_weight_keeps_path_index_exact():
+    planner = make_planner("scaled", "generated", seed=3)
+    rng = random.Random(3)
+    nodes = list(planner.hospital)
+    edges = [(a, b) for a in planner.hospital for b in planner.hospital[a]]
+    for a, b in rng.sample(edges, 10):
+        planner.set_edge_weight(a, b, planner.hospital[a][b] + rng.choice([-1, 3]) or 1)
+    exact = ShortestPathIndex(planner.hospital, precompute=False)
+    for _ in range(40):
+        start, goal = rng.choice(nodes), rng.choice(nodes)
+        assert planner.path_index.distance(start, goal) == exact.distance(start, goal)
@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+from inventory import InventoryStore
+from scheduling import PRIORITIES
+
+STOCK = {"Paracetamol": 100, "Morphine": 20}
+
+
+def open_store(data_dir, **kwargs):
+    """The app opens its store with the initial stock every time; the log and snapshot hold the changes"""
+    return InventoryStore(STOCK, data_dir=str(data_dir), **kwargs)
+
+
+def state(store):
+    return dict(store.stock), store.orders.items(), dict(store.held)
+
+
+def test_log_replay_restores_every_operation(tmp_path):
+    store = open_store(tmp_path)
+    store.submit("Room 101", "Paracetamol", 5)
+    store.submit("ICU Room 1", "Morphine", 4, PRIORITIES["Emergency"], deadline=300)
+    store.submit("Room 102", "Paracetamol", 3)
+    store.cancel("Room 102", "Paracetamol")
+    store.complete("Room 101", "Paracetamol", 2)
+    store.hold("Room 101", "Morphine", 3)
+    store.unhold("Room 101", "Morphine", 1, restock=False)
+    store.reserve("Paracetamol", 10)
+    expected = state(store)
+    store.close()
+
+    recovered = open_store(tmp_path)
+    assert state(recovered) == expected
+    assert [order[:3] for order in recovered.orders_for_room("Room 101")] == [("Room 101", "Paracetamol", 3)]
+    assert recovered.rooms_for_medicine("Paracetamol") == {"Room 101"}
+    recovered.close()
+
+
+def test_torn_log_tail_is_dropped(tmp_path):
+    store = open_store(tmp_path)
+    store.submit("Room 101", "Paracetamol", 5)
+    expected = state(store)
+    store.close()
+    with open(os.path.join(tmp_path, "inventory.wal"), "a") as f:
+        f.write('{"op": "submit", "room": "Room 102"')
+
+    recovered = open_store(tmp_path)
+    assert state(recovered) == expected
+    recovered.submit("Room 102", "Paracetamol", 1)  # Appends after the good records
+    recovered.close()
+    assert len(open_store(tmp_path).orders) == 2
+
+
+def test_snapshot_and_newer_log_records_are_recovered(tmp_path):
+    store = open_store(tmp_path, snapshot_every=3)
+    for i in range(5):
+        store.submit(f"Room {101 + i}", "Paracetamol", 1 + i)
+    store.hold("Room 101", "Morphine", 2)
+    expected = state(store)
+    store.close()
+    assert os.path.exists(os.path.join(tmp_path, "inventory.snapshot.json"))
+
+    recovered = open_store(tmp_path)
+    assert state(recovered) == expected
+    recovered.close()
+
+
+def test_arrival_order_survives_a_snapshot(tmp_path):
+    store = open_store(tmp_path)
+    store.submit("Room 101", "Paracetamol", 1, PRIORITIES["Routine"])
+    store.submit("ICU Room 1", "Morphine", 1, PRIORITIES["Emergency"])
+    store.snapshot()
+    store.close()
+
+    recovered = open_store(tmp_path)
+    recovered.submit("Room 102", "Paracetamol", 1, PRIORITIES["Emergency"])
+    # Escalating keeps Room 101's arrival, which came before both emergencies
+    recovered.submit("Room 101", "Paracetamol", 1, PRIORITIES["Emergency"])
+    rooms = [order[0] for order in recovered.orders.items()]
+    assert rooms == ["Room 101", "ICU Room 1", "Room 102"]
+    recovered.close()
+
+    assert [order[0] for order in open_store(tmp_path).orders.items()] == rooms
+
+
+def test_failed_operation_is_not_logged(tmp_path):
+    store = open_store(tmp_path)
+    with pytest.raises(ValueError):
+        store.submit("Room 101", "Morphine", 50)
+    with pytest.raises(ValueError):
+        store.unhold("Room 101", "Morphine", 1)
+    store.close()
+    assert state(open_store(tmp_path)) == (STOCK, [], {})
@@ -0,0 +1,66 @@
+import copy
+
+import pytest
+
+from benchmark import generate_hospital
+from layout import load_layout
+from planner import HospitalPlanner
+from scheduling import PRIORITIES
+
+
+def leg_cost(planner, leg):
+    return sum(planner.hospital[a][b] for a, b in zip(leg, leg[1:]))
+
+
+def test_stop_at_the_start_room_counts_as_reached():
+    layout = load_layout()
+    planner = HospitalPlanner(layout.room_positions(), layout.connections())
+    planner.add_delivery("Pharmacy", "Paracetamol", 1, PRIORITIES["Emergency"])
+    planner.add_delivery("Room 101", "Paracetamol", 1, PRIORITIES["Routine"])
+    planner.start_delivery()
+    assert planner.route_stops[:2] == ["Pharmacy", "Pharmacy"]
+
+    planner.next_step()
+    other = next(room for room in planner.hospital["Pharmacy"] if room != planner.current_room)
+    path = planner.close_corridor("Pharmacy", other)
+    assert path[planner.current_delivery_index + 1] != "Pharmacy"  # No detour back to the start
+    assert path.count("Pharmacy") == 2
+
+
+def test_reopened_corridor_shortens_later_legs():
+    positions, graph = generate_hospital(400, seed=3)
+    planner = HospitalPlanner(positions, copy.deepcopy(graph), precompute_paths=False)
+    rooms = [room for room in graph if "Room" in room]
+    for room in rooms[::40][:6]:
+        planner.add_delivery(room, "Paracetamol", 1)
+    planner.start_delivery()
+    planner.next_step()
+
+    leg = max(planner.route_legs[planner.next_stop_index:], key=len)
+    for a, b in zip(leg, leg[1:]):
+        try:
+            planner.close_corridor(a, b)
+            break
+        except ValueError:
+            continue  # A bridge; the closure was rolled back
+    assert planner.closed_corridors
+    planner.reopen_corridor(a, b)
+    for i in range(planner.next_stop_index, len(planner.route_legs)):
+        start, goal = planner.route_stops[i], planner.route_stops[i + 1]
+        assert leg_cost(planner, planner.route_legs[i]) == planner.path_index.distance(start, goal)
+
+
+def test_failed_closure_is_rolled_back():
+    positions, graph = generate_hospital(400, seed=3)
+    planner = HospitalPlanner(positions, copy.deepcopy(graph), precompute_paths=False)
+    room = next(room for room in graph if "Room" in room and len(graph[room]) == 1)
+    planner.add_delivery(room, "Paracetamol", 1)
+    planner.start_delivery()
+    path = list(planner.current_path)
+    neighbor = next(iter(graph[room]))
+
+    with pytest.raises(ValueError):
+        planner.close_corridor(room, neighbor)
+    assert planner.hospital[room] == graph[room]
+    assert planner.current_path == path
+    assert planner.closed_corridors == {}
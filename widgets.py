@@ -0,0 +1,169 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+class StockTable:
+    """Medicine stock in a Treeview; update() only touches rows whose quantity changed"""
+
+    def __init__(self, parent, height=6):
+        self.frame = ttk.Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=("qty",), height=height, selectmode="none")
+        self.tree.heading("#0", text="Medicine")
+        self.tree.heading("qty", text="Stock")
+        self.tree.column("#0", width=170)
+        self.tree.column("qty", width=60, anchor="e")
+        for tag, color in (("low", "red"), ("short", "orange"), ("ok", "black")):
+            self.tree.tag_configure(tag, foreground=color)
+        scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.shown = {}  # medicine -> quantity on screen
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def update(self, stock):
+        """Show the stock dict; returns the number of rows changed"""
+        changed = 0
+        for med in [med for med in self.shown if med not in stock]:
+            self.tree.delete(med)
+            del self.shown[med]
+            changed += 1
+        for med, qty in stock.items():
+            old = self.shown.get(med)
+            if old == qty:
+                continue
+            tag = "low" if qty < 10 else "short" if qty < 25 else "ok"
+            if old is None:
+                self.tree.insert("", "end", iid=med, text=med, values=(qty,), tags=(tag,))
+            else:
+                self.tree.item(med, values=(qty,), tags=(tag,))
+            self.shown[med] = qty
+            changed += 1
+        return changed
+
+
+class OrderList:
+    """Pending orders in a Treeview that loads a page at a time and filters as you type"""
+
+    def __init__(self, parent, height=10, page=200):
+        self.frame = ttk.Frame(parent)
+        self.page = page
+        self.loaded = page
+        self.rows = []  # every (key, text) row in display order
+        self.lowered = []  # row texts in lower case, for filtering
+        self.matching = 0
+        self.shown = []  # keys on screen, in order
+        self.texts = {}  # key -> text on screen
+        self.iids = {}  # key -> Treeview item
+        self.keys = {}  # Treeview item -> key
+        self.next_iid = 0
+
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", lambda *args: self.refresh(reset=True))
+        ttk.Entry(self.frame, textvariable=self.filter_var).pack(fill=tk.X)
+        body = ttk.Frame(self.frame)
+        body.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(body, show="tree", height=height, selectmode="browse")
+        self.scrollbar = ttk.Scrollbar(body, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=self.on_scroll)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.status_var = tk.StringVar()
+        ttk.Label(self.frame, textvariable=self.status_var).pack(anchor="w")
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def update(self, rows):
+        """Show (key, text) rows; returns the number of widget operations it took"""
+        self.rows = list(rows)
+        self.lowered = [text.lower() for _, text in self.rows]
+        return self.refresh()
+
+    def selected(self):
+        """Key of the selected row, or None"""
+        selection = self.tree.selection()
+        return self.keys.get(selection[0]) if selection else None
+
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if float(last) > 0.9 and len(self.shown) < self.matching:
+            self.loaded = len(self.shown) + self.page
+            self.tree.after_idle(self.refresh)
+
+    def refresh(self, reset=False):
+        """Bring the widget in line with the rows, filter and loaded count"""
+        if reset:
+            self.loaded = self.page
+        needle = self.filter_var.get().strip().lower()
+        if needle:
+            rows = [row for row, text in zip(self.rows, self.lowered) if needle in text]
+        else:
+            rows = self.rows
+        self.matching = len(rows)
+        visible = rows[:self.loaded]
+        self.status_var.set(f"{len(visible)} of {self.matching} orders shown" if visible else "No orders")
+
+        ops = 0
+        wanted = {key for key, _ in visible}
+        for key in self.shown:
+            if key not in wanted:
+                iid = self.iids.pop(key)
+                del self.keys[iid], self.texts[key]
+                self.tree.delete(iid)
+                ops += 1
+        # The widget holds the rows placed so far followed by the remaining
+        # old rows in their old order, so the first unplaced old row is at i
+        old = [key for key in self.shown if key in wanted]
+        placed = set()
+        j = 0
+        for i, (key, text) in enumerate(visible):
+            while j < len(old) and old[j] in placed:
+                j += 1
+            if j < len(old) and old[j] == key:
+                j += 1
+            elif key in self.iids:
+                self.tree.move(self.iids[key], "", i)
+                ops += 1
+            else:
+                iid = f"o{self.next_iid}"
+                self.next_iid += 1
+                self.tree.insert("", i, iid=iid, text=text)
+                self.iids[key], self.keys[iid], self.texts[key] = iid, key, text
+                ops += 1
+            if self.texts[key] != text:
+                self.tree.item(self.iids[key], text=text)
+                self.texts[key] = text
+                ops += 1
+            placed.add(key)
+        self.shown = [key for key, _ in visible]
+        return ops
+
+
+class FilterCombobox(ttk.Combobox):
+    """Combobox over many choices whose list holds only the first limit matches of what is typed"""
+
+    def __init__(self, parent, choices, limit=100, **kwargs):
+        self.choices = list(choices)
+        self.lowered = [choice.lower() for choice in self.choices]
+        self.limit = limit
+        super().__init__(parent, values=self.choices[:limit], **kwargs)
+        self.bind("<KeyRelease>", self.on_key)
+
+    def matches(self, text):
+        needle = text.strip().lower()
+        if not needle:
+            return self.choices[:self.limit]
+        found = []
+        for choice, lowered in zip(self.choices, self.lowered):
+            if needle in lowered:
+                found.append(choice)
+                if len(found) == self.limit:
+                    break
+        return found
+
+    def on_key(self, event):
+        if event.keysym not in ("Up", "Down", "Return", "Escape", "Tab"):
+            self.configure(values=self.matches(self.get()))